@@ -6,9 +6,20 @@
 """
 
 from django.contrib import admin
+from django.contrib.admin.exceptions import DisallowedModelAdminLookup
+from django.contrib.admin.options import IS_POPUP_VAR, TO_FIELD_VAR
+from django.contrib.admin.views.main import ALL_VAR, ERROR_FLAG, ORDER_VAR, PAGE_VAR, SEARCH_VAR
 from django.contrib.auth.admin import UserAdmin
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
-from .models import CustomUser
+from .bulk_jobs import apply_user_action
+from .changelist import USER_SEARCH_FIELDS, EstimatedCountPaginator, search_users
+from .mail_queue import REDACTED_TEMPLATES
+from .models import BulkUserJob, CustomUser, OutgoingEmail
+
+
+# Служебные параметры адреса списка, которые не являются фильтрами
+CHANGELIST_PARAMS = frozenset({ALL_VAR, ERROR_FLAG, IS_POPUP_VAR, ORDER_VAR, PAGE_VAR, SEARCH_VAR, TO_FIELD_VAR})
 
 
 @admin.register(CustomUser)
@@ -17,7 +28,9 @@ class CustomUserAdmin(UserAdmin):
     Кастомная административная панель для модели CustomUser.
     
     Адаптирует стандартный UserAdmin для работы с нашей
-    кастомной моделью пользователя.
+    кастомной моделью пользователя. Список рассчитан на большую
+    таблицу: поиск по индексу (см. accounts.changelist) и оценка
+    количества строк вместо COUNT(*).
     """
     
     # Поля, отображаемые в списке пользователей
@@ -41,13 +54,14 @@ class CustomUserAdmin(UserAdmin):
         'date_joined'
     )
     
-    # Поля для поиска
-    search_fields = (
-        'email',
-        'first_name',
-        'last_name',
-        'phone_number'
-    )
+    # Поля для поиска (в режимах trigram и contains, см. get_search_results)
+    search_fields = USER_SEARCH_FIELDS
+    
+    search_help_text = 'Начало email или id пользователя (режим ACCOUNTS_ADMIN_SEARCH=prefix)'
+    
+    # Оценка количества вместо COUNT(*) по всей таблице
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     # Поля, доступные только для чтения
     readonly_fields = (
@@ -118,6 +132,21 @@ class CustomUserAdmin(UserAdmin):
         }),
     )
     
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Ищет пользователей в режиме из настройки ACCOUNTS_ADMIN_SEARCH.
+        
+        Args:
+            request: HTTP запрос
+            queryset: Пользователи
+            search_term (str): Строка поиска
+            
+        Returns:
+            tuple: (пользователи, возможны ли дубликаты)
+        """
+        # Тот же поиск, что и у фоновых массовых операций
+        return search_users(queryset, search_term), False
+    
     # Действия, доступные для группы пользователей
     actions = [
         'activate_users',
@@ -126,6 +155,62 @@ class CustomUserAdmin(UserAdmin):
         'make_staff'
     ]
     
+    def get_selection_criteria(self, request, queryset):
+        """
+        Возвращает условия выборки действия для accounts.bulk_jobs.
+        
+        При «выбрать все» выборка - это фильтры и поиск текущего списка
+        (параметры адреса страницы), иначе - отмеченные пользователи
+        одной страницы.
+        
+        Args:
+            request: HTTP запрос
+            queryset: Выбранные пользователи
+            
+        Returns:
+            dict: Аргументы filters и search
+            
+        Raises:
+            DisallowedModelAdminLookup: Если фильтр недопустим
+        """
+        if request.POST.get('select_across') != '1':
+            return {'filters': {'pk__in': list(queryset.values_list('pk', flat=True))}}
+        
+        filters = {}
+        for lookup, value in request.GET.items():
+            if lookup in CHANGELIST_PARAMS:
+                continue
+            if not self.lookup_allowed(lookup, value):
+                raise DisallowedModelAdminLookup(f'Фильтр {lookup} недопустим')
+            filters[lookup] = value
+        return {'filters': filters, 'search': request.GET.get(SEARCH_VAR, '')}
+    
+    def run_bulk_action(self, request, queryset, action, done_message):
+        """
+        Выполняет массовое действие или ставит его в очередь.
+        
+        Большие выборки (например, «выбрать все» по всей таблице)
+        обрабатываются командой run_user_jobs пачками; в задаче
+        сохраняются условия выборки, а не id пользователей.
+        
+        Args:
+            request: HTTP запрос
+            queryset: Выбранные пользователи
+            action (str): Одно из BulkUserJob.ACTION_*
+            done_message (str): Сообщение с {updated} для небольшой выборки
+        """
+        updated, job = apply_user_action(
+            action, created_by=request.user, **self.get_selection_criteria(request, queryset)
+        )
+        if job is None:
+            self.message_user(request, done_message.format(updated=updated))
+        else:
+            self.message_user(
+                request,
+                f'Выборка большая: поставлена в очередь задача №{job.pk}. '
+                'Ход выполнения - в разделе «Массовые операции над пользователями».'
+            )
+    
     def activate_users(self, request, queryset):
         """
         Активирует выбранных пользователей.
@@ -134,10 +219,9 @@ class CustomUserAdmin(UserAdmin):
             request: HTTP запрос
             queryset: Выбранные пользователи
         """
-        updated = queryset.update(is_active=True)
-        self.message_user(
-            request,
-            f'{updated} пользователь(ей) было активировано.'
+        self.run_bulk_action(
+            request, queryset, BulkUserJob.ACTION_ACTIVATE,
+            '{updated} пользователь(ей) было активировано.'
         )
     activate_users.short_description = "Активировать выбранных пользователей"
     
@@ -149,10 +233,9 @@ class CustomUserAdmin(UserAdmin):
             request: HTTP запрос
             queryset: Выбранные пользователи
         """
-        updated = queryset.update(is_active=False)
-        self.message_user(
-            request,
-            f'{updated} пользователь(ей) было деактивировано.'
+        self.run_bulk_action(
+            request, queryset, BulkUserJob.ACTION_DEACTIVATE,
+            '{updated} пользователь(ей) было деактивировано.'
         )
     deactivate_users.short_description = "Деактивировать выбранных пользователей"
     
@@ -164,10 +247,9 @@ class CustomUserAdmin(UserAdmin):
             request: HTTP запрос
             queryset: Выбранные пользователи
         """
-        updated = queryset.update(email_confirmed=True)
-        self.message_user(
-            request,
-            f'Email адреса {updated} пользователь(ей) были подтверждены.'
+        self.run_bulk_action(
+            request, queryset, BulkUserJob.ACTION_CONFIRM_EMAIL,
+            'Email адреса {updated} пользователь(ей) были подтверждены.'
         )
     confirm_emails.short_description = "Подтвердить email выбранных пользователей"
     
@@ -179,9 +261,149 @@ class CustomUserAdmin(UserAdmin):
             request: HTTP запрос
             queryset: Выбранные пользователи
         """
-        updated = queryset.update(is_staff=True)
+        self.run_bulk_action(
+            request, queryset, BulkUserJob.ACTION_MAKE_STAFF,
+            '{updated} пользователь(ей) получили права сотрудника.'
+        )
+    make_staff.short_description = "Сделать сотрудниками"
+
+
+@admin.register(BulkUserJob)
+class BulkUserJobAdmin(admin.ModelAdmin):
+    """
+    Административная панель фоновых массовых операций.
+
+    Задачи создаются действиями списка пользователей и выполняются
+    командой run_user_jobs; здесь виден их прогресс.
+    """
+
+    list_display = (
+        'id',
+        'action',
+        'status',
+        'progress_display',
+        'processed',
+        'created_by',
+        'created_at',
+        'finished_at'
+    )
+
+    list_filter = ('status', 'action')
+
+    list_select_related = ('created_by',)
+
+    readonly_fields = (
+        'action',
+        'filters',
+        'search',
+        'status',
+        'last_pk',
+        'max_pk',
+        'processed',
+        'last_error',
+        'created_by',
+        'created_at',
+        'finished_at'
+    )
+
+
+    actions = ['retry_jobs']
+
+    def has_add_permission(self, request):
+        """Задачи создаются только действиями списка пользователей."""
+        return False
+
+    @admin.display(description='Прогресс')
+    def progress_display(self, obj):
+        """Прогресс задачи в процентах."""
+        return f'{obj.progress}%'
+
+    def retry_jobs(self, request, queryset):
+        """
+        Возвращает задачи с ошибкой в очередь (с места остановки).
+
+        Args:
+            request: HTTP запрос
+            queryset: Выбранные задачи
+        """
+        updated = queryset.filter(status=BulkUserJob.STATUS_FAILED).update(
+            status=BulkUserJob.STATUS_PENDING,
+            last_error='',
+            finished_at=None
+        )
         self.message_user(
             request,
-            f'{updated} пользователь(ей) получили права сотрудника.'
+            f'{updated} задач(а/и) снова поставлено в очередь.'
         )
-    make_staff.short_description = "Сделать сотрудниками"
+    retry_jobs.short_description = "Продолжить выбранные задачи"
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    """
+    Административная панель очереди исходящей почты.
+
+    Позволяет следить за отправкой писем и повторно ставить
+    в очередь письма, которые не удалось отправить.
+    """
+
+    list_display = (
+        'to_email',
+        'subject',
+        'status',
+        'attempts',
+        'next_attempt_at',
+        'created_at',
+        'sent_at'
+    )
+
+    list_filter = ('status',)
+
+    search_fields = ('to_email',)
+
+    readonly_fields = (
+        'attempts',
+        'last_error',
+        'created_at',
+        'sent_at'
+    )
+
+    actions = ['retry_emails']
+
+    def get_exclude(self, request, obj=None):
+        """
+        Скрывает текст писем с одноразовыми ссылками.
+
+        Args:
+            request: HTTP запрос
+            obj (OutgoingEmail): Просматриваемое письмо
+
+        Returns:
+            list: Поля, которые не показываются в форме
+        """
+        exclude = list(super().get_exclude(request, obj) or ())
+        if obj is not None and obj.template in REDACTED_TEMPLATES:
+            exclude += ['body', 'html_body']
+        return exclude
+
+    def retry_emails(self, request, queryset):
+        """
+        Повторно ставит выбранные письма в очередь.
+
+        Args:
+            request: HTTP запрос
+            queryset: Выбранные письма
+        """
+        # Текст неудачных писем с одноразовыми ссылками уже удален
+        updated = queryset.exclude(status=OutgoingEmail.STATUS_SENT).exclude(
+            template__in=REDACTED_TEMPLATES
+        ).update(
+            status=OutgoingEmail.STATUS_PENDING,
+            attempts=0,
+            next_attempt_at=timezone.now()
+        )
+        self.message_user(
+            request,
+            f'{updated} письм(о/а) снова поставлено в очередь.'
+        )
+    retry_emails.short_description = "Повторить отправку выбранных писем"
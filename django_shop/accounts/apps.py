@@ -22,3 +22,30 @@ class AccountsConfig(AppConfig):
     
     # Человеко-читаемое имя приложения
     verbose_name = 'Управление аккаунтами'
+    
+    def ready(self):
+        """
+        Подключение обработчиков сигналов.
+        
+        Стандартный update_last_login заменяется на record_login,
+        который записывает last_login и last_login_ip одним запросом.
+        Изменения пользователей сбрасывают их снимки в кеше (user_cache)
+        и обновляют поисковый индекс (search).
+        """
+        from django.contrib.auth.models import update_last_login
+        from django.contrib.auth.signals import user_logged_in
+        from django.db.models.signals import post_delete, post_save
+        from .models import CustomUser
+        from .signals import (
+            invalidate_user_cache,
+            record_login,
+            remove_from_search_index,
+            update_search_index,
+        )
+        
+        user_logged_in.disconnect(update_last_login, dispatch_uid='update_last_login')
+        user_logged_in.connect(record_login, dispatch_uid='accounts_record_login')
+        post_save.connect(invalidate_user_cache, sender=CustomUser, dispatch_uid='accounts_user_cache_save')
+        post_delete.connect(invalidate_user_cache, sender=CustomUser, dispatch_uid='accounts_user_cache_delete')
+        post_save.connect(update_search_index, sender=CustomUser, dispatch_uid='accounts_user_search_save')
+        post_delete.connect(remove_from_search_index, sender=CustomUser, dispatch_uid='accounts_user_search_delete')
@@ -0,0 +1,100 @@
+"""
+Бэкенды аутентификации для приложения accounts.
+
+EmailBackend загружает пользователя по email одним запросом и проверяет
+пароль и статус аккаунта на уже загруженном объекте. Форма входа
+использует те же методы напрямую, чтобы не загружать пользователя
+повторно через authenticate(). Пользователь сессии (get_user)
+берется из кеша снимков accounts.user_cache.
+"""
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from .user_cache import get_cached_user
+
+UserModel = get_user_model()
+
+
+class EmailBackend(ModelBackend):
+    """
+    Аутентификация по email и паролю.
+    """
+
+    def get_user_by_email(self, email):
+        """
+        Загружает пользователя по email одним запросом.
+
+        Args:
+            email (str): Email адрес пользователя
+
+        Returns:
+            CustomUser: Пользователь или None, если он не найден
+        """
+        try:
+            return UserModel._default_manager.get_by_natural_key(email)
+        except UserModel.DoesNotExist:
+            return None
+
+    def check_credentials(self, user, password):
+        """
+        Проверяет пароль и возможность входа для загруженного пользователя.
+
+        Если хеш пароля устарел (например, сменился предпочтительный
+        алгоритм хеширования), check_password прозрачно перехеширует
+        пароль и сохранит только поле password.
+
+        Args:
+            user (CustomUser): Загруженный пользователь
+            password (str): Введенный пароль
+
+        Returns:
+            bool: True, если пароль верный и пользователь может войти
+        """
+        return user.check_password(password) and self.user_can_authenticate(user)
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        """
+        Аутентифицирует пользователя по email и паролю.
+
+        Args:
+            request: HTTP запрос
+            username (str): Email адрес пользователя
+            password (str): Пароль
+
+        Returns:
+            CustomUser: Пользователь или None при неудаче
+        """
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        user = self.get_user_by_email(username)
+        if user is None:
+            # Хешируем пароль впустую, чтобы время ответа не выдавало
+            # отсутствие пользователя (как в ModelBackend)
+            UserModel().set_password(password)
+            return None
+
+        if self.check_credentials(user, password):
+            return user
+        return None
+
+    def get_user(self, user_id):
+        """
+        Загружает пользователя сессии из кеша снимков.
+
+        Вызывается AuthenticationMiddleware на каждом запросе, поэтому
+        при попадании в кеш запрос к таблице пользователей не выполняется.
+
+        Args:
+            user_id: Первичный ключ пользователя из сессии
+
+        Returns:
+            CustomUser: Пользователь или None, если он не найден или не может войти
+        """
+        user = get_cached_user(user_id)
+        if user is not None and self.user_can_authenticate(user):
+            return user
+        return None
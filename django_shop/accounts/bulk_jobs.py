@@ -0,0 +1,212 @@
+"""
+Массовые операции над пользователями из админ-панели.
+
+Небольшие выборки изменяются сразу, большие ставятся в очередь как
+BulkUserJob. В задаче сохраняются условия выборки - параметры фильтров
+списка и строка поиска (JSON, а не сериализованный запрос: он зависит
+от версии Django и кода моделей) - и наибольший id таблицы на момент
+постановки. Запрос админ-панели поэтому не перебирает выбранных
+пользователей. Команда ``run_user_jobs`` проходит выборку пачками
+по ключу (pk > последний обработанный id): каждая пачка - отдельная
+короткая транзакция, между пачками делается пауза, поэтому массовая
+операция не блокирует таблицу пользователей для входа и регистрации.
+Прогресс (последний обработанный id) сохраняется в той же транзакции,
+что и пачка, и прерванная задача продолжается с места остановки.
+"""
+
+import logging
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from .changelist import search_users
+from .models import BulkUserJob, CustomUser
+from .user_cache import invalidate_cached_users
+
+
+logger = logging.getLogger(__name__)
+
+# Значения по умолчанию, если они не заданы в settings.py
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_PAUSE = 0.05        # секунд между пачками
+DEFAULT_INLINE_LIMIT = 1000  # выборки не больше этого изменяются сразу
+
+# Изменения полей для каждого действия
+ACTION_UPDATES = {
+    BulkUserJob.ACTION_ACTIVATE: {'is_active': True},
+    BulkUserJob.ACTION_DEACTIVATE: {'is_active': False},
+    BulkUserJob.ACTION_CONFIRM_EMAIL: {'email_confirmed': True},
+    BulkUserJob.ACTION_MAKE_STAFF: {'is_staff': True},
+}
+
+
+def get_selection(filters=None, search=''):
+    """
+    Возвращает пользователей, подходящих под условия выборки.
+
+    Args:
+        filters (dict): Условия QuerySet.filter (параметры фильтров списка)
+        search (str): Строка поиска списка пользователей
+
+    Returns:
+        QuerySet: Выбранные пользователи
+    """
+    queryset = CustomUser.objects.filter(**(filters or {}))
+    if search:
+        queryset = search_users(queryset, search)
+    return queryset
+
+
+def apply_user_action(action, filters=None, search='', created_by=None):
+    """
+    Выполняет действие для выборки пользователей или ставит его в очередь.
+
+    Args:
+        action (str): Одно из BulkUserJob.ACTION_*
+        filters (dict): Условия выборки (значения должны сериализоваться в JSON)
+        search (str): Строка поиска
+        created_by (CustomUser): Сотрудник, запустивший операцию
+
+    Returns:
+        tuple: (количество измененных пользователей, None) или
+            (None, BulkUserJob), если выборка большая
+    """
+    queryset = get_selection(filters, search)
+    limit = getattr(settings, 'ACCOUNTS_BULK_INLINE_LIMIT', DEFAULT_INLINE_LIMIT)
+    # Считаем не дальше границы: точный COUNT большой выборки не нужен
+    if queryset.order_by()[:limit + 1].count() > limit:
+        return None, enqueue_user_job(action, filters, search, created_by)
+
+    with transaction.atomic():
+        user_ids = list(queryset.order_by().values_list('pk', flat=True))
+        updated = CustomUser.objects.filter(pk__in=user_ids).update(**ACTION_UPDATES[action])
+    invalidate_cached_users(user_ids)
+    return updated, None
+
+
+def enqueue_user_job(action, filters=None, search='', created_by=None):
+    """
+    Ставит массовую операцию в очередь.
+
+    Сохраняются только условия выборки и наибольший id таблицы
+    (один запрос по первичному ключу): пользователи, созданные позже,
+    в задачу не попадут.
+
+    Args:
+        action (str): Одно из BulkUserJob.ACTION_*
+        filters (dict): Условия выборки
+        search (str): Строка поиска
+        created_by (CustomUser): Сотрудник, запустивший операцию
+
+    Returns:
+        BulkUserJob: Созданная задача
+
+    Raises:
+        ValueError: Если действие неизвестно
+    """
+    if action not in ACTION_UPDATES:
+        raise ValueError(f'Неизвестное действие: {action}')
+    return BulkUserJob.objects.create(
+        action=action,
+        filters=filters or {},
+        search=search,
+        max_pk=CustomUser.objects.aggregate(max_pk=Max('pk'))['max_pk'] or 0,
+        created_by=created_by,
+    )
+
+
+def next_batch_pks(job, batch_size):
+    """
+    Возвращает id следующей пачки задачи.
+
+    Выборка проходится по ключу: запрос продолжает чтение первичного
+    ключа с job.last_pk, а не с начала таблицы.
+
+    Args:
+        job (BulkUserJob): Задача
+        batch_size (int): Количество id в пачке
+
+    Returns:
+        list: До batch_size выбранных id больше job.last_pk
+    """
+    return list(
+        get_selection(job.filters, job.search)
+        .filter(pk__gt=job.last_pk, pk__lte=job.max_pk)
+        .order_by('pk')
+        .values_list('pk', flat=True)[:batch_size]
+    )
+
+
+def run_job_batch(job, batch_size=None):
+    """
+    Выполняет одну пачку задачи в отдельной транзакции.
+
+    Args:
+        job (BulkUserJob): Задача (ее last_pk и processed обновляются)
+        batch_size (int): Количество пользователей в пачке
+
+    Returns:
+        int: Количество id в пачке (0 - задача завершена
+            или ее пачку уже обработал другой процесс)
+    """
+    batch_size = batch_size or getattr(settings, 'ACCOUNTS_BULK_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+    values = ACTION_UPDATES[job.action]
+    jobs = BulkUserJob.objects.filter(pk=job.pk, status=BulkUserJob.STATUS_PENDING, last_pk=job.last_pk)
+
+    with transaction.atomic():
+        # Пользователи, появившиеся после постановки задачи, в выборку не входят
+        user_ids = next_batch_pks(job, batch_size)
+        if not user_ids:
+            job.finished_at = timezone.now()
+            jobs.update(status=BulkUserJob.STATUS_DONE, finished_at=job.finished_at)
+            job.status = BulkUserJob.STATUS_DONE
+            return 0
+
+        # Условие по last_pk не дает двум обработчикам выполнить одну пачку
+        if not jobs.update(last_pk=user_ids[-1], processed=F('processed') + len(user_ids)):
+            job.refresh_from_db()
+            return 0
+        CustomUser.objects.filter(pk__in=user_ids).exclude(**values).update(**values)
+
+    invalidate_cached_users(user_ids)
+    job.last_pk = user_ids[-1]
+    job.processed += len(user_ids)
+    return len(user_ids)
+
+
+def run_pending_jobs(batch_size=None, pause=None):
+    """
+    Выполняет все задачи из очереди в порядке постановки.
+
+    Args:
+        batch_size (int): Количество пользователей в пачке
+        pause (float): Пауза между пачками в секундах
+
+    Returns:
+        tuple: (количество завершенных задач, количество обработанных пользователей)
+    """
+    pause = getattr(settings, 'ACCOUNTS_BULK_PAUSE', DEFAULT_PAUSE) if pause is None else pause
+    finished = users = 0
+
+    pending = BulkUserJob.objects.filter(status=BulkUserJob.STATUS_PENDING).order_by('created_at', 'pk')
+    for job in pending:
+        try:
+            while job.status == BulkUserJob.STATUS_PENDING:
+                users += run_job_batch(job, batch_size)
+                if pause and job.status == BulkUserJob.STATUS_PENDING:
+                    time.sleep(pause)
+        except Exception as e:
+            logger.exception('Массовая операция %s завершилась ошибкой', job.pk)
+            BulkUserJob.objects.filter(pk=job.pk).update(
+                status=BulkUserJob.STATUS_FAILED,
+                last_error=f'{type(e).__name__}: {e}',
+                finished_at=timezone.now(),
+            )
+            continue
+        if job.status == BulkUserJob.STATUS_DONE:
+            finished += 1
+
+    return finished, users
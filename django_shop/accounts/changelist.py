@@ -0,0 +1,174 @@
+"""
+Быстрый список пользователей в админ-панели.
+
+Стандартный список Django на большой таблице упирается в два запроса:
+поиск через icontains по нескольким полям (полное сканирование таблицы)
+и точный COUNT(*) для постраничной навигации. Здесь собраны замены:
+
+- search_users_by_prefix - поиск по началу email через диапазон по
+  LOWER(email), который обслуживает индекс accounts_user_email_ci_unique;
+- search_users - поиск в текущем режиме, общий для списка и фоновых
+  массовых операций (accounts.bulk_jobs);
+- EstimatedCountPaginator - оценка количества строк вместо COUNT(*).
+
+Режим поиска выбирается настройкой ACCOUNTS_ADMIN_SEARCH:
+    prefix   - по началу email или по id (по умолчанию)
+    trigram  - подстрока в любом поле поиска; только PostgreSQL,
+               запрос обслуживают триграммные индексы pg_trgm
+               (миграция 0007_customuser_trigram_indexes)
+    contains - стандартный поиск Django (для небольших баз)
+"""
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max, Q
+from django.db.models.functions import Lower
+from django.utils.functional import cached_property
+from django.utils.text import smart_split, unescape_string_literal
+
+
+# Значения по умолчанию, если они не заданы в settings.py
+DEFAULT_SEARCH_MODE = 'prefix'
+DEFAULT_EXACT_COUNT_LIMIT = 10_000
+
+SEARCH_MODES = ('prefix', 'trigram', 'contains')
+
+# Поля поиска в режимах trigram и contains
+USER_SEARCH_FIELDS = ('email', 'first_name', 'last_name', 'phone_number')
+
+
+def get_search_mode(using='default'):
+    """
+    Возвращает режим поиска пользователей для базы данных.
+
+    Триграммный поиск без PostgreSQL заменяется поиском по префиксу.
+
+    Args:
+        using (str): Алиас базы данных
+
+    Returns:
+        str: Один из SEARCH_MODES
+    """
+    mode = getattr(settings, 'ACCOUNTS_ADMIN_SEARCH', DEFAULT_SEARCH_MODE)
+    if mode not in SEARCH_MODES:
+        raise ValueError(f'Неизвестный режим поиска ACCOUNTS_ADMIN_SEARCH: {mode}')
+    if mode == 'trigram' and connections[using].vendor != 'postgresql':
+        return 'prefix'
+    return mode
+
+
+def search_users_by_prefix(queryset, search_term):
+    """
+    Фильтрует пользователей по началу email (без учета регистра) или по id.
+
+    Условие записывается диапазоном LOWER(email) >= префикс AND
+    LOWER(email) < следующая строка, который читается из функционального
+    индекса, в отличие от LIKE и icontains.
+
+    Args:
+        queryset (QuerySet): Пользователи
+        search_term (str): Строка поиска
+
+    Returns:
+        QuerySet: Отфильтрованные пользователи
+    """
+    prefix = search_term.strip().lower()
+    if not prefix:
+        return queryset
+
+    # Строка, следующая за всеми строками с этим префиксом
+    upper_bound = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    condition = Q(
+        email_lower__gte=prefix,
+        email_lower__lt=upper_bound,
+        # Повторная проверка на случай сопоставлений, где порядок строк
+        # не совпадает с побайтовым (диапазон все равно сужает его индексом)
+        email_lower__startswith=prefix,
+    )
+    if prefix.isdigit():
+        condition |= Q(pk=int(prefix))
+    return queryset.alias(email_lower=Lower('email')).filter(condition)
+
+
+def search_users(queryset, search_term):
+    """
+    Фильтрует пользователей строкой поиска в режиме ACCOUNTS_ADMIN_SEARCH.
+
+    В режимах trigram и contains условие строится как в поиске Django:
+    каждое слово строки должно встречаться (icontains) хотя бы в одном
+    из USER_SEARCH_FIELDS.
+
+    Args:
+        queryset (QuerySet): Пользователи
+        search_term (str): Строка поиска
+
+    Returns:
+        QuerySet: Отфильтрованные пользователи
+    """
+    if get_search_mode(queryset.db) == 'prefix':
+        return search_users_by_prefix(queryset, search_term)
+
+    condition = Q()
+    for bit in smart_split(search_term):
+        if bit.startswith(('"', "'")) and bit[0] == bit[-1]:
+            bit = unescape_string_literal(bit)
+        bit_condition = Q()
+        for field in USER_SEARCH_FIELDS:
+            bit_condition |= Q(**{f'{field}__icontains': bit})
+        condition &= bit_condition
+    return queryset.filter(condition)
+
+
+def estimate_row_count(model, using='default'):
+    """
+    Оценивает количество строк в таблице модели без COUNT(*).
+
+    На PostgreSQL берется статистика планировщика (pg_class.reltuples),
+    на остальных базах - наибольший первичный ключ (чтение края индекса).
+
+    Args:
+        model: Класс модели с автоинкрементным первичным ключом
+        using (str): Алиас базы данных
+
+    Returns:
+        int: Оценка или None, если ее получить не удалось
+    """
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        # -1: таблица еще ни разу не анализировалась
+        if row and row[0] >= 0:
+            return row[0]
+        return None
+    return model._default_manager.using(using).aggregate(max_pk=Max('pk'))['max_pk'] or 0
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор, который не считает все строки большой выборки.
+
+    Без фильтров количество берется из estimate_row_count. С фильтрами
+    считается не больше ACCOUNTS_ADMIN_EXACT_COUNT_LIMIT строк, поэтому
+    страницы дальше этой границы недоступны (их заменяет поиск).
+    Небольшие выборки считаются точно.
+    """
+
+    @cached_property
+    def count(self):
+        """Точное или оценочное количество объектов."""
+        limit = getattr(settings, 'ACCOUNTS_ADMIN_EXACT_COUNT_LIMIT', DEFAULT_EXACT_COUNT_LIMIT)
+        queryset = self.object_list
+
+        if not queryset.query.where:
+            estimate = estimate_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > limit:
+                return estimate
+
+        # COUNT по подзапросу с LIMIT останавливается на limit строках
+        return queryset.order_by()[:limit].count()
@@ -0,0 +1,114 @@
+"""
+Рендеринг писем приложения accounts.
+
+Шаблоны писем загружаются и компилируются один раз на процесс,
+а текстовая и HTML версии письма рендерятся из общего контекста.
+В режиме DEBUG шаблоны перечитываются при каждом рендеринге,
+чтобы правки в файлах были видны без перезапуска сервера.
+"""
+
+import threading
+
+from django.conf import settings
+from django.template import Context, engines
+
+
+class EmailTemplate:
+    """
+    Пара шаблонов письма (текст + HTML) с кешированием компиляции.
+
+    Attributes:
+        name (str): Короткое имя письма (для журнала отправки)
+        subject (str): Тема письма
+        text_template_name (str): Имя шаблона текстовой версии
+        html_template_name (str): Имя шаблона HTML версии
+    """
+
+    def __init__(self, name, subject, text_template_name, html_template_name, using='django'):
+        """
+        Инициализация пары шаблонов.
+
+        Args:
+            name (str): Короткое имя письма
+            subject (str): Тема письма
+            text_template_name (str): Имя шаблона текстовой версии
+            html_template_name (str): Имя шаблона HTML версии
+            using (str): Имя шаблонного бэкенда из настройки TEMPLATES
+        """
+        self.name = name
+        self.subject = subject
+        self.text_template_name = text_template_name
+        self.html_template_name = html_template_name
+        self.using = using
+        self._compiled = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        """
+        Загружает и компилирует оба шаблона.
+
+        Returns:
+            tuple: (движок шаблонов, текстовый шаблон, HTML шаблон)
+        """
+        engine = engines[self.using].engine
+        return (
+            engine,
+            engine.get_template(self.text_template_name),
+            engine.get_template(self.html_template_name),
+        )
+
+    def get_compiled(self):
+        """
+        Возвращает скомпилированные шаблоны.
+
+        При DEBUG=False шаблоны компилируются один раз и переиспользуются.
+
+        Returns:
+            tuple: (движок шаблонов, текстовый шаблон, HTML шаблон)
+        """
+        if settings.DEBUG:
+            return self._load()
+        if self._compiled is None:
+            with self._lock:
+                if self._compiled is None:
+                    self._compiled = self._load()
+        return self._compiled
+
+    def clear_cache(self):
+        """Сбрасывает скомпилированные шаблоны (например, в тестах)."""
+        self._compiled = None
+
+    def render(self, context):
+        """
+        Рендерит обе версии письма из одного контекста.
+
+        Args:
+            context (dict): Переменные шаблона
+
+        Returns:
+            tuple: (тема, текстовая версия, HTML версия)
+        """
+        engine, text_template, html_template = self.get_compiled()
+        shared_context = Context(context, autoescape=engine.autoescape)
+        return (
+            self.subject,
+            text_template.render(shared_context),
+            html_template.render(shared_context),
+        )
+
+
+# Письмо активации аккаунта после регистрации
+ACTIVATION_EMAIL = EmailTemplate(
+    name='activation',
+    subject='Подтверждение регистрации в интернет-магазине',
+    text_template_name='accounts/email/activation_email.txt',
+    html_template_name='accounts/email/activation_email.html',
+)
+
+# Письмо со ссылкой восстановления пароля
+PASSWORD_RESET_EMAIL = EmailTemplate(
+    name='password_reset',
+    subject='Восстановление пароля в интернет-магазине',
+    text_template_name='accounts/email/password_reset_email.txt',
+    html_template_name='accounts/email/password_reset_email.html',
+)
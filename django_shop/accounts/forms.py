@@ -10,15 +10,44 @@
 """
 
 from django import forms
-from django.contrib.auth.forms import UserCreationForm, AuthenticationForm, PasswordChangeForm
+from django.contrib.auth.forms import UserCreationForm, AuthenticationForm, PasswordChangeForm, SetPasswordForm
 from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.signals import user_login_failed
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 from datetime import date
 
+from .backends import EmailBackend
+from .utils import normalize_phone
+
 # Получаем модель пользователя
 User = get_user_model()
 
+# Путь к бэкенду аутентификации, через который форма входа проверяет пароль
+EMAIL_BACKEND_PATH = 'accounts.backends.EmailBackend'
+
+
+def clean_phone(phone):
+    """
+    Проверяет российский номер телефона и приводит его к формату E.164.
+    
+    Args:
+        phone (str): Номер в записи пользователя (+7..., 7..., 8...)
+        
+    Returns:
+        str: Номер в формате +79991234567 или пустая строка
+        
+    Raises:
+        ValidationError: Если формат номера неверный
+    """
+    try:
+        return normalize_phone(phone)
+    except ValueError:
+        raise ValidationError(
+            'Введите корректный российский номер телефона '
+            '(например: +79991234567, 79991234567 или 89991234567)'
+        )
+
 
 class CustomUserCreationForm(UserCreationForm):
     """
@@ -58,8 +87,10 @@ class CustomUserCreationForm(UserCreationForm):
         help_text='Фамилия (необязательно)'
     )
     
+    # Запас длины для записи с пробелами и скобками: в БД номер
+    # сохраняется в формате E.164 (12 символов)
     phone_number = forms.CharField(
-        max_length=15,
+        max_length=20,
         required=False,
         widget=forms.TextInput(attrs={
             'class': 'form-control',
@@ -136,7 +167,7 @@ class CustomUserCreationForm(UserCreationForm):
         """
         Валидация email адреса.
         
-        Проверяет уникальность email в системе.
+        Проверяет уникальность email в системе без учета регистра.
         
         Returns:
             str: Очищенный email адрес
@@ -146,7 +177,8 @@ class CustomUserCreationForm(UserCreationForm):
         """
         email = self.cleaned_data.get('email')
         
-        if email and User.objects.filter(email=email).exists():
+        # Сравнение без учета регистра по функциональному индексу
+        if email and User.objects.filter_by_email(email).exists():
             raise ValidationError(
                 'Пользователь с таким email адресом уже существует. '
                 'Попробуйте войти в систему или восстановить пароль.'
@@ -159,27 +191,12 @@ class CustomUserCreationForm(UserCreationForm):
         Валидация номера телефона.
         
         Returns:
-            str: Очищенный номер телефона
+            str: Номер телефона в формате E.164 (+79991234567)
             
         Raises:
             ValidationError: Если формат номера неверный
         """
-        phone = self.cleaned_data.get('phone_number')
-        
-        if phone:
-            # Убираем все символы кроме цифр и +
-            cleaned_phone = ''.join(c for c in phone if c.isdigit() or c == '+')
-            
-            # Проверяем российский формат
-            if not (cleaned_phone.startswith('+7') and len(cleaned_phone) == 12) and \
-               not (cleaned_phone.startswith('7') and len(cleaned_phone) == 11) and \
-               not (cleaned_phone.startswith('8') and len(cleaned_phone) == 11):
-                raise ValidationError(
-                    'Введите корректный российский номер телефона '
-                    '(например: +79991234567, 79991234567 или 89991234567)'
-                )
-        
-        return phone
+        return clean_phone(self.cleaned_data.get('phone_number'))
 
     def save(self, commit=True):
         """
@@ -272,10 +289,12 @@ class CustomAuthenticationForm(AuthenticationForm):
         password = self.cleaned_data.get('password')
 
         if username is not None and password:
-            # Проверяем существование пользователя
-            try:
-                user = User.objects.get(email=username)
-            except User.DoesNotExist:
+            backend = EmailBackend()
+            
+            # Загружаем пользователя один раз: статус и пароль проверяются
+            # на этом же объекте, без повторного запроса в authenticate()
+            user = backend.get_user_by_email(username)
+            if user is None:
                 raise ValidationError(
                     'Пользователь с таким email адресом не найден. '
                     'Проверьте правильность ввода или зарегистрируйтесь.'
@@ -295,18 +314,21 @@ class CustomAuthenticationForm(AuthenticationForm):
                     'Обратитесь к администратору сайта.'
                 )
             
-            # Аутентификация пользователя
-            self.user_cache = authenticate(
-                self.request,
-                username=username,
-                password=password
-            )
-            
-            if self.user_cache is None:
+            # Проверяем пароль
+            if not backend.check_credentials(user, password):
+                user_login_failed.send(
+                    sender=__name__,
+                    credentials={'username': username},
+                    request=self.request
+                )
                 raise ValidationError(
                     'Неверный email или пароль. '
                     'Попробуйте еще раз или восстановите пароль.'
                 )
+            
+            # login() использует этот путь, чтобы не определять бэкенд заново
+            user.backend = EMAIL_BACKEND_PATH
+            self.user_cache = user
 
         return self.cleaned_data
 
@@ -319,9 +341,22 @@ class UserProfileForm(forms.ModelForm):
     кроме email адреса и пароля.
     """
     
+    phone_number = forms.CharField(
+        max_length=20,
+        required=False,
+        label='Номер телефона',
+        widget=forms.TextInput(attrs={
+            'class': 'form-control',
+            'placeholder': '+79991234567'
+        }),
+        help_text='Номер телефона для связи и доставки'
+    )
+    
     date_of_birth = forms.DateField(
         required=False,
-        widget=forms.DateInput(attrs={
+        label='Дата рождения',
+        # Поле type="date" принимает значение только в формате ISO
+        widget=forms.DateInput(format='%Y-%m-%d', attrs={
             'class': 'form-control',
             'type': 'date'
         }),
@@ -347,10 +382,6 @@ class UserProfileForm(forms.ModelForm):
                 'class': 'form-control',
                 'placeholder': 'Ваша фамилия'
             }),
-            'phone_number': forms.TextInput(attrs={
-                'class': 'form-control',
-                'placeholder': '+79991234567'
-            }),
             'address': forms.Textarea(attrs={
                 'class': 'form-control',
                 'rows': 4,
@@ -358,6 +389,35 @@ class UserProfileForm(forms.ModelForm):
             }),
         }
 
+    def clean_phone_number(self):
+        """
+        Валидация номера телефона.
+        
+        Returns:
+            str: Номер телефона в формате E.164 (+79991234567)
+            
+        Raises:
+            ValidationError: Если формат номера неверный
+        """
+        return clean_phone(self.cleaned_data.get('phone_number'))
+
+    def get_update_fields(self):
+        """
+        Возвращает поля, значения которых действительно изменились.
+        
+        changed_data сравнивает введенный текст с исходным значением,
+        поэтому номер, записанный в другом виде ("8 999 ..." вместо
+        "+7999..."), считается измененным. Поля дополнительно сравниваются
+        после очистки формы, чтобы такие правки не вызывали запись в БД.
+        
+        Returns:
+            list: Имена измененных полей для save(update_fields=...)
+        """
+        return [
+            name for name in self.changed_data
+            if self.cleaned_data.get(name) != self.initial.get(name)
+        ]
+
     def clean_date_of_birth(self):
         """
         Валидация даты рождения.
@@ -427,7 +487,9 @@ class PasswordResetRequestForm(forms.Form):
     """
     Форма запроса восстановления пароля.
     
-    Принимает email адрес для отправки ссылки восстановления.
+    Принимает email адрес для отправки ссылки восстановления. Наличие
+    аккаунта форма не проверяет: ответ одинаков для любого адреса,
+    чтобы по нему нельзя было узнать, зарегистрирован ли email.
     """
     
     email = forms.EmailField(
@@ -439,33 +501,33 @@ class PasswordResetRequestForm(forms.Form):
         help_text='Введите email адрес вашего аккаунта'
     )
 
-    def clean_email(self):
-        """
-        Валидация email для восстановления пароля.
-        
-        Returns:
-            str: Email адрес
-            
-        Raises:
-            ValidationError: Если пользователь не найден
-        """
-        email = self.cleaned_data.get('email')
-        
-        if email:
-            try:
-                user = User.objects.get(email=email, is_active=True)
-                if not user.email_confirmed:
-                    raise ValidationError(
-                        'Ваш email адрес не подтвержден. '
-                        'Сначала активируйте аккаунт.'
-                    )
-            except User.DoesNotExist:
-                raise ValidationError(
-                    'Пользователь с таким email адресом не найден '
-                    'или аккаунт не активирован.'
-                )
-        
-        return email
+
+class CustomSetPasswordForm(SetPasswordForm):
+    """
+    Форма установки нового пароля по ссылке восстановления.
+    
+    Добавляет Bootstrap стили к стандартной форме Django.
+    """
+    
+    new_password1 = forms.CharField(
+        label='Новый пароль',
+        widget=forms.PasswordInput(attrs={
+            'class': 'form-control',
+            'placeholder': 'Введите новый пароль',
+            'autocomplete': 'new-password'
+        }),
+        help_text='Минимум 8 символов'
+    )
+    
+    new_password2 = forms.CharField(
+        label='Подтверждение нового пароля',
+        widget=forms.PasswordInput(attrs={
+            'class': 'form-control',
+            'placeholder': 'Повторите новый пароль',
+            'autocomplete': 'new-password'
+        }),
+        help_text='Повторите новый пароль для подтверждения'
+    )
 
 
 class AccountDeletionForm(forms.Form):
@@ -0,0 +1,30 @@
+"""
+Хешеры паролей для приложения accounts.
+
+Позволяют настраивать стоимость хеширования через settings.py,
+не меняя формат хранимых хешей. При изменении настроек Django
+прозрачно перехеширует пароль при следующем успешном входе.
+"""
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 с количеством итераций из настройки PBKDF2_ITERATIONS.
+
+    Использует тот же алгоритм (``pbkdf2_sha256``), что и стандартный
+    хешер Django, поэтому существующие хеши остаются валидными.
+    Хеши с другим количеством итераций обновляются при входе.
+    """
+
+    @property
+    def iterations(self):
+        """
+        Количество итераций PBKDF2.
+
+        Returns:
+            int: Значение PBKDF2_ITERATIONS или значение Django по умолчанию
+        """
+        return getattr(settings, 'PBKDF2_ITERATIONS', PBKDF2PasswordHasher.iterations)
@@ -0,0 +1,105 @@
+"""
+Почтовые бэкенды приложения accounts.
+
+RecordingEmailBackend - обертка над любым почтовым бэкендом Django,
+которая записывает каждое отправленное письмо (получатель, шаблон,
+размер, время отправки, результат) в журнал accounts.mail_log.
+"""
+
+import logging
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+from .mail_log import OUTCOME_ERROR, OUTCOME_SENT, get_mail_log
+
+
+logger = logging.getLogger(__name__)
+
+# Заголовок, в котором письмо несет имя своего шаблона
+TEMPLATE_HEADER = 'X-Mail-Template'
+
+# Бэкенд, через который письма отправляются на самом деле
+DEFAULT_RECORDER_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+
+
+class RecordingEmailBackend(BaseEmailBackend):
+    """
+    Отправляет письма через EMAIL_RECORDER_BACKEND и журналирует их.
+    """
+
+    def __init__(self, fail_silently=False, **kwargs):
+        """
+        Инициализация бэкенда.
+
+        Args:
+            fail_silently (bool): Не выбрасывать исключения при ошибках
+            **kwargs: Параметры, передаваемые внутреннему бэкенду
+        """
+        super().__init__(fail_silently=fail_silently)
+        self.inner = get_connection(
+            getattr(settings, 'EMAIL_RECORDER_BACKEND', DEFAULT_RECORDER_BACKEND),
+            fail_silently=fail_silently,
+            **kwargs
+        )
+
+    def open(self):
+        """Открывает соединение внутреннего бэкенда."""
+        return self.inner.open()
+
+    def close(self):
+        """Закрывает соединение внутреннего бэкенда."""
+        return self.inner.close()
+
+    def send_messages(self, email_messages):
+        """
+        Отправляет письма по одному через общее соединение и журналирует их.
+
+        Args:
+            email_messages (list): Письма для отправки
+
+        Returns:
+            int: Количество отправленных писем
+        """
+        if not email_messages:
+            return 0
+
+        mail_log = get_mail_log()
+        new_connection = self.inner.open()
+        sent = 0
+        try:
+            for message in email_messages:
+                size = len(message.message().as_bytes())
+                started = time.perf_counter()
+                try:
+                    sent_now = self.inner.send_messages([message]) or 0
+                except Exception as e:
+                    self._record(mail_log, message, size, started, OUTCOME_ERROR, f'{type(e).__name__}: {e}')
+                    raise
+                # При fail_silently=True внутренний бэкенд сообщает о неудаче нулем
+                outcome = OUTCOME_SENT if sent_now else OUTCOME_ERROR
+                self._record(mail_log, message, size, started, outcome)
+                sent += sent_now
+        finally:
+            if new_connection:
+                self.inner.close()
+        return sent
+
+    def _record(self, mail_log, message, size, started, outcome, error=''):
+        """Записывает результат отправки одного письма в журнал."""
+        try:
+            mail_log.record(
+                recipient=', '.join(message.recipients()),
+                template=message.extra_headers.get(TEMPLATE_HEADER, ''),
+                subject=message.subject,
+                size=size,
+                latency_ms=(time.perf_counter() - started) * 1000,
+                outcome=outcome,
+                error=error,
+            )
+        except sqlite3.Error:
+            # Сбой журнала не должен мешать отправке писем
+            logger.exception('Не удалось записать письмо в журнал %s', mail_log.path)
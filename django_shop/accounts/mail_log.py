@@ -0,0 +1,176 @@
+"""
+Журнал отправленных писем.
+
+Каждое письмо, прошедшее через RecordingEmailBackend, записывается
+в отдельный файл SQLite (настройка EMAIL_LOG_PATH), который хранит
+последние EMAIL_LOG_MAX_ROWS записей. Команда email_monitor читает
+журнал и показывает поток писем, скорость отправки, ошибки и задержки.
+"""
+
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+
+
+# Значения по умолчанию, если они не заданы в settings.py
+DEFAULT_MAX_ROWS = 100_000
+
+OUTCOME_SENT = 'sent'
+OUTCOME_ERROR = 'error'
+
+# Колонки записи журнала
+COLUMNS = ('id', 'ts', 'recipient', 'template', 'subject', 'size', 'latency_ms', 'outcome', 'error')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS mail_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    recipient TEXT NOT NULL,
+    template TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    latency_ms REAL NOT NULL,
+    outcome TEXT NOT NULL,
+    error TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS mail_log_ts_idx ON mail_log (ts);
+"""
+
+
+class MailLog:
+    """
+    Журнал писем в файле SQLite.
+
+    Attributes:
+        path (str): Путь к файлу журнала
+        max_rows (int): Сколько последних записей хранить в файле
+    """
+
+    def __init__(self, path, max_rows=DEFAULT_MAX_ROWS):
+        """
+        Инициализация журнала.
+
+        Args:
+            path (str): Путь к файлу журнала
+            max_rows (int): Сколько последних записей хранить в файле
+        """
+        self.path = str(path)
+        self.max_rows = max_rows
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connect(self):
+        """
+        Возвращает соединение с файлом журнала (одно на поток).
+
+        Returns:
+            sqlite3.Connection: Соединение в режиме WAL
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            # WAL позволяет монитору читать журнал, пока сервер в него пишет
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def record(self, recipient, template, subject, size, latency_ms, outcome, error=''):
+        """
+        Записывает одно письмо в журнал.
+
+        Args:
+            recipient (str): Получатели через запятую
+            template (str): Имя шаблона письма (может быть пустым)
+            subject (str): Тема письма
+            size (int): Размер письма в байтах
+            latency_ms (float): Время отправки в миллисекундах
+            outcome (str): OUTCOME_SENT или OUTCOME_ERROR
+            error (str): Текст ошибки
+        """
+        entry = (time.time(), recipient, template, subject, size, latency_ms, outcome, error)
+
+        connection = self._connect()
+        connection.execute(
+            'INSERT INTO mail_log (ts, recipient, template, subject, size, latency_ms, outcome, error) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            entry
+        )
+
+        # Время от времени удаляем старые записи, чтобы файл не рос бесконечно
+        self._writes += 1
+        if self._writes % 1000 == 0:
+            connection.execute(
+                'DELETE FROM mail_log WHERE id <= (SELECT MAX(id) FROM mail_log) - ?',
+                (self.max_rows,)
+            )
+
+    def read_since(self, last_id=0, limit=1000):
+        """
+        Читает записи журнала, добавленные после last_id.
+
+        Args:
+            last_id (int): Идентификатор последней прочитанной записи
+            limit (int): Максимальное количество записей
+
+        Returns:
+            list: Словари с полями COLUMNS в порядке добавления
+        """
+        cursor = self._connect().execute(
+            f'SELECT {", ".join(COLUMNS)} FROM mail_log WHERE id > ? ORDER BY id LIMIT ?',
+            (last_id, limit)
+        )
+        return [dict(zip(COLUMNS, row)) for row in cursor.fetchall()]
+
+    def last_id(self):
+        """
+        Возвращает идентификатор последней записи.
+
+        Returns:
+            int: Идентификатор или 0 для пустого журнала
+        """
+        return self._connect().execute('SELECT COALESCE(MAX(id), 0) FROM mail_log').fetchone()[0]
+
+    def summary(self, since_ts):
+        """
+        Сводка по письмам начиная с момента since_ts.
+
+        Args:
+            since_ts (float): Unix-время начала окна
+
+        Returns:
+            dict: total, errors, bytes, avg_latency_ms, max_latency_ms
+        """
+        row = self._connect().execute(
+            'SELECT COUNT(*), COALESCE(SUM(outcome = ?), 0), COALESCE(SUM(size), 0), '
+            'COALESCE(AVG(latency_ms), 0), COALESCE(MAX(latency_ms), 0) '
+            'FROM mail_log WHERE ts >= ?',
+            (OUTCOME_ERROR, since_ts)
+        ).fetchone()
+        return dict(zip(('total', 'errors', 'bytes', 'avg_latency_ms', 'max_latency_ms'), row))
+
+
+_mail_log = None
+_mail_log_lock = threading.Lock()
+
+
+def get_mail_log():
+    """
+    Возвращает журнал писем, настроенный по settings.py.
+
+    Returns:
+        MailLog: Общий для процесса журнал
+    """
+    global _mail_log
+    path = str(getattr(settings, 'EMAIL_LOG_PATH', settings.BASE_DIR / 'email_log.sqlite3'))
+    if _mail_log is None or _mail_log.path != path:
+        with _mail_log_lock:
+            if _mail_log is None or _mail_log.path != path:
+                _mail_log = MailLog(
+                    path,
+                    max_rows=getattr(settings, 'EMAIL_LOG_MAX_ROWS', DEFAULT_MAX_ROWS),
+                )
+    return _mail_log
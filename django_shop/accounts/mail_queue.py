@@ -0,0 +1,215 @@
+"""
+Очередь исходящей почты для приложения accounts.
+
+Письма сохраняются в таблицу ``OutgoingEmail`` в той же транзакции,
+что и остальные изменения запроса, а отправляются фоновой командой
+``send_queued_mail``. Благодаря этому медленный или недоступный
+SMTP-сервер не задерживает ответы пользователям.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .mail_backends import TEMPLATE_HEADER
+from .models import OutgoingEmail
+
+
+# Значения по умолчанию, если они не заданы в settings.py
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_RETRY_DELAY = 60          # секунд до первой повторной попытки
+DEFAULT_MAX_RETRY_DELAY = 60 * 60  # верхняя граница задержки между попытками
+DEFAULT_LEASE = 5 * 60            # секунд, на которые пачка резервируется за диспетчером
+
+# Шаблоны писем с одноразовыми ссылками: после отправки или окончательной
+# ошибки текст таких писем не хранится, чтобы ссылку нельзя было
+# прочитать из таблицы очереди или админ-панели
+REDACTED_TEMPLATES = frozenset({'password_reset'})
+REDACTED_BODY = '[текст письма удален после отправки]'
+
+
+def enqueue_mail(subject, message, recipient, html_message='', from_email=None, template=''):
+    """
+    Ставит письмо в очередь на отправку.
+
+    Args:
+        subject (str): Тема письма
+        message (str): Текстовая версия письма
+        recipient (str): Email получателя
+        html_message (str): HTML версия письма
+        from_email (str): Адрес отправителя (по умолчанию DEFAULT_FROM_EMAIL)
+        template (str): Имя шаблона письма (попадает в журнал отправки)
+
+    Returns:
+        OutgoingEmail: Созданная запись очереди
+    """
+    return OutgoingEmail.objects.create(
+        to_email=recipient,
+        from_email=from_email or getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@shop.local'),
+        subject=subject,
+        body=message,
+        html_body=html_message or '',
+        template=template,
+    )
+
+
+def get_retry_delay(attempts):
+    """
+    Вычисляет задержку перед следующей попыткой (экспоненциальный рост).
+
+    Args:
+        attempts (int): Количество уже сделанных попыток
+
+    Returns:
+        timedelta: Задержка до следующей попытки
+    """
+    base_delay = getattr(settings, 'MAIL_QUEUE_RETRY_DELAY', DEFAULT_RETRY_DELAY)
+    max_delay = getattr(settings, 'MAIL_QUEUE_MAX_RETRY_DELAY', DEFAULT_MAX_RETRY_DELAY)
+    delay = base_delay * (2 ** max(attempts - 1, 0))
+    return timedelta(seconds=min(delay, max_delay))
+
+
+def build_message(queued, connection=None):
+    """
+    Собирает объект письма Django из записи очереди.
+
+    Args:
+        queued (OutgoingEmail): Запись очереди
+        connection: Открытое соединение почтового бэкенда
+
+    Returns:
+        EmailMultiAlternatives: Готовое к отправке письмо
+    """
+    message = EmailMultiAlternatives(
+        subject=queued.subject,
+        body=queued.body,
+        from_email=queued.from_email,
+        to=[queued.to_email],
+        connection=connection,
+        headers={TEMPLATE_HEADER: queued.template} if queued.template else None,
+    )
+    if queued.html_body:
+        message.attach_alternative(queued.html_body, 'text/html')
+    return message
+
+
+def dispatch_queued_mail(batch_size=None):
+    """
+    Отправляет одну пачку писем, время отправки которых наступило.
+
+    Все письма пачки отправляются через одно соединение с почтовым
+    сервером. Неудачные письма планируются на повторную отправку
+    с экспоненциальной задержкой, а после MAIL_QUEUE_MAX_ATTEMPTS
+    попыток помечаются как ошибочные.
+
+    Args:
+        batch_size (int): Максимальное количество писем в пачке
+
+    Returns:
+        tuple: (количество отправленных писем, количество неудачных попыток)
+    """
+    batch_size = batch_size or getattr(settings, 'MAIL_QUEUE_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+    max_attempts = getattr(settings, 'MAIL_QUEUE_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)
+    sent = failed = 0
+
+    batch = claim_batch(batch_size)
+    if not batch:
+        return sent, failed
+
+    # Отправка идет вне транзакции: медленный почтовый сервер не держит
+    # блокировку БД (на SQLite она помешала бы регистрации новых пользователей)
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        # Сервер недоступен: вся пачка уходит на повторную попытку
+        connection = None
+        open_error = e
+    else:
+        open_error = None
+
+    try:
+        for queued in batch:
+            queued.attempts += 1
+            try:
+                if open_error is not None:
+                    raise open_error
+                build_message(queued, connection=connection).send()
+            except Exception as e:
+                failed += 1
+                queued.last_error = f'{type(e).__name__}: {e}'
+                if queued.attempts >= max_attempts:
+                    queued.status = OutgoingEmail.STATUS_FAILED
+                else:
+                    queued.next_attempt_at = timezone.now() + get_retry_delay(queued.attempts)
+            else:
+                sent += 1
+                queued.status = OutgoingEmail.STATUS_SENT
+                queued.sent_at = timezone.now()
+                queued.last_error = ''
+    finally:
+        if connection is not None:
+            connection.close()
+
+    for queued in batch:
+        if queued.status != OutgoingEmail.STATUS_PENDING:
+            redact_body(queued)
+
+    with transaction.atomic():
+        OutgoingEmail.objects.bulk_update(
+            batch,
+            ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at', 'body', 'html_body']
+        )
+
+    return sent, failed
+
+
+def redact_body(queued):
+    """
+    Удаляет текст отправленного или окончательно неудачного письма
+    с одноразовой ссылкой (шаблоны REDACTED_TEMPLATES).
+
+    Args:
+        queued (OutgoingEmail): Запись очереди (не сохраняется)
+
+    Returns:
+        bool: True, если текст удален
+    """
+    if queued.template not in REDACTED_TEMPLATES:
+        return False
+    queued.body = REDACTED_BODY
+    queued.html_body = ''
+    return True
+
+
+def claim_batch(batch_size):
+    """
+    Резервирует пачку писем для отправки короткой транзакцией.
+
+    Время следующей попытки выбранных писем сдвигается на
+    MAIL_QUEUE_LEASE секунд вперед: другие диспетчеры их не возьмут,
+    а если процесс упадет во время отправки, письма вернутся в очередь
+    по истечении резерва.
+
+    Args:
+        batch_size (int): Максимальное количество писем в пачке
+
+    Returns:
+        list: Зарезервированные письма
+    """
+    now = timezone.now()
+    lease_until = now + timedelta(seconds=getattr(settings, 'MAIL_QUEUE_LEASE', DEFAULT_LEASE))
+    due = OutgoingEmail.objects.filter(status=OutgoingEmail.STATUS_PENDING, next_attempt_at__lte=now)
+
+    with transaction.atomic():
+        ids = list(due.order_by('next_attempt_at', 'pk').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return []
+        # Условие по времени попытки: письма, уже зарезервированные
+        # параллельным диспетчером, повторно не берутся
+        due.filter(pk__in=ids).update(next_attempt_at=lease_until)
+        return list(OutgoingEmail.objects.filter(pk__in=ids, next_attempt_at=lease_until).order_by('pk'))
@@ -0,0 +1,114 @@
+"""
+Команда наблюдения за исходящей почтой в реальном времени.
+
+Читает журнал, который пишет RecordingEmailBackend, и показывает
+каждое новое письмо, а также скорость отправки, долю ошибок
+и задержки за последние --window секунд.
+
+Примеры:
+    python manage.py email_monitor              # следить за журналом
+    python manage.py email_monitor --once       # одна сводка и выход
+    python manage.py email_monitor --window 300 # сводка за 5 минут
+"""
+
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+
+from accounts.mail_log import OUTCOME_ERROR, get_mail_log
+
+
+class Command(BaseCommand):
+    """Показывает поток отправляемых писем и сводку по нему."""
+
+    help = 'Показывает отправляемые письма и статистику отправки в реальном времени'
+
+    def add_arguments(self, parser):
+        """Регистрирует аргументы командной строки."""
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Пауза между чтениями журнала в секундах'
+        )
+        parser.add_argument(
+            '--window',
+            type=int,
+            default=60,
+            help='Окно для расчета скорости и задержек в секундах'
+        )
+        parser.add_argument(
+            '--summary-every',
+            type=float,
+            default=10.0,
+            help='Как часто печатать сводку в секундах'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Показать последние письма и сводку и завершиться'
+        )
+        parser.add_argument(
+            '--tail',
+            type=int,
+            default=10,
+            help='Сколько последних писем показать при запуске'
+        )
+
+    def handle(self, *args, **options):
+        """Основной цикл чтения журнала."""
+        mail_log = get_mail_log()
+        self.stdout.write(f'Журнал писем: {mail_log.path}')
+
+        # Начинаем с нескольких последних писем, дальше читаем только новые
+        last_id = max(mail_log.last_id() - options['tail'], 0)
+        last_id = self.print_new(mail_log, last_id)
+        self.print_summary(mail_log, options['window'])
+        if options['once']:
+            return
+
+        next_summary = time.monotonic() + options['summary_every']
+        try:
+            while True:
+                time.sleep(options['interval'])
+                last_id = self.print_new(mail_log, last_id)
+                if time.monotonic() >= next_summary:
+                    self.print_summary(mail_log, options['window'])
+                    next_summary = time.monotonic() + options['summary_every']
+        except KeyboardInterrupt:
+            self.stdout.write('Остановлено пользователем')
+
+    def print_new(self, mail_log, last_id):
+        """
+        Печатает письма, добавленные в журнал после last_id.
+
+        Args:
+            mail_log (MailLog): Журнал писем
+            last_id (int): Идентификатор последнего напечатанного письма
+
+        Returns:
+            int: Идентификатор последнего напечатанного письма
+        """
+        for entry in mail_log.read_since(last_id):
+            line = (
+                f"{datetime.fromtimestamp(entry['ts']):%H:%M:%S}  "
+                f"{entry['outcome']:<5}  {entry['template'] or '-':<12}  "
+                f"{entry['recipient']}  {entry['size']} Б  {entry['latency_ms']:.1f} мс"
+            )
+            if entry['outcome'] == OUTCOME_ERROR:
+                self.stdout.write(self.style.ERROR(f"{line}  {entry['error']}"))
+            else:
+                self.stdout.write(line)
+            last_id = entry['id']
+        return last_id
+
+    def print_summary(self, mail_log, window):
+        """Печатает сводку за последние window секунд."""
+        stats = mail_log.summary(time.time() - window)
+        rate = stats['total'] / window * 60 if window else 0
+        self.stdout.write(
+            f"За {window} с: писем {stats['total']} ({rate:.1f}/мин), "
+            f"ошибок {stats['errors']}, объем {stats['bytes']} Б, "
+            f"задержка ср. {stats['avg_latency_ms']:.1f} мс / макс. {stats['max_latency_ms']:.1f} мс"
+        )
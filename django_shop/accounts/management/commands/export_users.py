@@ -0,0 +1,66 @@
+"""
+Потоковая выгрузка пользователей в CSV или JSONL.
+
+Пользователи читаются итератором по первичному ключу (на PostgreSQL -
+через серверный курсор), поэтому расход памяти не зависит от размера
+таблицы. Выгрузку можно загрузить обратно командой import_users.
+
+Примеры:
+    python manage.py export_users -o users.csv
+    python manage.py export_users --format jsonl > users.jsonl
+"""
+
+import sys
+
+from django.core.management.base import BaseCommand
+
+from accounts.models import CustomUser
+from accounts.user_io import FORMATS, USER_EXPORT_FIELDS, guess_format, write_records
+
+
+class Command(BaseCommand):
+    """Выгружает пользователей в CSV/JSONL."""
+
+    help = 'Потоковая выгрузка пользователей в CSV или JSONL'
+
+    def add_arguments(self, parser):
+        """Регистрирует аргументы командной строки."""
+        parser.add_argument(
+            '-o', '--output',
+            default='-',
+            help='Путь к файлу или "-" для вывода в stdout'
+        )
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='Формат файла (по умолчанию определяется по расширению)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Количество строк, получаемых из базы за один раз'
+        )
+
+    def handle(self, *args, **options):
+        """Основной цикл выгрузки."""
+        output = options['output']
+        fmt = options['format'] or guess_format(output)
+
+        # password_hash - это колонка password, остальные поля совпадают
+        columns = ['password' if field == 'password_hash' else field for field in USER_EXPORT_FIELDS]
+        rows = (
+            CustomUser.objects
+            .order_by('pk')
+            .values_list(*columns)
+            .iterator(chunk_size=options['chunk_size'])
+        )
+
+        if output == '-':
+            count = write_records(self.stdout, fmt, USER_EXPORT_FIELDS, rows)
+        else:
+            with open(output, 'w', encoding='utf-8', newline='') as stream:
+                count = write_records(stream, fmt, USER_EXPORT_FIELDS, rows)
+
+        # Сводка пишется в stderr, чтобы не портить выгрузку в stdout
+        self.stderr.write(f'Выгружено пользователей: {count}')
@@ -0,0 +1,334 @@
+"""
+Массовый импорт пользователей из CSV или JSONL.
+
+Файл читается потоком, пароли хешируются в пуле процессов,
+а пользователи вставляются пачками через bulk_create.
+
+Колонки: email (обязательно), password (открытый пароль) или
+password_hash (готовый хеш, например из export_users), first_name,
+last_name, phone_number, address, date_of_birth, is_active,
+email_confirmed, date_joined. В режиме --on-conflict update у существующих
+пользователей меняются только поля, колонки которых есть в файле; пароль
+и флаги активности - только при непустом значении.
+
+Примеры:
+    python manage.py import_users customers.csv
+    python manage.py import_users customers.jsonl --on-conflict update --workers 8
+    cat customers.csv | python manage.py import_users - --format csv
+"""
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from accounts.models import CustomUser
+from accounts.search import index_users
+from accounts.user_cache import bump_user_cache_generation
+from accounts.user_io import (
+    FORMATS,
+    guess_format,
+    parse_bool,
+    parse_optional_date,
+    parse_optional_datetime,
+    read_records,
+)
+
+
+# Поля профиля, которые переносятся из файла как есть
+PROFILE_FIELDS = ('first_name', 'last_name', 'phone_number', 'address')
+
+# Поля, которые могут обновляться у существующих пользователей в режиме
+# --on-conflict update. Обновляются только поля, колонки которых есть в файле
+UPDATE_FIELDS = PROFILE_FIELDS + (
+    'password',
+    'date_of_birth',
+    'is_active',
+    'email_confirmed',
+)
+
+# Поля, которые обновляются только непустым значением: пустая ячейка
+# не должна сбрасывать пароль или отключать аккаунт
+REQUIRED_VALUE_FIELDS = ('is_active', 'email_confirmed')
+
+
+def get_supplied_fields(record):
+    """
+    Определяет поля пользователя, которые запись файла действительно задает.
+
+    Args:
+        record (dict): Поля записи (для CSV - колонки заголовка)
+
+    Returns:
+        tuple: Имена полей из UPDATE_FIELDS в порядке UPDATE_FIELDS
+    """
+    supplied = set()
+    for field in PROFILE_FIELDS + ('date_of_birth',):
+        if field in record:
+            supplied.add(field)
+    for field in REQUIRED_VALUE_FIELDS:
+        if record.get(field) not in (None, ''):
+            supplied.add(field)
+    if record.get('password') or record.get('password_hash'):
+        supplied.add('password')
+    return tuple(field for field in UPDATE_FIELDS if field in supplied)
+
+
+def _init_worker(settings_module):
+    """Подготавливает Django в процессе пула (нужно при запуске через spawn)."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    django.setup()
+
+
+class Command(BaseCommand):
+    """Импортирует пользователей из CSV/JSONL пачками."""
+
+    help = 'Массовый импорт пользователей из CSV или JSONL'
+
+    def add_arguments(self, parser):
+        """Регистрирует аргументы командной строки."""
+        parser.add_argument(
+            'path',
+            help='Путь к файлу или "-" для чтения из stdin'
+        )
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='Формат файла (по умолчанию определяется по расширению)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество пользователей в одном INSERT'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Количество процессов для хеширования паролей (0 - без пула)'
+        )
+        parser.add_argument(
+            '--on-conflict',
+            choices=('skip', 'update'),
+            default='skip',
+            help='Что делать с уже существующими email: пропускать или обновлять'
+        )
+
+    def handle(self, *args, **options):
+        """Основной цикл импорта."""
+        path = options['path']
+        fmt = options['format'] or guess_format(path)
+        self.on_conflict = options['on_conflict']
+        self.stats = {'created': 0, 'updated': 0, 'skipped': 0, 'invalid': 0}
+
+        self.workers = options['workers']
+        executor = None
+        if self.workers > 0:
+            executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'shop_project.settings'),),
+            )
+        self.executor = executor
+
+        stream = sys.stdin if path == '-' else open(path, encoding='utf-8', newline='')
+        try:
+            batch = []
+            for line_num, record in read_records(stream, fmt):
+                row = self.parse_record(line_num, record)
+                if row is None:
+                    continue
+                batch.append(row)
+                if len(batch) >= options['batch_size']:
+                    self.import_batch(batch)
+                    batch = []
+            if batch:
+                self.import_batch(batch)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Ошибка чтения файла: {e}')
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+            if executor is not None:
+                executor.shutdown()
+
+        self.stdout.write(
+            'Создано: {created}, обновлено: {updated}, '
+            'пропущено: {skipped}, с ошибками: {invalid}'.format(**self.stats)
+        )
+
+    def parse_record(self, line_num, record):
+        """
+        Проверяет и нормализует одну запись файла.
+
+        Args:
+            line_num (int): Номер строки (для сообщений об ошибках)
+            record (dict): Поля записи
+
+        Returns:
+            dict: Нормализованная запись или None, если запись некорректна
+        """
+        email = CustomUser.objects.normalize_email((record.get('email') or '').strip())
+        try:
+            validate_email(email)
+        except ValidationError:
+            self.stats['invalid'] += 1
+            self.stderr.write(f'Строка {line_num}: некорректный email "{email}"')
+            return None
+
+        try:
+            date_joined = parse_optional_datetime(record.get('date_joined')) or timezone.now()
+            if timezone.is_naive(date_joined):
+                date_joined = timezone.make_aware(date_joined)
+            row = {
+                'email': email,
+                'date_of_birth': parse_optional_date(record.get('date_of_birth')),
+                'date_joined': date_joined,
+                'is_active': parse_bool(record.get('is_active')),
+                'email_confirmed': parse_bool(record.get('email_confirmed')),
+                'password_hash': record.get('password_hash') or None,
+                'raw_password': record.get('password') or None,
+                'update_fields': get_supplied_fields(record),
+            }
+        except ValueError as e:
+            self.stats['invalid'] += 1
+            self.stderr.write(f'Строка {line_num}: {e}')
+            return None
+
+        for field in PROFILE_FIELDS:
+            row[field] = record.get(field) or ''
+        return row
+
+    def hash_passwords(self, batch):
+        """
+        Вычисляет хеши открытых паролей пачки.
+
+        Пользователи без пароля получают непригодный для входа пароль.
+        """
+        raw_passwords = [row['raw_password'] for row in batch if row['raw_password'] and not row['password_hash']]
+        if self.executor is not None and raw_passwords:
+            chunksize = max(1, len(raw_passwords) // (self.workers * 4))
+            hashes = iter(self.executor.map(make_password, raw_passwords, chunksize=chunksize))
+        else:
+            hashes = (make_password(password) for password in raw_passwords)
+
+        for row in batch:
+            if row['password_hash']:
+                continue
+            if row['raw_password']:
+                row['password_hash'] = next(hashes)
+            else:
+                row['password_hash'] = make_password(None)
+
+    def import_batch(self, batch):
+        """
+        Вставляет (и при необходимости обновляет) одну пачку пользователей.
+
+        Args:
+            batch (list): Нормализованные записи
+        """
+        # Дубликаты внутри пачки: побеждает последняя запись
+        unique = {}
+        for row in batch:
+            unique[row['email'].lower()] = row
+        self.stats['skipped'] += len(batch) - len(unique)
+
+        # Один запрос по функциональному индексу LOWER(email)
+        existing = dict(
+            CustomUser.objects
+            .annotate(email_lower=Lower('email'))
+            .filter(email_lower__in=list(unique))
+            .order_by()
+            .values_list('email_lower', 'pk')
+        )
+
+        if self.on_conflict == 'skip':
+            self.stats['skipped'] += len(existing)
+            rows = [row for key, row in unique.items() if key not in existing]
+        else:
+            rows = list(unique.values())
+
+        self.hash_passwords(rows)
+
+        to_create = []
+        # Обновления группируются по набору полей: один bulk_update на набор
+        to_update = {}
+        for row in rows:
+            user = CustomUser(
+                email=row['email'],
+                password=row['password_hash'],
+                date_of_birth=row['date_of_birth'],
+                date_joined=row['date_joined'],
+                is_active=row['is_active'],
+                email_confirmed=row['email_confirmed'],
+                **{field: row[field] for field in PROFILE_FIELDS}
+            )
+            pk = existing.get(row['email'].lower())
+            if pk is None:
+                to_create.append(user)
+            elif row['update_fields']:
+                user.pk = pk
+                to_update.setdefault(row['update_fields'], []).append(user)
+            else:
+                self.stats['skipped'] += 1
+
+        with transaction.atomic():
+            # ignore_conflicts защищает от параллельной регистрации тех же email
+            CustomUser.objects.bulk_create(to_create, ignore_conflicts=True)
+            for update_fields, users in to_update.items():
+                CustomUser.objects.bulk_update(users, update_fields)
+            # bulk_create с ignore_conflicts не возвращает id: индексируем
+            # пачку по тем же email одним запросом
+            updated = [user for users in to_update.values() for user in users]
+            index_users(
+                CustomUser.objects
+                .annotate(email_lower=Lower('email'))
+                .filter(email_lower__in=[user.email.lower() for user in to_create + updated])
+            )
+            created = self.count_inserted(to_create)
+
+        if to_update:
+            # bulk_update не отправляет сигналы: сбрасываем снимки в кеше
+            # после коммита, чтобы в кеш не попали старые данные
+            bump_user_cache_generation()
+
+        # Строки, пропущенные из-за параллельной регистрации тех же email
+        self.stats['skipped'] += len(to_create) - created
+        self.stats['created'] += created
+        self.stats['updated'] += len(updated)
+
+    def count_inserted(self, users):
+        """
+        Считает пользователей, которых действительно вставил bulk_create.
+
+        С ignore_conflicts конфликтующие строки молча пропускаются, поэтому
+        пачка перечитывается по LOWER(email): строка вставлена импортом,
+        если у нее хеш пароля из файла (хеши с солью не совпадают
+        у разных пользователей).
+
+        Args:
+            users (list): Пользователи, переданные в bulk_create
+
+        Returns:
+            int: Количество вставленных строк
+        """
+        if not users:
+            return 0
+        expected = {user.email.lower(): user.password for user in users}
+        stored = (
+            CustomUser.objects
+            .annotate(email_lower=Lower('email'))
+            .filter(email_lower__in=list(expected))
+            .order_by()
+            .values_list('email_lower', 'password')
+        )
+        return sum(1 for email_lower, password in stored if expected.get(email_lower) == password)
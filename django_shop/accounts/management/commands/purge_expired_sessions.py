@@ -0,0 +1,64 @@
+"""
+Удаление истекших сессий из базы данных пачками.
+
+В отличие от стандартной clearsessions, которая удаляет все истекшие
+строки одним запросом, команда удаляет их пачками по первичному ключу,
+поэтому не держит долгую блокировку таблицы django_session.
+В режиме SESSION_STORE=cache строк в БД нет, а истекшие записи
+вытесняет сам кеш (MAX_ENTRIES/CULL_FREQUENCY).
+
+Примеры:
+    python manage.py purge_expired_sessions
+    python manage.py purge_expired_sessions --batch-size 5000 --sleep 0.1
+"""
+
+import time
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    """Удаляет истекшие сессии из таблицы django_session."""
+
+    help = 'Удаляет истекшие сессии из базы данных пачками'
+
+    def add_arguments(self, parser):
+        """Регистрирует аргументы командной строки."""
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество сессий, удаляемых одним запросом'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.0,
+            help='Пауза между пачками в секундах'
+        )
+
+    def handle(self, *args, **options):
+        """Удаляет истекшие сессии и печатает их количество."""
+        if settings.SESSION_ENGINE.endswith('.cache'):
+            self.stdout.write('Сессии хранятся только в кеше, удалять в БД нечего')
+            return
+
+        now = timezone.now()
+        deleted = 0
+        while True:
+            keys = list(
+                Session.objects
+                .filter(expire_date__lt=now)
+                .values_list('session_key', flat=True)[:options['batch_size']]
+            )
+            if not keys:
+                break
+            Session.objects.filter(session_key__in=keys).delete()
+            deleted += len(keys)
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(f'Удалено истекших сессий: {deleted}')
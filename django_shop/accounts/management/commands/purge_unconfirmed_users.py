@@ -0,0 +1,132 @@
+"""
+Удаление пользователей, так и не подтвердивших email.
+
+Пользователь, зарегистрированный через форму, остается неактивным, пока
+не перейдет по ссылке из письма. Команда удаляет таких пользователей
+старше заданного возраста (ACCOUNTS_UNCONFIRMED_USER_MAX_AGE или
+--days), чтобы таблица, уникальный индекс email и подсчеты по статусам
+не росли за счет брошенных регистраций.
+
+Кандидаты выбираются по частичному индексу accounts_user_pending_idx,
+удаляются пачками по первичному ключу, каждая пачка - в отдельной
+короткой транзакции с паузой между пачками. Статус повторно проверяется
+в запросе удаления, поэтому пользователь, активировавшийся во время
+работы команды, не удаляется. Запускается по расписанию, например:
+
+    python manage.py purge_unconfirmed_users
+    python manage.py purge_unconfirmed_users --days 14 --batch-size 500 --sleep 0.1
+    python manage.py purge_unconfirmed_users --dry-run
+"""
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import CustomUser
+
+
+# Значения по умолчанию, если они не заданы в settings.py
+DEFAULT_MAX_AGE = 30 * 24 * 60 * 60  # секунд
+
+
+class Command(BaseCommand):
+    """Удаляет неактивированных пользователей пачками."""
+
+    help = 'Удаляет пользователей, не подтвердивших email, старше заданного возраста'
+
+    def add_arguments(self, parser):
+        """Регистрирует аргументы командной строки."""
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='Минимальный возраст регистрации в днях '
+                 '(по умолчанию ACCOUNTS_UNCONFIRMED_USER_MAX_AGE)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Количество пользователей, удаляемых в одной транзакции'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.1,
+            help='Пауза между пачками в секундах'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только посчитать пользователей, которые будут удалены'
+        )
+
+    def get_max_age(self, options):
+        """
+        Возвращает минимальный возраст удаляемой регистрации.
+
+        Raises:
+            CommandError: Если ссылки активации таких пользователей еще действуют
+        """
+        if options['days'] is not None:
+            max_age = timedelta(days=options['days'])
+        else:
+            max_age = timedelta(seconds=getattr(settings, 'ACCOUNTS_UNCONFIRMED_USER_MAX_AGE', DEFAULT_MAX_AGE))
+
+        link_max_age = timedelta(seconds=settings.ACCOUNTS_ACTIVATION_TOKEN_MAX_AGE)
+        if max_age < link_max_age:
+            raise CommandError(
+                f'Возраст {max_age} меньше срока действия ссылки активации ({link_max_age}): '
+                f'были бы удалены пользователи, которые еще могут активировать аккаунт'
+            )
+        return max_age
+
+    def handle(self, *args, **options):
+        """Удаляет пользователей и печатает количество и скорость удаления."""
+        cutoff = timezone.now() - self.get_max_age(options)
+        # Сотрудников, созданных неактивными в админ-панели, не трогаем
+        candidates = CustomUser.objects.filter(
+            is_active=False,
+            email_confirmed=False,
+            is_staff=False,
+            last_login__isnull=True,
+            date_joined__lt=cutoff,
+        )
+
+        if options['dry_run']:
+            self.stdout.write(f'Будет удалено пользователей: {candidates.count()}')
+            return
+
+        batch_size = options['batch_size']
+        deleted = batches = 0
+        started = time.monotonic()
+        while True:
+            # Порядок частичного индекса (date_joined, id): запрос не читает таблицу целиком
+            user_ids = sorted(
+                candidates.order_by('date_joined', 'pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not user_ids:
+                break
+
+            with transaction.atomic():
+                _, per_model = candidates.filter(pk__in=user_ids).delete()
+            batch_deleted = per_model.get(CustomUser._meta.label, 0)
+            deleted += batch_deleted
+            batches += 1
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Пачка {batches}: удалено {batch_deleted} (id {user_ids[0]}-{user_ids[-1]})')
+
+            if len(user_ids) < batch_size:
+                break
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        elapsed = time.monotonic() - started
+        rate = deleted / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено неактивированных пользователей: {deleted} '
+            f'({batches} пачек, {elapsed:.1f} с, {rate:.0f} польз./с)'
+        ))
@@ -0,0 +1,62 @@
+"""
+Команда полной пересборки поискового индекса пользователей.
+
+Нужна после изменений пользователей в обход сигналов (например, правок
+напрямую в БД) или если индекс поврежден. Пользователи читаются
+пачками по диапазонам первичного ключа.
+
+Примеры:
+    python manage.py rebuild_user_search
+    python manage.py rebuild_user_search --batch-size 5000
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.models import CustomUser
+from accounts.search import clear_index, index_users, optimize_index
+
+
+class Command(BaseCommand):
+    """Пересобирает таблицу accounts_user_search."""
+
+    help = 'Пересобирает поисковый индекс пользователей'
+
+    def add_arguments(self, parser):
+        """Регистрирует аргументы командной строки."""
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Количество пользователей в одной пачке'
+        )
+
+    def handle(self, *args, **options):
+        """Очищает индекс и заполняет его заново."""
+        started = time.monotonic()
+        batch_size = options['batch_size']
+        last_pk = 0
+        total = 0
+
+        # Одна транзакция: поиск не видит наполовину пустой индекс
+        with transaction.atomic():
+            clear_index()
+            while True:
+                user_ids = list(
+                    CustomUser.objects
+                    .filter(pk__gt=last_pk)
+                    .order_by('pk')
+                    .values_list('pk', flat=True)[:batch_size]
+                )
+                if not user_ids:
+                    break
+                index_users(CustomUser.objects.filter(pk__gte=user_ids[0], pk__lte=user_ids[-1]))
+                last_pk = user_ids[-1]
+                total += len(user_ids)
+            optimize_index()
+
+        self.stdout.write(
+            f'Проиндексировано пользователей: {total} за {time.monotonic() - started:.1f} с'
+        )
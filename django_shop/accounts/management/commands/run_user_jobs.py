@@ -0,0 +1,71 @@
+"""
+Команда выполнения массовых операций над пользователями.
+
+Задачи ставят действия списка пользователей в админ-панели, если
+выборка больше ACCOUNTS_BULK_INLINE_LIMIT (см. accounts.bulk_jobs).
+
+Примеры:
+    python manage.py run_user_jobs                    # выполнить очередь
+    python manage.py run_user_jobs --loop             # работать как фоновый процесс
+    python manage.py run_user_jobs --batch-size 500 --pause 0.2
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.bulk_jobs import run_pending_jobs
+
+
+class Command(BaseCommand):
+    """Выполняет задачи BulkUserJob пачками по возрастанию id."""
+
+    help = 'Выполняет массовые операции над пользователями из очереди'
+
+    def add_arguments(self, parser):
+        """Регистрирует аргументы командной строки."""
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Количество пользователей в одной транзакции'
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=None,
+            help='Пауза между пачками в секундах'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а опрашивать очередь с интервалом --interval'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Пауза между опросами очереди в секундах (для --loop)'
+        )
+
+    def handle(self, *args, **options):
+        """Основной цикл выполнения задач."""
+        try:
+            while True:
+                started = time.monotonic()
+                finished, users = run_pending_jobs(
+                    batch_size=options['batch_size'],
+                    pause=options['pause']
+                )
+                if finished or users or not options['loop']:
+                    elapsed = time.monotonic() - started
+                    self.stdout.write(
+                        f'Завершено задач: {finished}, обработано пользователей: {users} '
+                        f'за {elapsed:.1f} с'
+                    )
+
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Остановлено пользователем')
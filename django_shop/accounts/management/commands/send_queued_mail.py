@@ -0,0 +1,83 @@
+"""
+Команда отправки писем из очереди исходящей почты.
+
+Перед отправкой команда обрабатывает запросы восстановления пароля
+(accounts.password_reset): находит пользователей и ставит письма
+со ссылками в ту же очередь.
+
+Примеры:
+    python manage.py send_queued_mail            # отправить всё, что накопилось
+    python manage.py send_queued_mail --loop     # работать как фоновый процесс
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.mail_queue import dispatch_queued_mail
+from accounts.password_reset import process_password_reset_requests
+
+
+class Command(BaseCommand):
+    """Отправляет письма из очереди OutgoingEmail пачками."""
+
+    help = 'Отправляет письма из очереди исходящей почты'
+
+    def add_arguments(self, parser):
+        """Регистрирует аргументы командной строки."""
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Количество писем, отправляемых через одно соединение'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а опрашивать очередь с интервалом --interval'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Пауза между опросами очереди в секундах (для --loop)'
+        )
+
+    def handle(self, *args, **options):
+        """Основной цикл отправки."""
+        try:
+            while True:
+                total_sent = total_failed = 0
+
+                # Письма восстановления пароля попадают в очередь до отправки
+                reset_mails = reset_skipped = 0
+                while True:
+                    queued, skipped = process_password_reset_requests(batch_size=options['batch_size'])
+                    reset_mails += queued
+                    reset_skipped += skipped
+                    if queued + skipped == 0:
+                        break
+                if reset_mails or reset_skipped:
+                    self.stdout.write(
+                        f'Запросов восстановления пароля: {reset_mails + reset_skipped}, '
+                        f'писем: {reset_mails}'
+                    )
+
+                # Отправляем пачки, пока в очереди есть готовые письма
+                while True:
+                    sent, failed = dispatch_queued_mail(batch_size=options['batch_size'])
+                    total_sent += sent
+                    total_failed += failed
+                    if sent + failed == 0:
+                        break
+
+                if total_sent or total_failed or not options['loop']:
+                    self.stdout.write(
+                        f'Отправлено: {total_sent}, ошибок: {total_failed}'
+                    )
+
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Остановлено пользователем')
@@ -0,0 +1,120 @@
+"""
+Отчет о статусе пользователей.
+
+Потоковая замена скрипта check_users.py: читает только выводимые
+колонки через values_list().iterator(), поэтому работает на таблице
+с миллионами пользователей без загрузки ее в память.
+
+Примеры:
+    python manage.py user_status
+    python manage.py user_status --pending --format jsonl
+    python manage.py user_status --joined-after 2025-01-01 --format csv -o users.csv
+"""
+
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from accounts.models import CustomUser
+from accounts.user_io import REPORT_FORMATS, write_records
+
+
+# Колонки отчета (те же сведения, что печатал check_users.py)
+STATUS_FIELDS = ('email', 'is_active', 'email_confirmed', 'date_joined', 'is_staff')
+
+
+class Command(BaseCommand):
+    """Выводит статус пользователей в виде таблицы, CSV или JSONL."""
+
+    help = 'Отчет о статусе пользователей (активность, подтверждение email, права)'
+
+    def add_arguments(self, parser):
+        """Регистрирует аргументы командной строки."""
+        parser.add_argument(
+            '--format',
+            choices=REPORT_FORMATS,
+            default='table',
+            help='Формат вывода'
+        )
+        parser.add_argument(
+            '-o', '--output',
+            default='-',
+            help='Путь к файлу или "-" для вывода в stdout'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Количество строк, получаемых из базы за один раз'
+        )
+
+        active = parser.add_mutually_exclusive_group()
+        active.add_argument('--active', dest='is_active', action='store_const', const=True,
+                            help='Только активные пользователи')
+        active.add_argument('--inactive', dest='is_active', action='store_const', const=False,
+                            help='Только неактивные пользователи')
+
+        confirmed = parser.add_mutually_exclusive_group()
+        confirmed.add_argument('--confirmed', dest='email_confirmed', action='store_const', const=True,
+                               help='Только с подтвержденным email')
+        confirmed.add_argument('--unconfirmed', dest='email_confirmed', action='store_const', const=False,
+                               help='Только с неподтвержденным email')
+
+        parser.add_argument('--pending', action='store_true',
+                            help='Только ожидающие активации (неактивные и без подтверждения email)')
+        parser.add_argument('--staff', action='store_true',
+                            help='Только сотрудники')
+        parser.add_argument('--joined-after', type=self.parse_day,
+                            help='Зарегистрированы не раньше даты (YYYY-MM-DD)')
+        parser.add_argument('--joined-before', type=self.parse_day,
+                            help='Зарегистрированы раньше даты (YYYY-MM-DD)')
+
+    @staticmethod
+    def parse_day(value):
+        """Разбирает дату аргумента в начало дня в текущем часовом поясе."""
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        return timezone.make_aware(datetime.combine(day, time.min))
+
+    def get_queryset(self, options):
+        """
+        Строит запрос с учетом фильтров.
+
+        Returns:
+            QuerySet: Кортежи значений колонок STATUS_FIELDS
+        """
+        queryset = CustomUser.objects.all()
+
+        if options['is_active'] is not None:
+            queryset = queryset.filter(is_active=options['is_active'])
+        if options['email_confirmed'] is not None:
+            queryset = queryset.filter(email_confirmed=options['email_confirmed'])
+        if options['pending']:
+            queryset = queryset.filter(is_active=False, email_confirmed=False)
+        if options['staff']:
+            queryset = queryset.filter(is_staff=True)
+        if options['joined_after']:
+            queryset = queryset.filter(date_joined__gte=options['joined_after'])
+        if options['joined_before']:
+            queryset = queryset.filter(date_joined__lt=options['joined_before'])
+
+        # Сортировка по индексу date_joined (как в check_users.py - новые первыми)
+        return queryset.order_by('-date_joined', '-pk').values_list(*STATUS_FIELDS)
+
+    def handle(self, *args, **options):
+        """Формирует отчет."""
+        rows = self.get_queryset(options).iterator(chunk_size=options['chunk_size'])
+
+        if options['output'] == '-':
+            count = write_records(self.stdout, options['format'], STATUS_FIELDS, rows)
+        else:
+            try:
+                with open(options['output'], 'w', encoding='utf-8', newline='') as stream:
+                    count = write_records(stream, options['format'], STATUS_FIELDS, rows)
+            except OSError as e:
+                raise CommandError(f'Не удалось записать отчет: {e}')
+
+        self.stderr.write(f'Пользователей в отчете: {count}')
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:04
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutgoingEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('to_email', models.EmailField(max_length=254, verbose_name='Получатель')),
+                ('from_email', models.CharField(max_length=254, verbose_name='Отправитель')),
+                ('subject', models.CharField(max_length=255, verbose_name='Тема')),
+                ('body', models.TextField(verbose_name='Текст письма')),
+                ('html_body', models.TextField(blank=True, verbose_name='HTML версия письма')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает отправки'), ('sent', 'Отправлено'), ('failed', 'Ошибка отправки')], default='pending', max_length=10, verbose_name='Статус')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Количество попыток')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Время, раньше которого письмо не будет отправляться повторно', verbose_name='Следующая попытка')),
+                ('last_error', models.TextField(blank=True, verbose_name='Последняя ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Поставлено в очередь')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Отправлено')),
+            ],
+            options={
+                'verbose_name': 'Исходящее письмо',
+                'verbose_name_plural': 'Очередь исходящей почты',
+                'ordering': ['next_attempt_at', 'pk'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='accounts_mail_due_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_outgoingemail'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['date_joined'], name='accounts_user_joined_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['is_active', 'email_confirmed'], name='accounts_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(condition=models.Q(('is_staff', True)), fields=['date_joined'], name='accounts_user_staff_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(condition=models.Q(('email_confirmed', False), ('is_active', False)), fields=['date_joined'], name='accounts_user_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:09
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_customuser_indexes'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='customuser',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='accounts_user_email_ci_unique', violation_error_message='Пользователь с таким email адресом уже существует.'),
+        ),
+    ]
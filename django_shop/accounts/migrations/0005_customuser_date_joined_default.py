@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:09
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_email_case_insensitive_unique'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customuser',
+            name='date_joined',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, help_text='Дата и время регистрации пользователя', verbose_name='Дата регистрации'),
+        ),
+    ]
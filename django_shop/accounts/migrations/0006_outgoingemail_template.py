@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_customuser_date_joined_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='template',
+            field=models.CharField(blank=True, help_text='Имя шаблона письма для журнала отправки', max_length=100, verbose_name='Шаблон'),
+        ),
+    ]
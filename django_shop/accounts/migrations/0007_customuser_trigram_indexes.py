@@ -0,0 +1,51 @@
+"""
+Триграммные индексы для поиска пользователей в режиме
+ACCOUNTS_ADMIN_SEARCH=trigram.
+
+Создаются только на PostgreSQL: поиск icontains Django записывает как
+UPPER(поле::text) LIKE UPPER('%...%'), и GIN-индекс pg_trgm по тому же
+выражению обслуживает такой запрос. На других базах миграция ничего
+не делает.
+"""
+
+from django.db import migrations
+
+
+TRIGRAM_FIELDS = ('email', 'first_name', 'last_name', 'phone_number')
+
+
+def index_name(field):
+    """Имя триграммного индекса поля."""
+    return f'accounts_user_{field}_trgm'
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """Создает расширение pg_trgm и индексы (только PostgreSQL)."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = apps.get_model('accounts', 'CustomUser')._meta.db_table
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for field in TRIGRAM_FIELDS:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {index_name(field)} ON {table} '
+            f'USING gin (UPPER({field}::text) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    """Удаляет триграммные индексы (расширение остается)."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for field in TRIGRAM_FIELDS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {index_name(field)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_outgoingemail_template'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
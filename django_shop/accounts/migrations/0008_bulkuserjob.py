@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_customuser_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BulkUserJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('activate', 'Активация'), ('deactivate', 'Деактивация'), ('confirm_email', 'Подтверждение email'), ('make_staff', 'Права сотрудника')], max_length=20, verbose_name='Действие')),
+                ('query', models.BinaryField(help_text='Сериализованный запрос выборки пользователей из админ-панели', verbose_name='Выборка')),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('done', 'Выполнена'), ('failed', 'Ошибка')], default='pending', max_length=10, verbose_name='Статус')),
+                ('last_pk', models.BigIntegerField(default=0, verbose_name='Последний обработанный id')),
+                ('max_pk', models.BigIntegerField(default=0, help_text='Граница выборки на момент постановки задачи (для прогресса)', verbose_name='Наибольший id')),
+                ('processed', models.PositiveIntegerField(default=0, verbose_name='Обработано пользователей')),
+                ('last_error', models.TextField(blank=True, verbose_name='Ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Поставлена в очередь')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Завершена')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+            ],
+            options={
+                'verbose_name': 'Массовая операция',
+                'verbose_name_plural': 'Массовые операции над пользователями',
+                'ordering': ['-created_at', '-pk'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='accounts_userjob_status_idx')],
+            },
+        ),
+    ]
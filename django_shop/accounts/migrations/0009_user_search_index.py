@@ -0,0 +1,93 @@
+"""
+Поисковый индекс пользователей (accounts.search).
+
+SQLite: виртуальная таблица FTS5 с токенизатором trigram, rowid - id
+пользователя. PostgreSQL: таблица с колонкой tsvector и GIN-индексом.
+Существующие пользователи индексируются сразу; после этого индекс
+поддерживают сигналы, а пересобрать его можно командой rebuild_user_search.
+
+Токенизатор trigram появился в SQLite 3.34; без FTS5 или на более старой
+версии миграция останавливается с понятной ошибкой.
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import migrations
+
+
+TABLE = 'accounts_user_search'
+
+# Первая версия SQLite с токенизатором trigram
+MIN_SQLITE_VERSION = (3, 34, 0)
+
+
+def check_sqlite_fts5(connection):
+    """
+    Проверяет, что SQLite поддерживает FTS5 с токенизатором trigram.
+
+    Args:
+        connection: Соединение с базой SQLite
+
+    Raises:
+        ImproperlyConfigured: Если версия SQLite старее MIN_SQLITE_VERSION
+            или SQLite собран без FTS5
+    """
+    version = connection.Database.sqlite_version_info
+    if version < MIN_SQLITE_VERSION:
+        raise ImproperlyConfigured(
+            'Поисковому индексу пользователей нужен SQLite {} или новее '
+            '(FTS5 с токенизатором trigram), установлен {}.'.format(
+                '.'.join(map(str, MIN_SQLITE_VERSION)), connection.Database.sqlite_version
+            )
+        )
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        fts5_enabled = cursor.fetchone()[0]
+    if not fts5_enabled:
+        raise ImproperlyConfigured(
+            'Поисковому индексу пользователей нужен SQLite с модулем FTS5 '
+            '(опция сборки SQLITE_ENABLE_FTS5).'
+        )
+
+
+def create_search_index(apps, schema_editor):
+    """Создает и заполняет таблицу поискового индекса."""
+    users = apps.get_model('accounts', 'CustomUser')._meta.db_table
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE TABLE {TABLE} ('
+            f'user_id bigint PRIMARY KEY REFERENCES {users} (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, '
+            f'document tsvector NOT NULL)'
+        )
+        schema_editor.execute(f'CREATE INDEX {TABLE}_document_idx ON {TABLE} USING gin (document)')
+        schema_editor.execute(
+            f"INSERT INTO {TABLE} (user_id, document) "
+            f"SELECT id, to_tsvector('simple', concat_ws(' ', email, translate(email, '@.+_-', '     '), "
+            f"first_name, last_name, regexp_replace(phone_number, '\\D', '', 'g'), address)) FROM {users}"
+        )
+    else:
+        check_sqlite_fts5(schema_editor.connection)
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {TABLE} USING fts5(email, name, phone, address, tokenize='trigram')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {TABLE} (rowid, email, name, phone, address) "
+            f"SELECT id, email, trim(first_name || ' ' || last_name), "
+            f"replace(replace(replace(replace(replace(phone_number, '+', ''), '-', ''), ' ', ''), '(', ''), ')', ''), "
+            f"address FROM {users}"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    """Удаляет таблицу поискового индекса."""
+    schema_editor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_bulkuserjob'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,129 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:48
+
+"""
+Номера телефонов в формате E.164.
+
+Тип колонки не меняется, поэтому AlterField применяется только
+к состоянию моделей (иначе SQLite пересоздал бы всю таблицу).
+Существующие номера приводятся к формату +7XXXXXXXXXX пачками,
+каждая пачка в своей транзакции вместе с обновлением поискового
+индекса; индекс по номеру строится после заполнения.
+
+SQL обновления индекса и правила разбора номера записаны здесь, а не
+импортированы из accounts.search и accounts.utils: миграция должна
+работать так, как на момент ее написания, даже если эти модули
+изменятся.
+"""
+
+import accounts.models
+import django.core.validators
+from django.db import migrations, models, transaction
+
+
+BATCH_SIZE = 2000
+
+SEARCH_TABLE = 'accounts_user_search'
+
+
+def normalize_phone(phone):
+    """
+    Приводит российский номер телефона к формату E.164 (+7XXXXXXXXXX).
+
+    Копия accounts.utils.normalize_phone на момент миграции.
+
+    Raises:
+        ValueError: Если номер не похож на российский
+    """
+    phone = (phone or '').strip()
+    if not phone:
+        return ''
+
+    digits = ''.join(c for c in phone if c.isdigit())
+    # Код страны: +7, 7 или 8 (внутренний формат); без кода - 10 цифр
+    country_codes = '7' if phone.startswith('+') else '78'
+    if len(digits) == 11 and digits[0] in country_codes:
+        digits = digits[1:]
+    elif phone.startswith('+'):
+        digits = ''
+    if len(digits) != 10 or any(c not in '0123456789+-() ' for c in phone):
+        raise ValueError(f'Некорректный номер телефона: {phone}')
+    return f'+7{digits}'
+
+
+def reindex_users(schema_editor, users_table, user_ids):
+    """Пересобирает документы поискового индекса для пользователей из user_ids."""
+    if not user_ids:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        if schema_editor.connection.vendor == 'postgresql':
+            placeholders = ', '.join(['%s'] * len(user_ids))
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (user_id, document) "
+                f"SELECT id, to_tsvector('simple', concat_ws(' ', email, translate(email, '@.+_-', '     '), "
+                f"first_name, last_name, regexp_replace(phone_number, '\\D', '', 'g'), address)) "
+                f"FROM {users_table} WHERE id IN ({placeholders}) "
+                f"ON CONFLICT (user_id) DO UPDATE SET document = EXCLUDED.document",
+                user_ids
+            )
+        else:
+            # Номер E.164 после удаления '+' состоит из одних цифр
+            cursor.executemany(
+                f"UPDATE {SEARCH_TABLE} SET phone = "
+                f"(SELECT replace(phone_number, '+', '') FROM {users_table} WHERE id = %s) "
+                f"WHERE rowid = %s",
+                [(pk, pk) for pk in user_ids]
+            )
+
+
+def normalize_phone_numbers(apps, schema_editor):
+    """Приводит сохраненные номера к формату E.164 пачками по id."""
+    CustomUser = apps.get_model('accounts', 'CustomUser')
+    users = CustomUser.objects.using(schema_editor.connection.alias).exclude(phone_number='')
+    last_pk = 0
+
+    while True:
+        rows = list(users.filter(pk__gt=last_pk).order_by('pk').values_list('pk', 'phone_number')[:BATCH_SIZE])
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+
+        changed = []
+        for pk, phone in rows:
+            try:
+                normalized = normalize_phone(phone)
+            except ValueError:
+                # Неразборчивые номера остаются как есть
+                continue
+            if normalized != phone:
+                changed.append(CustomUser(pk=pk, phone_number=normalized))
+
+        with transaction.atomic(using=schema_editor.connection.alias):
+            CustomUser.objects.using(schema_editor.connection.alias).bulk_update(changed, ['phone_number'])
+            reindex_users(schema_editor, CustomUser._meta.db_table, [user.pk for user in changed])
+
+
+class Migration(migrations.Migration):
+
+    # Каждая пачка заполнения фиксируется отдельно
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0009_user_search_index'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='customuser',
+                    name='phone_number',
+                    field=accounts.models.PhoneNumberField(blank=True, help_text='Номер телефона для связи и доставки', max_length=15, validators=[django.core.validators.RegexValidator(message="Номер телефона должен быть в формате: '+79991234567', '89991234567' или '79991234567'", regex='^\\+7[0-9]{10}$')], verbose_name='Номер телефона'),
+                ),
+            ],
+        ),
+        migrations.RunPython(normalize_phone_numbers, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['phone_number'], name='accounts_user_phone_idx'),
+        ),
+    ]
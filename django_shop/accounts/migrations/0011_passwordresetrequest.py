@@ -0,0 +1,27 @@
+# Generated by Django 4.2.30 on 2026-10-17 23:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_phone_number_e164'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PasswordResetRequest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.CharField(help_text='Введенный адрес в нижнем регистре', max_length=254, verbose_name='Email')),
+                ('link_base', models.CharField(help_text='Схема и домен запроса для ссылки в письме', max_length=200, verbose_name='Адрес сайта')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создан')),
+            ],
+            options={
+                'verbose_name': 'Запрос восстановления пароля',
+                'verbose_name_plural': 'Запросы восстановления пароля',
+                'ordering': ['pk'],
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.30 on 2026-10-17 23:12
+
+"""
+Выборка массовой операции хранится как JSON-список диапазонов id.
+
+Незавершенные задачи со старой (сериализованной) выборкой не
+переносятся: старые данные не десериализуются, а задачи помечаются
+ошибочными, и действие нужно запустить из админ-панели заново.
+"""
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fail_pending_jobs(apps, schema_editor):
+    """Завершает с ошибкой задачи, которые нельзя перенести."""
+    BulkUserJob = apps.get_model('accounts', 'BulkUserJob')
+    BulkUserJob.objects.using(schema_editor.connection.alias).filter(status='pending').update(
+        status='failed',
+        last_error='Задача создана до изменения формата выборки: запустите действие заново',
+        finished_at=timezone.now(),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0011_passwordresetrequest'),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_pending_jobs, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='bulkuserjob',
+            name='query',
+        ),
+        migrations.AddField(
+            model_name='bulkuserjob',
+            name='selection',
+            field=models.JSONField(default=list, help_text='Диапазоны id выбранных пользователей: [[первый, последний], ...]', verbose_name='Выборка'),
+        ),
+        migrations.AlterField(
+            model_name='bulkuserjob',
+            name='max_pk',
+            field=models.BigIntegerField(default=0, help_text='Наибольший id выборки (для прогресса)', verbose_name='Наибольший id'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-17 23:40
+
+"""
+Удаление текста уже отправленных писем восстановления пароля.
+
+Новые письма с одноразовыми ссылками очищаются диспетчером очереди
+после отправки (accounts.mail_queue.REDACTED_TEMPLATES); миграция
+очищает письма, отправленные до этого изменения.
+"""
+
+from django.db import migrations
+
+
+REDACTED_BODY = '[текст письма удален после отправки]'
+
+
+def redact_reset_mail(apps, schema_editor):
+    """Удаляет текст отправленных и неудачных писем восстановления пароля."""
+    OutgoingEmail = apps.get_model('accounts', 'OutgoingEmail')
+    OutgoingEmail.objects.using(schema_editor.connection.alias).filter(
+        template='password_reset',
+        status__in=['sent', 'failed'],
+    ).update(body=REDACTED_BODY, html_body='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0012_bulkuserjob_selection'),
+    ]
+
+    operations = [
+        migrations.RunPython(redact_reset_mail, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-17 23:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0013_redact_password_reset_mail'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(condition=models.Q(('is_active', False)), fields=['date_joined'], name='accounts_user_inactive_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.30 on 2026-10-18 00:10
+
+"""
+Выборка массовой операции хранится как условия фильтров и поиска.
+
+Незавершенные задачи со старой выборкой (диапазонами id) помечаются
+ошибочными: действие нужно запустить из админ-панели заново.
+"""
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fail_pending_jobs(apps, schema_editor):
+    """Завершает с ошибкой задачи, которые нельзя перенести."""
+    BulkUserJob = apps.get_model('accounts', 'BulkUserJob')
+    BulkUserJob.objects.using(schema_editor.connection.alias).filter(status='pending').update(
+        status='failed',
+        last_error='Задача создана до изменения формата выборки: запустите действие заново',
+        finished_at=timezone.now(),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0014_customuser_inactive_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_pending_jobs, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='bulkuserjob',
+            name='selection',
+        ),
+        migrations.AddField(
+            model_name='bulkuserjob',
+            name='filters',
+            field=models.JSONField(blank=True, default=dict, help_text='Условия выборки пользователей (параметры фильтров списка)', verbose_name='Фильтры'),
+        ),
+        migrations.AddField(
+            model_name='bulkuserjob',
+            name='search',
+            field=models.CharField(blank=True, help_text='Строка поиска списка пользователей', max_length=255, verbose_name='Поиск'),
+        ),
+        migrations.AlterField(
+            model_name='bulkuserjob',
+            name='max_pk',
+            field=models.BigIntegerField(default=0, help_text='Наибольший id таблицы при постановке задачи (граница выборки)', verbose_name='Наибольший id'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 00:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0015_bulkuserjob_filters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='password_reset_sent_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Когда пользователю последний раз было поставлено письмо восстановления пароля', null=True, verbose_name='Письмо восстановления пароля'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 00:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0016_customuser_password_reset_sent_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customuser',
+            name='email',
+            field=models.EmailField(help_text='Основной email для входа в систему', max_length=254, verbose_name='Email адрес'),
+        ),
+    ]
@@ -6,10 +6,48 @@
 """
 
 from django.db import models
+from django.db.models import Value
+from django.db.models.functions import Lower
+from django.db.models.lookups import Exact
+from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import RegexValidator
 
+from .utils import normalize_phone
+
+
+class PhoneNumberField(models.CharField):
+    """
+    Номер телефона, который хранится в формате E.164 (+7XXXXXXXXXX).
+    
+    Номер в любой записи (8..., 7..., с пробелами и скобками) приводится
+    к каноническому виду при валидации, при сохранении (в том числе
+    bulk_create/bulk_update) и в точных запросах phone_number=..., поэтому
+    поиск по номеру - одно обращение к индексу. Номера, которые не удалось
+    разобрать, остаются как есть и отклоняются валидатором модели.
+    """
+    
+    def to_python(self, value):
+        """Приводит номер к формату E.164, если это возможно."""
+        value = super().to_python(value)
+        if not value:
+            return value
+        try:
+            return normalize_phone(value)
+        except ValueError:
+            return value
+    
+    def get_prep_value(self, value):
+        """Нормализует номер для записи в БД и для условий запросов."""
+        return self.to_python(super().get_prep_value(value))
+    
+    def pre_save(self, model_instance, add):
+        """Записывает нормализованный номер и в сохраняемый объект."""
+        value = self.to_python(super().pre_save(model_instance, add))
+        setattr(model_instance, self.attname, value)
+        return value
+
 
 class CustomUserManager(BaseUserManager):
     """
@@ -19,6 +57,73 @@ class CustomUserManager(BaseUserManager):
     с email в качестве основного поля для входа.
     """
     
+    def filter_by_email(self, email):
+        """
+        Ищет пользователей по email без учета регистра.
+        
+        Сравнение LOWER(email) = LOWER(%s) использует функциональный
+        уникальный индекс accounts_user_email_ci_unique, поэтому поиск
+        остается индексным (а не полным сканированием, как email__iexact).
+        
+        Args:
+            email (str): Email адрес в любом регистре
+            
+        Returns:
+            QuerySet: Пользователи с таким email (не более одного)
+        """
+        return self.filter(Exact(Lower('email'), Lower(Value(email))))
+
+    def filter_by_phone(self, phone):
+        """
+        Ищет пользователей по номеру телефона в любой записи.
+        
+        Номер приводится к формату E.164, и поиск идет точным сравнением
+        по индексу accounts_user_phone_idx.
+        
+        Args:
+            phone (str): Номер телефона
+            
+        Returns:
+            QuerySet: Пользователи с этим номером (пустой для некорректного номера)
+        """
+        try:
+            phone = normalize_phone(phone)
+        except ValueError:
+            return self.none()
+        if not phone:
+            return self.none()
+        return self.filter(phone_number=phone)
+
+    def get_by_phone(self, phone):
+        """
+        Загружает пользователя по номеру телефона.
+        
+        Args:
+            phone (str): Номер телефона в любой записи
+            
+        Returns:
+            CustomUser: Найденный пользователь
+            
+        Raises:
+            CustomUser.DoesNotExist: Если пользователь не найден
+            CustomUser.MultipleObjectsReturned: Если номер указан у нескольких пользователей
+        """
+        return self.filter_by_phone(phone).get()
+
+    def get_by_natural_key(self, username):
+        """
+        Загружает пользователя по email без учета регистра.
+        
+        Используется бэкендами аутентификации при входе.
+        
+        Args:
+            username (str): Email адрес пользователя
+            
+        Returns:
+            CustomUser: Найденный пользователь
+        """
+        return self.filter_by_email(username).get()
+
     def create_user(self, email, password=None, **extra_fields):
         """
         Создает и сохраняет обычного пользователя.
@@ -86,15 +191,17 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     о пользователе интернет-магазина.
     """
     
-    # Валидатор для номера телефона (российский формат)
+    # Валидатор для номера телефона (российский номер в формате E.164;
+    # PhoneNumberField приводит к нему другие записи номера)
     phone_regex = RegexValidator(
-        regex=r'^\+?7?[0-9]{10}$',
-        message="Номер телефона должен быть в формате: '+79991234567' или '79991234567'"
+        regex=r'^\+7[0-9]{10}$',
+        message="Номер телефона должен быть в формате: '+79991234567', '89991234567' или '79991234567'"
     )
     
     # Основные поля пользователя
+    # Уникальность без учета регистра задает ограничение
+    # accounts_user_email_ci_unique (см. Meta.constraints)
     email = models.EmailField(
-        unique=True,
         verbose_name='Email адрес',
         help_text='Основной email для входа в систему'
     )
@@ -114,7 +221,7 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     )
     
     # Дополнительные поля для интернет-магазина
-    phone_number = models.CharField(
+    phone_number = PhoneNumberField(
         validators=[phone_regex],
         max_length=15,
         blank=True,
@@ -156,8 +263,11 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     )
     
     # Временные метки
+    # default вместо auto_now_add: импорт пользователей (import_users)
+    # сохраняет исходную дату регистрации
     date_joined = models.DateTimeField(
-        auto_now_add=True,
+        default=timezone.now,
+        editable=False,
         verbose_name='Дата регистрации',
         help_text='Дата и время регистрации пользователя'
     )
@@ -169,6 +279,14 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
         help_text='IP адрес последнего входа в систему'
     )
     
+    password_reset_sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Письмо восстановления пароля',
+        help_text='Когда пользователю последний раз было поставлено письмо восстановления пароля'
+    )
+    
     # Указываем кастомный менеджер
     objects = CustomUserManager()
 
@@ -183,6 +301,44 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
         ordering = ['-date_joined']  # Сортировка по дате регистрации (новые первые)
+        constraints = [
+            # Email уникален без учета регистра: Foo@x.com и foo@x.com - один аккаунт.
+            # Этот же индекс обслуживает поиск через CustomUserManager.filter_by_email
+            models.UniqueConstraint(
+                Lower('email'),
+                name='accounts_user_email_ci_unique',
+                violation_error_message='Пользователь с таким email адресом уже существует.'
+            ),
+        ]
+        indexes = [
+            # Сортировка по умолчанию и фильтр по дате в админ-панели
+            models.Index(fields=['date_joined'], name='accounts_user_joined_idx'),
+            # Подсчеты и фильтры по статусу аккаунта (мониторинг, статистика, админка)
+            models.Index(fields=['is_active', 'email_confirmed'], name='accounts_user_status_idx'),
+            # Сотрудников мало, поэтому частичный индекс почти ничего не весит
+            models.Index(
+                fields=['date_joined'],
+                condition=models.Q(is_staff=True),
+                name='accounts_user_staff_idx'
+            ),
+            # Поиск по номеру телефона (CustomUserManager.get_by_phone). Индекс не
+            # частичный: условие phone_number <> '' не выводится из phone_number = %s
+            models.Index(fields=['phone_number'], name='accounts_user_phone_idx'),
+            # Неактивные пользователи (счетчик и фильтр админки). SQLite не применяет
+            # accounts_user_status_idx к условию NOT is_active, а частичный индекс
+            # содержит только неактивные строки
+            models.Index(
+                fields=['date_joined'],
+                condition=models.Q(is_active=False),
+                name='accounts_user_inactive_idx'
+            ),
+            # Пользователи, ожидающие активации по ссылке из письма
+            models.Index(
+                fields=['date_joined'],
+                condition=models.Q(is_active=False, email_confirmed=False),
+                name='accounts_user_pending_idx'
+            ),
+        ]
 
     def __str__(self):
         """
@@ -217,6 +373,31 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
         """
         return self.first_name or self.email
 
+    def get_session_auth_hash(self):
+        """
+        Возвращает хеш для проверки сессии.
+        
+        У пользователя из кеша снимков (accounts.user_cache) хеш уже
+        вычислен, поэтому пароль из БД не загружается.
+        
+        Returns:
+            str: Хеш сессии
+        """
+        session_auth_hash = self.__dict__.get('_session_auth_hash')
+        if session_auth_hash is not None:
+            return session_auth_hash
+        return super().get_session_auth_hash()
+
+    def set_password(self, raw_password):
+        """
+        Устанавливает новый пароль и сбрасывает вычисленный хеш сессии.
+        
+        Args:
+            raw_password (str): Новый пароль
+        """
+        super().set_password(raw_password)
+        self.__dict__.pop('_session_auth_hash', None)
+
     def has_confirmed_email(self):
         """
         Проверяет, подтвержден ли email пользователя.
@@ -234,3 +415,279 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
             bool: True, если пользователь может войти, иначе False
         """
         return self.is_active and self.email_confirmed
+
+
+class OutgoingEmail(models.Model):
+    """
+    Письмо в очереди исходящей почты.
+
+    Представления не отправляют письма напрямую: они ставят их в очередь,
+    а фоновая команда ``send_queued_mail`` отправляет накопившиеся письма
+    пачками через одно SMTP-соединение и повторяет неудачные попытки.
+    """
+
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'Ожидает отправки'),
+        (STATUS_SENT, 'Отправлено'),
+        (STATUS_FAILED, 'Ошибка отправки'),
+    )
+
+    to_email = models.EmailField(
+        verbose_name='Получатель'
+    )
+
+    from_email = models.CharField(
+        max_length=254,
+        verbose_name='Отправитель'
+    )
+
+    subject = models.CharField(
+        max_length=255,
+        verbose_name='Тема'
+    )
+
+    body = models.TextField(
+        verbose_name='Текст письма'
+    )
+
+    html_body = models.TextField(
+        blank=True,
+        verbose_name='HTML версия письма'
+    )
+
+    template = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name='Шаблон',
+        help_text='Имя шаблона письма для журнала отправки'
+    )
+
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        verbose_name='Статус'
+    )
+
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Количество попыток'
+    )
+
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Следующая попытка',
+        help_text='Время, раньше которого письмо не будет отправляться повторно'
+    )
+
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка'
+    )
+
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Поставлено в очередь'
+    )
+
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Отправлено'
+    )
+
+    class Meta:
+        """Метаданные модели."""
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Очередь исходящей почты'
+        ordering = ['next_attempt_at', 'pk']
+        indexes = [
+            # Диспетчер выбирает письма по статусу и времени следующей попытки
+            models.Index(fields=['status', 'next_attempt_at'], name='accounts_mail_due_idx'),
+        ]
+
+    def __str__(self):
+        """
+        Строковое представление письма.
+
+        Returns:
+            str: Тема и получатель письма
+        """
+        return f"{self.subject} → {self.to_email}"
+
+
+class BulkUserJob(models.Model):
+    """
+    Фоновая массовая операция над пользователями.
+
+    Действия админ-панели над большими выборками не выполняют один
+    UPDATE по всем строкам (он надолго блокирует таблицу и может не
+    уложиться во время запроса), а ставят задачу в очередь. Команда
+    ``run_user_jobs`` выполняет ее пачками по первичному ключу,
+    каждая пачка - в отдельной транзакции (см. accounts.bulk_jobs).
+    """
+
+    STATUS_PENDING = 'pending'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'В очереди'),
+        (STATUS_DONE, 'Выполнена'),
+        (STATUS_FAILED, 'Ошибка'),
+    )
+
+    ACTION_ACTIVATE = 'activate'
+    ACTION_DEACTIVATE = 'deactivate'
+    ACTION_CONFIRM_EMAIL = 'confirm_email'
+    ACTION_MAKE_STAFF = 'make_staff'
+
+    ACTION_CHOICES = (
+        (ACTION_ACTIVATE, 'Активация'),
+        (ACTION_DEACTIVATE, 'Деактивация'),
+        (ACTION_CONFIRM_EMAIL, 'Подтверждение email'),
+        (ACTION_MAKE_STAFF, 'Права сотрудника'),
+    )
+
+    action = models.CharField(
+        max_length=20,
+        choices=ACTION_CHOICES,
+        verbose_name='Действие'
+    )
+
+    filters = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='Фильтры',
+        help_text='Условия выборки пользователей (параметры фильтров списка)'
+    )
+
+    search = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name='Поиск',
+        help_text='Строка поиска списка пользователей'
+    )
+
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        verbose_name='Статус'
+    )
+
+    last_pk = models.BigIntegerField(
+        default=0,
+        verbose_name='Последний обработанный id'
+    )
+
+    max_pk = models.BigIntegerField(
+        default=0,
+        verbose_name='Наибольший id',
+        help_text='Наибольший id таблицы при постановке задачи (граница выборки)'
+    )
+
+    processed = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Обработано пользователей'
+    )
+
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Ошибка'
+    )
+
+    created_by = models.ForeignKey(
+        'CustomUser',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Автор'
+    )
+
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Поставлена в очередь'
+    )
+
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Завершена'
+    )
+
+    class Meta:
+        """Метаданные модели."""
+        verbose_name = 'Массовая операция'
+        verbose_name_plural = 'Массовые операции над пользователями'
+        ordering = ['-created_at', '-pk']
+        indexes = [
+            # Обработчик выбирает незавершенные задачи в порядке постановки
+            models.Index(fields=['status', 'created_at'], name='accounts_userjob_status_idx'),
+        ]
+
+    def __str__(self):
+        """
+        Строковое представление задачи.
+
+        Returns:
+            str: Номер и действие задачи
+        """
+        return f"Задача №{self.pk}: {self.get_action_display()}"
+
+    @property
+    def progress(self):
+        """Доля пройденного диапазона id в процентах."""
+        if self.status == self.STATUS_DONE:
+            return 100
+        if not self.max_pk:
+            return 0
+        return min(100, int(self.last_pk * 100 / self.max_pk))
+
+
+class PasswordResetRequest(models.Model):
+    """
+    Запрос на восстановление пароля, ожидающий обработки.
+
+    Представление только сохраняет введенный email: поиск пользователя,
+    создание ссылки и письма выполняет фоновая команда ``send_queued_mail``
+    (см. accounts.password_reset). Поэтому ответ не зависит от того,
+    существует ли аккаунт, а всплеск запросов не занимает веб-процессы.
+    """
+
+    email = models.CharField(
+        max_length=254,
+        verbose_name='Email',
+        help_text='Введенный адрес в нижнем регистре'
+    )
+
+    link_base = models.CharField(
+        max_length=200,
+        verbose_name='Адрес сайта',
+        help_text='Схема и домен запроса для ссылки в письме'
+    )
+
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создан'
+    )
+
+    class Meta:
+        """Метаданные модели."""
+        verbose_name = 'Запрос восстановления пароля'
+        verbose_name_plural = 'Запросы восстановления пароля'
+        ordering = ['pk']
+
+    def __str__(self):
+        """
+        Строковое представление запроса.
+
+        Returns:
+            str: Email запроса
+        """
+        return self.email
@@ -0,0 +1,138 @@
+"""
+Восстановление пароля через очередь запросов.
+
+Представление password_reset_request только сохраняет введенный email
+(PasswordResetRequest) - один INSERT, одинаковый для существующих
+и несуществующих адресов, поэтому ни ответ, ни время ответа не выдают,
+зарегистрирован ли адрес. Команда ``send_queued_mail`` пачками находит
+пользователей, создает ссылки с одноразовыми токенами и ставит письма
+в очередь исходящей почты.
+
+Одному пользователю письмо отправляется не чаще раза в
+ACCOUNTS_PASSWORD_RESET_INTERVAL секунд, поэтому всплеск запросов
+(например, после фишинговой рассылки) не превращается в поток писем.
+Время последнего письма хранится в БД (CustomUser.password_reset_sent_at),
+поэтому ограничение действует и при нескольких параллельных обработчиках,
+и при кеше в памяти процесса.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, Value
+from django.db.models.functions import Lower
+from django.db.models.lookups import In
+from django.urls import reverse
+from django.utils import timezone
+
+from .email_templates import PASSWORD_RESET_EMAIL
+from .mail_queue import enqueue_mail
+from .models import CustomUser, PasswordResetRequest
+from .tokens import password_reset_token_generator
+
+
+# Значения по умолчанию, если они не заданы в settings.py
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_INTERVAL = 5 * 60  # секунд между письмами одному пользователю
+
+
+def request_password_reset(email, link_base):
+    """
+    Ставит запрос восстановления пароля в очередь.
+
+    Args:
+        email (str): Введенный email адрес
+        link_base (str): Схема и домен сайта для ссылки (https://shop.example)
+
+    Returns:
+        PasswordResetRequest: Созданный запрос
+    """
+    return PasswordResetRequest.objects.create(email=email.strip().lower(), link_base=link_base)
+
+
+def process_password_reset_requests(batch_size=None):
+    """
+    Обрабатывает одну пачку запросов восстановления пароля.
+
+    Запросы пачки удаляются в той же транзакции, в которой письма
+    ставятся в очередь и отмечается время письма пользователю, поэтому
+    при откате транзакции запросы и ограничение частоты тоже откатываются.
+    Письмо получают только активные пользователи с подтвержденным email.
+
+    Args:
+        batch_size (int): Максимальное количество запросов в пачке
+
+    Returns:
+        tuple: (количество поставленных в очередь писем,
+            количество запросов без письма)
+    """
+    batch_size = batch_size or getattr(settings, 'ACCOUNTS_PASSWORD_RESET_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+    interval = getattr(settings, 'ACCOUNTS_PASSWORD_RESET_INTERVAL', DEFAULT_INTERVAL)
+    queued = 0
+    now = timezone.now()
+    # Письмо можно отправить, если предыдущее было раньше этой границы
+    throttled = Q(password_reset_sent_at__isnull=True) | Q(password_reset_sent_at__lte=now - timedelta(seconds=interval))
+
+    with transaction.atomic():
+        # skip_locked позволяет запускать несколько обработчиков параллельно
+        batch = list(PasswordResetRequest.objects.select_for_update(skip_locked=True).order_by('pk')[:batch_size])
+        if not batch:
+            return 0, 0
+        PasswordResetRequest.objects.filter(pk__in=[reset.pk for reset in batch]).delete()
+
+        # Один запрос на пачку по индексу LOWER(email)
+        link_bases = {reset.email: reset.link_base for reset in batch}
+        users = CustomUser.objects.filter(
+            In(Lower('email'), [Value(email) for email in link_bases]),
+            is_active=True,
+            email_confirmed=True,
+        ).only('email', 'first_name', 'password')
+
+        for user in users:
+            # Повторные запросы в пределах интервала письма не создают. Условный
+            # UPDATE не даст двум обработчикам отправить письмо одному пользователю
+            if not CustomUser.objects.filter(throttled, pk=user.pk).update(password_reset_sent_at=now):
+                continue
+            link = link_bases[user.email.lower()] + reverse(
+                'accounts:password_reset_confirm',
+                kwargs=password_reset_token_generator.make_link_args(user)
+            )
+            subject, message, html_message = PASSWORD_RESET_EMAIL.render({
+                'user': user,
+                'reset_link': link,
+                'site_name': 'Интернет-магазин',
+            })
+            enqueue_mail(
+                subject=subject,
+                message=message,
+                recipient=user.email,
+                html_message=html_message,
+                template=PASSWORD_RESET_EMAIL.name
+            )
+            queued += 1
+
+    return queued, len(batch) - queued
+
+
+def set_password_once(user, password_hash, new_password):
+    """
+    Устанавливает новый пароль, если текущий хеш не изменился.
+
+    Условный UPDATE делает ссылку одноразовой и при одновременной
+    отправке формы из двух вкладок: второй запрос не изменит ни одной строки.
+
+    Args:
+        user (CustomUser): Пользователь
+        password_hash (str): Хеш пароля, с которым проверялся токен
+        new_password (str): Новый пароль
+
+    Returns:
+        bool: True, если пароль изменен
+    """
+    user.set_password(new_password)
+    return bool(
+        CustomUser.objects
+        .filter(pk=user.pk, password=password_hash)
+        .update(password=user.password)
+    )
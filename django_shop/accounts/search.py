@@ -0,0 +1,216 @@
+"""
+Полнотекстовый поиск пользователей для службы поддержки.
+
+Индекс хранится в отдельной таблице accounts_user_search, которую
+создает миграция 0009_user_search_index:
+
+- SQLite: виртуальная таблица FTS5 с токенизатором trigram - находит
+  любой фрагмент email, имени, телефона или адреса от 3 символов;
+- PostgreSQL: таблица с колонкой tsvector и GIN-индексом - находит
+  слова по началу (prefix-запросы to_tsquery).
+
+Индекс обновляется сигналами post_save/post_delete пользователя
+в той же транзакции. Массовые изменения без сигналов (bulk_create,
+bulk_update) должны вызывать index_users(), а полностью индекс
+пересобирает команда rebuild_user_search.
+"""
+
+import re
+
+from django.db import connection
+
+from .models import CustomUser
+from .utils import normalize_phone
+
+
+SEARCH_TABLE = 'accounts_user_search'
+
+# Поля пользователя, изменения которых требуют переиндексации
+INDEXED_FIELDS = frozenset({'email', 'first_name', 'last_name', 'phone_number', 'address'})
+
+# Значение по умолчанию для количества результатов
+DEFAULT_LIMIT = 20
+
+# Короче токенизатор trigram фрагменты не находит
+MIN_FRAGMENT_LENGTH = 3
+
+# Фрагмент запроса, похожий на номер телефона: цифры с пробелами,
+# скобками и дефисами, не внутри слова (user12 - не номер)
+PHONE_FRAGMENT_RE = re.compile(r'(?<!\w)\+?\(?\d[\d\s()\-]*\d(?!\w)')
+
+
+def _document(user_id, email, first_name, last_name, phone_number, address):
+    """
+    Собирает колонки индекса для одного пользователя.
+
+    Returns:
+        tuple: (id, email, имя, телефон из одних цифр, адрес)
+    """
+    return (
+        user_id,
+        email,
+        f'{first_name} {last_name}'.strip(),
+        re.sub(r'\D', '', phone_number),
+        address,
+    )
+
+
+def _tsvector_text(email, name, phone, address):
+    """Текст документа PostgreSQL: email разбивается на части для поиска по ним."""
+    return ' '.join((email, re.sub(r'[@.+_-]', ' ', email), name, phone, address))
+
+
+def index_users(queryset):
+    """
+    Добавляет или обновляет пользователей в поисковом индексе.
+
+    Args:
+        queryset (QuerySet): Пользователи для индексации
+    """
+    _write_documents([
+        _document(*row) for row in queryset.order_by().values_list(
+            'pk', 'email', 'first_name', 'last_name', 'phone_number', 'address'
+        )
+    ])
+
+
+def index_user(user):
+    """
+    Добавляет или обновляет одного пользователя без повторного чтения из БД.
+
+    Args:
+        user (CustomUser): Сохраненный пользователь
+    """
+    _write_documents([
+        _document(user.pk, user.email, user.first_name, user.last_name, user.phone_number, user.address)
+    ])
+
+
+def _write_documents(documents):
+    """Записывает документы в таблицу индекса."""
+    if not documents:
+        return
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.executemany(
+                f"INSERT INTO {SEARCH_TABLE} (user_id, document) "
+                f"VALUES (%s, to_tsvector('simple', %s)) "
+                f"ON CONFLICT (user_id) DO UPDATE SET document = EXCLUDED.document",
+                [(doc[0], _tsvector_text(*doc[1:])) for doc in documents]
+            )
+        else:
+            # Виртуальные таблицы FTS5 не поддерживают ON CONFLICT
+            cursor.executemany(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [(doc[0],) for doc in documents])
+            cursor.executemany(
+                f'INSERT INTO {SEARCH_TABLE} (rowid, email, name, phone, address) VALUES (%s, %s, %s, %s, %s)',
+                documents
+            )
+
+
+def unindex_users(user_ids):
+    """
+    Удаляет пользователей из поискового индекса.
+
+    Args:
+        user_ids: Первичные ключи пользователей
+    """
+    column = 'user_id' if connection.vendor == 'postgresql' else 'rowid'
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {SEARCH_TABLE} WHERE {column} = %s', [(pk,) for pk in user_ids])
+
+
+def clear_index():
+    """Удаляет весь поисковый индекс (перед пересборкой)."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+
+
+def optimize_index():
+    """Объединяет сегменты индекса FTS5 после массовой загрузки."""
+    if connection.vendor == 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')")
+
+
+def _normalize_phone_fragment(match):
+    """
+    Приводит похожий на телефон фрагмент к цифрам, как он хранится в индексе.
+
+    Полный номер в любой записи (+7..., 8..., с пробелами и дефисами)
+    становится 7XXXXXXXXXX; часть номера - своими цифрами.
+    """
+    fragment = match.group()
+    try:
+        return normalize_phone(fragment)[1:]
+    except ValueError:
+        # Не номер целиком: числа через пробел остаются отдельными словами
+        return ' '.join(re.sub(r'\D', '', part) for part in fragment.split())
+
+
+def _match_query(query):
+    """
+    Строит поисковый запрос из строки пользователя.
+
+    Каждое слово ищется как фрагмент (FTS5) или как начало слова
+    (PostgreSQL); все слова должны найтись. Номера телефонов приводятся
+    к цифрам, спецсимволы синтаксиса запросов экранируются.
+
+    Returns:
+        str: Запрос или пустая строка, если искать нечего
+    """
+    # Телефон в индексе хранится одними цифрами
+    query = PHONE_FRAGMENT_RE.sub(_normalize_phone_fragment, query)
+    if connection.vendor == 'postgresql':
+        words = re.findall(r'\w+', query)
+        return ' & '.join(f'{word}:*' for word in words)
+    fragments = [word for word in query.split() if len(word) >= MIN_FRAGMENT_LENGTH]
+    return ' '.join('"{}"'.format(fragment.replace('"', '""')) for fragment in fragments)
+
+
+def search_user_ids(query, limit=DEFAULT_LIMIT):
+    """
+    Ищет пользователей по фрагментам email, имени, телефона или адреса.
+
+    Args:
+        query (str): Строка поиска
+        limit (int): Максимальное количество результатов
+
+    Returns:
+        list: Идентификаторы пользователей, самые релевантные первыми
+    """
+    match = _match_query(query)
+    if not match:
+        return []
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                f"SELECT user_id FROM {SEARCH_TABLE}, to_tsquery('simple', %s) AS query "
+                f"WHERE document @@ query ORDER BY ts_rank(document, query) DESC LIMIT %s",
+                [match, limit]
+            )
+        else:
+            cursor.execute(
+                f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s ORDER BY rank LIMIT %s',
+                [match, limit]
+            )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_users(query, limit=DEFAULT_LIMIT):
+    """
+    Ищет пользователей и загружает их одним запросом.
+
+    Args:
+        query (str): Строка поиска
+        limit (int): Максимальное количество результатов
+
+    Returns:
+        list: Пользователи в порядке релевантности
+    """
+    user_ids = search_user_ids(query, limit)
+    users = CustomUser.objects.in_bulk(user_ids)
+    # Пользователь мог быть удален в обход сигналов
+    return [users[pk] for pk in user_ids if pk in users]
@@ -0,0 +1,78 @@
+"""
+Обработчики сигналов приложения accounts.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from .search import INDEXED_FIELDS, index_user, unindex_users
+from .user_cache import invalidate_cached_user
+from .utils import get_client_ip
+
+
+def record_login(sender, request, user, **kwargs):
+    """
+    Записывает время и IP адрес входа одним UPDATE.
+
+    Заменяет стандартный обработчик django.contrib.auth.models.update_last_login,
+    который обновляет только last_login, из-за чего IP приходилось
+    сохранять отдельным запросом.
+
+    Args:
+        sender: Класс пользователя
+        request: HTTP запрос (может быть None при входе без запроса)
+        user: Вошедший пользователь
+    """
+    user.last_login = timezone.now()
+    update_fields = ['last_login']
+    
+    if request is not None:
+        user.last_login_ip = get_client_ip(request)
+        update_fields.append('last_login_ip')
+    
+    user.save(update_fields=update_fields)
+
+
+def invalidate_user_cache(sender, instance, **kwargs):
+    """
+    Удаляет снимок пользователя из кеша после сохранения или удаления.
+
+    Снимок удаляется сразу и еще раз после коммита транзакции: иначе
+    параллельный запрос мог бы закешировать данные, которые еще не
+    зафиксированы.
+
+    Args:
+        sender: Класс пользователя
+        instance: Сохраненный или удаленный пользователь
+    """
+    user_id = instance.pk
+    invalidate_cached_user(user_id)
+    transaction.on_commit(lambda: invalidate_cached_user(user_id))
+
+
+def update_search_index(sender, instance, update_fields=None, **kwargs):
+    """
+    Обновляет пользователя в поисковом индексе после сохранения.
+
+    Сохранения, не затрагивающие индексируемые поля (например, запись
+    last_login при входе), индекс не трогают.
+
+    Args:
+        sender: Класс пользователя
+        instance: Сохраненный пользователь
+        update_fields: Сохраненные поля (None - все поля)
+    """
+    if update_fields is not None and not INDEXED_FIELDS.intersection(update_fields):
+        return
+    index_user(instance)
+
+
+def remove_from_search_index(sender, instance, **kwargs):
+    """
+    Удаляет пользователя из поискового индекса.
+
+    Args:
+        sender: Класс пользователя
+        instance: Удаленный пользователь
+    """
+    unindex_users([instance.pk])
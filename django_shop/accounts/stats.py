@@ -0,0 +1,70 @@
+"""
+Сводная статистика пользователей.
+
+Все счетчики вычисляются одним запросом с условной агрегацией
+(COUNT(...) FILTER (WHERE ...)) и кешируются на короткое время,
+поэтому частые запросы мониторинга не пересчитывают таблицу.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import CustomUser
+
+
+# Ключ кеша и время жизни по умолчанию (секунд)
+STATS_CACHE_KEY = 'accounts:user_stats'
+DEFAULT_STATS_CACHE_TTL = 30
+
+# Группы пользователей: имя счетчика -> условие
+STATUS_BUCKETS = {
+    'active': Q(is_active=True),
+    'inactive': Q(is_active=False),
+    'confirmed': Q(email_confirmed=True),
+    'pending_activation': Q(is_active=False, email_confirmed=False),
+    'staff': Q(is_staff=True),
+    'superusers': Q(is_superuser=True),
+}
+
+
+def compute_user_stats():
+    """
+    Считает все группы пользователей одним запросом.
+
+    Returns:
+        dict: Счетчики групп, общее количество и время расчета
+    """
+    stats = CustomUser.objects.aggregate(
+        total=Count('pk'),
+        **{name: Count('pk', filter=condition) for name, condition in STATUS_BUCKETS.items()}
+    )
+    stats['generated_at'] = timezone.now().isoformat()
+    return stats
+
+
+def get_user_stats(use_cache=True):
+    """
+    Возвращает статистику пользователей, по возможности из кеша.
+
+    Время жизни кеша задается настройкой ACCOUNTS_STATS_CACHE_TTL.
+
+    Args:
+        use_cache (bool): False - всегда пересчитать
+
+    Returns:
+        dict: Счетчики групп пользователей
+    """
+    if not use_cache:
+        return compute_user_stats()
+
+    stats = cache.get(STATS_CACHE_KEY)
+    if stats is None:
+        stats = compute_user_stats()
+        cache.set(
+            STATS_CACHE_KEY,
+            stats,
+            getattr(settings, 'ACCOUNTS_STATS_CACHE_TTL', DEFAULT_STATS_CACHE_TTL)
+        )
+    return stats
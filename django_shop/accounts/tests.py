@@ -6,12 +6,52 @@
 - Менеджера CustomUserManager
 - Представлений (views)
 - Форм регистрации и входа
+- Списка пользователей в админ-панели
+- Фоновых массовых операций над пользователями
+- Поискового индекса пользователей
+- Нормализации номеров телефонов
+- Токенов и ссылок активации
 """
 
-from django.test import TestCase, Client
+import csv
+import json
+import os
+import tempfile
+from importlib import import_module
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.apps import apps as django_apps
+from django.test import TestCase, TransactionTestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.exceptions import ValidationError
+from django.contrib.auth.hashers import PBKDF2SHA1PasswordHasher
+from django.contrib.auth.tokens import default_token_generator
+from django.contrib.sessions.models import Session
+from django.core import mail
+from django.core.cache import cache, caches
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, IntegrityError, connection
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .bulk_jobs import apply_user_action, enqueue_user_job, next_batch_pks, run_pending_jobs
+from .changelist import EstimatedCountPaginator, get_search_mode, search_users_by_prefix
+from .email_templates import ACTIVATION_EMAIL
+from .forms import CustomUserCreationForm, UserProfileForm
+from .mail_log import OUTCOME_ERROR, OUTCOME_SENT, get_mail_log
+from .mail_queue import REDACTED_BODY, claim_batch, enqueue_mail, dispatch_queued_mail
+from .models import BulkUserJob, OutgoingEmail
+from .password_reset import process_password_reset_requests, request_password_reset
+from .search import clear_index, index_users, search_user_ids, search_users
+from .stats import STATS_CACHE_KEY, compute_user_stats, get_user_stats
+from .user_cache import bump_user_cache_generation, get_cached_user
+from .tokens import activation_token_generator, password_reset_token_generator
+from .utils import normalize_phone
 
 # Получаем модель пользователя
 User = get_user_model()
@@ -122,6 +162,50 @@ class CustomUserModelTest(TestCase):
         self.assertTrue(user.can_login())
 
 
+class CaseInsensitiveEmailTest(TestCase):
+    """Тесты для email без учета регистра."""
+    
+    def setUp(self):
+        """Настройка данных для тестов."""
+        self.user = User.objects.create_user(
+            email='Foo@Example.com',
+            password='testpassword123',
+            is_active=True,
+            email_confirmed=True
+        )
+        
+    def test_filter_by_email_ignores_case(self):
+        """Тест поиска пользователя по email в другом регистре."""
+        self.assertEqual(User.objects.filter_by_email('foo@example.COM').get(), self.user)
+        self.assertEqual(User.objects.get_by_natural_key('FOO@example.com'), self.user)
+        
+    def test_registration_rejects_case_variant(self):
+        """Тест: нельзя зарегистрировать тот же email в другом регистре."""
+        form = CustomUserCreationForm(data={
+            'email': 'foo@example.com',
+            'password1': 'Sup3r-Secret-pass',
+            'password2': 'Sup3r-Secret-pass',
+            'terms_accepted': 'on',
+        })
+        
+        self.assertFalse(form.is_valid())
+        self.assertIn('email', form.errors)
+        
+    def test_database_rejects_case_variant(self):
+        """Тест функционального уникального индекса."""
+        with self.assertRaises(IntegrityError):
+            User.objects.create_user(email='foo@example.com', password='testpassword123')
+            
+    def test_login_with_different_case(self):
+        """Тест входа с email в другом регистре."""
+        response = self.client.post(reverse('accounts:login'), {
+            'username': 'FOO@example.com',
+            'password': 'testpassword123',
+        })
+        
+        self.assertEqual(response.status_code, 302)
+
+
 class ViewsTest(TestCase):
     """Тесты для представлений (views)."""
     
@@ -175,3 +259,1389 @@ class ViewsTest(TestCase):
         # Должно перенаправить на главную страницу
         self.assertEqual(response.status_code, 302)
         self.assertRedirects(response, reverse('accounts:home'))
+
+
+class MailQueueTest(TestCase):
+    """Тесты для очереди исходящей почты."""
+    
+    def test_register_enqueues_activation_email(self):
+        """Тест: регистрация ставит письмо в очередь, а не отправляет его."""
+        response = self.client.post(reverse('accounts:register'), {
+            'email': 'new@example.com',
+            'password1': 'Sup3r-Secret-pass',
+            'password2': 'Sup3r-Secret-pass',
+            'terms_accepted': 'on',
+        })
+        
+        self.assertRedirects(response, reverse('accounts:email_confirmation_sent'))
+        self.assertEqual(len(mail.outbox), 0)
+        
+        queued = OutgoingEmail.objects.get()
+        self.assertEqual(queued.to_email, 'new@example.com')
+        self.assertEqual(queued.status, OutgoingEmail.STATUS_PENDING)
+        self.assertIn('/activate/', queued.body)
+        self.assertEqual(queued.template, ACTIVATION_EMAIL.name)
+        self.assertTrue(User.objects.filter(email='new@example.com').exists())
+        
+    def test_dispatch_sends_batch(self):
+        """Тест отправки пачки писем из очереди."""
+        for i in range(3):
+            enqueue_mail('Тема', 'Текст', f'user{i}@example.com', html_message='<p>HTML</p>')
+        
+        sent, failed = dispatch_queued_mail()
+        
+        self.assertEqual((sent, failed), (3, 0))
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(mail.outbox[0].alternatives, [('<p>HTML</p>', 'text/html')])
+        self.assertFalse(OutgoingEmail.objects.exclude(status=OutgoingEmail.STATUS_SENT).exists())
+        
+    @override_settings(MAIL_QUEUE_MAX_ATTEMPTS=2)
+    def test_failed_send_is_retried_with_backoff(self):
+        """Тест повторных попыток при ошибке отправки."""
+        queued = enqueue_mail('Тема', 'Текст', 'user@example.com')
+        
+        with mock.patch('accounts.mail_queue.EmailMultiAlternatives.send', side_effect=OSError('down')):
+            self.assertEqual(dispatch_queued_mail(), (0, 1))
+            queued.refresh_from_db()
+            self.assertEqual(queued.status, OutgoingEmail.STATUS_PENDING)
+            self.assertEqual(queued.attempts, 1)
+            self.assertGreater(queued.next_attempt_at, timezone.now())
+            self.assertIn('down', queued.last_error)
+            
+            # Письмо не отправляется повторно до наступления next_attempt_at
+            self.assertEqual(dispatch_queued_mail(), (0, 0))
+            
+            OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+            self.assertEqual(dispatch_queued_mail(), (0, 1))
+        
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, OutgoingEmail.STATUS_FAILED)
+        self.assertEqual(queued.attempts, 2)
+        
+    def test_claimed_batch_not_taken_twice(self):
+        """Тест: зарезервированные письма не берет другой диспетчер."""
+        for i in range(3):
+            enqueue_mail('Тема', 'Текст', f'user{i}@example.com')
+        
+        self.assertEqual(len(claim_batch(2)), 2)
+        self.assertEqual(len(claim_batch(10)), 1)
+        self.assertEqual(claim_batch(10), [])
+        
+    def test_send_queued_mail_command(self):
+        """Тест management-команды отправки очереди."""
+        enqueue_mail('Тема', 'Текст', 'user@example.com')
+        out = StringIO()
+        
+        call_command('send_queued_mail', stdout=out)
+        
+        self.assertIn('Отправлено: 1', out.getvalue())
+        self.assertEqual(len(mail.outbox), 1)
+
+
+class EmailTemplateTest(TestCase):
+    """Тесты для кешированного рендеринга писем."""
+    
+    def setUp(self):
+        """Сбрасываем кеш шаблонов перед каждым тестом."""
+        ACTIVATION_EMAIL.clear_cache()
+        self.addCleanup(ACTIVATION_EMAIL.clear_cache)
+        self.context = {
+            'user': {'first_name': 'Иван', 'email': 'ivan@example.com'},
+            'activation_link': 'http://testserver/activate/MQ/token/',
+            'site_name': 'Интернет-магазин',
+        }
+        
+    def test_render_matches_render_to_string(self):
+        """Тест: результат совпадает с двумя вызовами render_to_string."""
+        subject, text, html = ACTIVATION_EMAIL.render(self.context)
+        
+        self.assertEqual(subject, 'Подтверждение регистрации в интернет-магазине')
+        self.assertEqual(text, render_to_string('accounts/email/activation_email.txt', self.context))
+        self.assertEqual(html, render_to_string('accounts/email/activation_email.html', self.context))
+        self.assertIn(self.context['activation_link'], text)
+        
+    @override_settings(DEBUG=False)
+    def test_templates_compiled_once_without_debug(self):
+        """Тест: без DEBUG шаблоны компилируются один раз."""
+        self.assertIs(ACTIVATION_EMAIL.get_compiled(), ACTIVATION_EMAIL.get_compiled())
+        
+    @override_settings(DEBUG=True)
+    def test_templates_reloaded_with_debug(self):
+        """Тест: в режиме DEBUG шаблоны перечитываются."""
+        self.assertIsNot(ACTIVATION_EMAIL.get_compiled(), ACTIVATION_EMAIL.get_compiled())
+
+
+class LoginQueriesTest(TestCase):
+    """Тесты для входа в систему с минимальным числом запросов."""
+    
+    def setUp(self):
+        """Настройка данных для тестов."""
+        self.user = User.objects.create_user(
+            email='login@example.com',
+            password='testpassword123',
+            is_active=True,
+            email_confirmed=True
+        )
+        
+    def test_login_touches_users_table_twice(self):
+        """Тест: вход выполняет один SELECT и один UPDATE таблицы пользователей."""
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse('accounts:login'), {
+                'username': 'login@example.com',
+                'password': 'testpassword123',
+            })
+        
+        self.assertEqual(response.status_code, 302)
+        user_queries = [q['sql'] for q in ctx.captured_queries if 'accounts_customuser' in q['sql']]
+        self.assertEqual(len(user_queries), 2)
+        self.assertTrue(user_queries[0].startswith('SELECT'))
+        self.assertTrue(user_queries[1].startswith('UPDATE'))
+        
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
+        self.assertEqual(self.user.last_login_ip, '127.0.0.1')
+        
+    def test_login_with_wrong_password(self):
+        """Тест входа с неверным паролем."""
+        response = self.client.post(reverse('accounts:login'), {
+            'username': 'login@example.com',
+            'password': 'wrong-password',
+        })
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Неверный email или пароль')
+        self.assertNotIn('_auth_user_id', self.client.session)
+        
+    def test_login_unconfirmed_email(self):
+        """Тест входа с неподтвержденным email."""
+        User.objects.filter(pk=self.user.pk).update(email_confirmed=False)
+        
+        response = self.client.post(reverse('accounts:login'), {
+            'username': 'login@example.com',
+            'password': 'testpassword123',
+        })
+        
+        self.assertContains(response, 'Ваш email адрес не подтвержден')
+
+
+class PasswordRehashTest(TestCase):
+    """Тесты прозрачного перехеширования пароля при входе."""
+    
+    def setUp(self):
+        """Создаем пользователя с хешем текущего профиля."""
+        self.user = User.objects.create_user(
+            email='rehash@example.com',
+            password='testpassword123',
+            is_active=True,
+            email_confirmed=True
+        )
+        
+    def login(self):
+        """Вход через форму входа."""
+        return self.client.post(reverse('accounts:login'), {
+            'username': 'rehash@example.com',
+            'password': 'testpassword123',
+        })
+        
+    def test_rehash_on_hasher_change(self):
+        """Тест: при смене предпочтительного хешера пароль перехешируется."""
+        hashers = ['django.contrib.auth.hashers.ScryptPasswordHasher'] + settings.PASSWORD_HASHERS
+        
+        with override_settings(PASSWORD_HASHERS=hashers):
+            self.assertEqual(self.login().status_code, 302)
+            
+            self.user.refresh_from_db()
+            self.assertTrue(self.user.password.startswith('scrypt$'))
+            self.assertTrue(self.user.check_password('testpassword123'))
+        
+    def test_legacy_django_hashes_accepted(self):
+        """Тест: хеши стандартных хешеров Django проверяются и перехешируются при входе."""
+        encoded = PBKDF2SHA1PasswordHasher().encode('testpassword123', 'legacysalt', iterations=1000)
+        User.objects.filter(pk=self.user.pk).update(password=encoded)
+        
+        self.assertEqual(self.login().status_code, 302)
+        
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$'))
+        
+    def test_rehash_on_iterations_change(self):
+        """Тест: при изменении PBKDF2_ITERATIONS пароль перехешируется."""
+        with override_settings(PBKDF2_ITERATIONS=1000):
+            self.assertEqual(self.login().status_code, 302)
+            
+            self.user.refresh_from_db()
+            self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+
+
+@skipUnless(connection.vendor in ('sqlite', 'postgresql'), 'EXPLAIN разбирается только для SQLite и PostgreSQL')
+class IndexUsageTest(TestCase):
+    """
+    Регрессионный тест индексов CustomUser.
+    
+    Заполняет таблицу пользователями (по умолчанию 20 000, для проверки
+    на объеме живой базы - переменная окружения ACCOUNTS_EXPLAIN_ROWS,
+    например 1000000) и проверяет через EXPLAIN, что частые запросы
+    не читают таблицу или индекс целиком.
+    """
+    
+    ROWS = int(os.environ.get('ACCOUNTS_EXPLAIN_ROWS', 20_000))
+    
+    @classmethod
+    def setUpTestData(cls):
+        """Заполняем таблицу одним INSERT ... SELECT на стороне базы."""
+        table = User._meta.db_table
+        columns = (
+            'password, is_superuser, email, first_name, last_name, phone_number, address, '
+            'is_active, is_staff, email_confirmed, date_joined'
+        )
+        # Распределение как в живой базе: 5% ожидают активации, 0.1% сотрудники
+        if connection.vendor == 'sqlite':
+            sql = f'''
+                WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < %s)
+                INSERT INTO {table} ({columns})
+                SELECT '!', 0, 'user' || n || '@example.com', '', '', '', '',
+                       n % 20 != 0, n % 1000 = 0, n % 20 != 0,
+                       datetime('2020-01-01', '+' || (n * 60) || ' seconds')
+                FROM seq
+            '''
+        else:
+            sql = f'''
+                INSERT INTO {table} ({columns})
+                SELECT '!', false, 'user' || n || '@example.com', '', '', '', '',
+                       n % 20 != 0, n % 1000 = 0, n % 20 != 0,
+                       timestamp '2020-01-01' + n * interval '1 minute'
+                FROM generate_series(1, %s) AS n
+            '''
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [cls.ROWS])
+            cursor.execute('ANALYZE')
+            
+    def assertUsesIndex(self, run_query):
+        """
+        Проверяет, что все запросы к таблице пользователей используют индекс.
+        
+        Args:
+            run_query: Функция, выполняющая проверяемый запрос
+        """
+        table = User._meta.db_table
+        partial_indexes = {index.name for index in User._meta.indexes if index.condition is not None}
+        with CaptureQueriesContext(connection) as ctx:
+            run_query()
+        
+        for query in ctx.captured_queries:
+            # executemany, SAVEPOINT и запросы к другим таблицам не проверяются
+            if f'"{table}"' not in query['sql']:
+                continue
+            with connection.cursor() as cursor:
+                if connection.vendor == 'sqlite':
+                    cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                    plan = [row[3] for row in cursor.fetchall()]
+                    # SCAN ... USING COVERING INDEX тоже читает все строки (весь индекс),
+                    # если индекс не частичный, а чтение не ограничено LIMIT
+                    # (ограниченный подсчет EstimatedCountPaginator)
+                    covering_scan = f'SCAN {table} USING COVERING INDEX '
+                    bounded = ' LIMIT ' in query['sql']
+                    full_scans = [
+                        line for line in plan
+                        if line == f'SCAN {table}' or (
+                            line.startswith(covering_scan) and not bounded
+                            and line[len(covering_scan):] not in partial_indexes
+                        )
+                    ]
+                else:
+                    cursor.execute('EXPLAIN ' + query['sql'])
+                    plan = [row[0] for row in cursor.fetchall()]
+                    full_scans = [line for line in plan if f'Seq Scan on {table}' in line]
+            
+            self.assertFalse(full_scans, f"Полное сканирование таблицы:\n{query['sql']}\n{plan}")
+            
+    def test_status_counts(self):
+        """
+        Тест подсчетов малых групп пользователей.
+        
+        Счетчики всей таблицы и больших групп (активные, подтвержденные)
+        индекс не ускоряет: их считает get_user_stats одним проходом
+        с кешированием результата.
+        """
+        self.assertUsesIndex(lambda: User.objects.filter(is_active=False).count())
+        self.assertUsesIndex(lambda: User.objects.filter(is_staff=True).count())
+        with self.assertNumQueries(1):
+            compute_user_stats()
+        
+    def test_default_ordering(self):
+        """Тест сортировки по умолчанию (-date_joined) со срезом, как в админке."""
+        self.assertUsesIndex(lambda: list(User.objects.all()[:100]))
+        self.assertUsesIndex(lambda: list(User.objects.filter(is_active=False)[:5]))
+        
+    def test_admin_list_filters(self):
+        """Тест фильтров list_filter админ-панели."""
+        self.assertUsesIndex(lambda: list(User.objects.filter(is_staff=True)[:100]))
+        self.assertUsesIndex(lambda: list(User.objects.filter(is_active=True, email_confirmed=True)[:100]))
+        
+    def test_phone_lookup(self):
+        """Тест поиска по номеру телефона."""
+        self.assertUsesIndex(lambda: User.objects.filter_by_phone('8 (999) 123-45-67').exists())
+        
+    def test_email_lookup(self):
+        """Тест поиска по email без учета регистра при входе и регистрации."""
+        self.assertUsesIndex(lambda: User.objects.filter_by_email('USER5@Example.com').exists())
+        self.assertUsesIndex(lambda: User.objects.get_by_natural_key('User5@example.com'))
+        
+    def test_pending_activation(self):
+        """Тест выборки пользователей, ожидающих активации."""
+        self.assertUsesIndex(lambda: list(User.objects.filter(is_active=False, email_confirmed=False)[:100]))
+        self.assertUsesIndex(lambda: User.objects.filter(is_active=False, email_confirmed=False).count())
+        
+    def test_password_reset_lookup(self):
+        """Тест поиска пользователей пачки запросов восстановления пароля."""
+        for email in ('USER21@example.com', 'nobody@example.com'):
+            request_password_reset(email, 'http://testserver')
+        self.assertUsesIndex(process_password_reset_requests)
+        
+    def test_purge_unconfirmed_users(self):
+        """Тест выборки и удаления пачек в purge_unconfirmed_users."""
+        # Под удаление попадают регистрации первых суток (около 70 пользователей)
+        days = (timezone.now() - timezone.make_aware(datetime(2020, 1, 2))).days
+        self.assertUsesIndex(lambda: call_command(
+            'purge_unconfirmed_users', '--days', str(days), '--batch-size', '50', '--sleep', '0', stdout=StringIO()
+        ))
+        
+    def test_admin_changelist(self):
+        """Тест списка пользователей в админ-панели: страница, поиск и фильтр."""
+        admin = User.objects.create_superuser(email='admin@example.com', password='adminpassword123')
+        self.client.force_login(admin)
+        url = reverse('admin:accounts_customuser_changelist')
+        
+        for params in ({}, {'q': 'USER12'}, {'q': 'user12', 'is_staff__exact': '1'}, {'p': '3'}):
+            with self.subTest(params=params):
+                self.assertUsesIndex(lambda: self.assertEqual(self.client.get(url, params).status_code, 200))
+
+
+@override_settings(PBKDF2_ITERATIONS=1000)
+class UserImportExportTest(TestCase):
+    """Тесты для команд import_users и export_users."""
+    
+    def setUp(self):
+        """Создаем временную директорию для файлов."""
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp_dir = tmp.name
+        
+    def write_file(self, name, content):
+        """Записывает файл во временную директорию и возвращает путь."""
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+        
+    def test_import_csv(self):
+        """Тест импорта CSV с хешированием паролей в пуле процессов."""
+        path = self.write_file('users.csv', (
+            'email,password,first_name,is_active,email_confirmed,date_joined\n'
+            'anna@example.com,secret-1,Анна,true,true,2019-05-01T10:00:00+03:00\n'
+            'boris@example.com,secret-2,Борис,0,0,\n'
+            'not-an-email,secret-3,,,,\n'
+        ))
+        out, err = StringIO(), StringIO()
+        
+        call_command('import_users', path, '--workers', '2', stdout=out, stderr=err)
+        
+        self.assertIn('Создано: 2', out.getvalue())
+        self.assertIn('с ошибками: 1', out.getvalue())
+        anna = User.objects.get(email='anna@example.com')
+        self.assertTrue(anna.check_password('secret-1'))
+        self.assertTrue(anna.is_active and anna.email_confirmed)
+        self.assertEqual(anna.date_joined.year, 2019)
+        self.assertFalse(User.objects.get(email='boris@example.com').is_active)
+        
+    def test_import_conflicts(self):
+        """Тест обработки существующих email (без учета регистра)."""
+        User.objects.create_user(email='anna@example.com', password='old-password', first_name='Старое')
+        path = self.write_file('users.jsonl', (
+            '{"email": "ANNA@example.com", "password": "new-password", "first_name": "Новое"}\n'
+        ))
+        
+        call_command('import_users', path, '--workers', '0', stdout=StringIO())
+        self.assertEqual(User.objects.get().first_name, 'Старое')
+        
+        call_command('import_users', path, '--workers', '0', '--on-conflict', 'update', stdout=StringIO())
+        user = User.objects.get()
+        self.assertEqual(user.first_name, 'Новое')
+        self.assertTrue(user.check_password('new-password'))
+        
+    def test_concurrent_registration_counted_as_skipped(self):
+        """Тест: строка, отброшенная ignore_conflicts, не считается созданной."""
+        from accounts.management.commands.import_users import Command
+        path = self.write_file('users.csv', (
+            'email,password\n'
+            'anna@example.com,secret-1\n'
+            'boris@example.com,secret-2\n'
+        ))
+        hash_passwords = Command.hash_passwords
+        
+        def register_between_steps(command, batch):
+            # Регистрация после проверки существующих email, до вставки
+            hash_passwords(command, batch)
+            User.objects.create_user(email='Boris@example.com', password='own-password')
+        
+        out = StringIO()
+        with mock.patch.object(Command, 'hash_passwords', register_between_steps):
+            call_command('import_users', path, '--workers', '0', stdout=out)
+        
+        self.assertIn('Создано: 1, обновлено: 0, пропущено: 1', out.getvalue())
+        self.assertTrue(User.objects.get(email__iexact='boris@example.com').check_password('own-password'))
+        
+    def test_partial_update_keeps_missing_fields(self):
+        """Тест: обновление из файла с частью колонок не трогает остальные поля."""
+        user = User.objects.create_user(
+            email='anna@example.com', password='old-password', first_name='Старое',
+            last_name='Иванова', is_active=True, email_confirmed=True
+        )
+        path = self.write_file('users.csv', 'email,first_name\nanna@example.com,Новое\n')
+        
+        call_command('import_users', path, '--workers', '0', '--on-conflict', 'update', stdout=StringIO())
+        
+        updated = User.objects.get()
+        self.assertEqual(updated.first_name, 'Новое')
+        self.assertEqual(updated.last_name, 'Иванова')
+        self.assertEqual(updated.password, user.password)
+        self.assertTrue(updated.is_active and updated.email_confirmed)
+        
+    def test_export_import_round_trip(self):
+        """Тест: выгрузка загружается обратно с теми же хешами паролей."""
+        user = User.objects.create_user(
+            email='anna@example.com',
+            password='secret',
+            first_name='Анна',
+            is_active=True,
+            email_confirmed=True
+        )
+        
+        for fmt in ('users.csv', 'users.jsonl'):
+            path = os.path.join(self.tmp_dir, fmt)
+            call_command('export_users', '-o', path, stderr=StringIO())
+            User.objects.all().delete()
+            
+            call_command('import_users', path, '--workers', '0', stdout=StringIO())
+            
+            imported = User.objects.get()
+            self.assertEqual(imported.password, user.password)
+            self.assertEqual(imported.first_name, 'Анна')
+            self.assertEqual(imported.date_joined, user.date_joined)
+            self.assertTrue(imported.email_confirmed)
+
+
+class UserStatusCommandTest(TestCase):
+    """Тесты для команды user_status."""
+    
+    def setUp(self):
+        """Настройка данных для тестов."""
+        User.objects.create_user(email='active@example.com', password='x', is_active=True, email_confirmed=True)
+        User.objects.create_user(email='pending@example.com', password='x')
+        User.objects.create_superuser(email='admin@example.com', password='x')
+        
+    def run_report(self, *args):
+        """Запускает команду и возвращает ее вывод."""
+        out = StringIO()
+        call_command('user_status', *args, stdout=out, stderr=StringIO())
+        return out.getvalue()
+        
+    def test_table_report(self):
+        """Тест табличного отчета по всем пользователям."""
+        output = self.run_report()
+        
+        self.assertIn('email_confirmed', output.splitlines()[0])
+        for email in ('active@example.com', 'pending@example.com', 'admin@example.com'):
+            self.assertIn(email, output)
+            
+    def test_filters_and_jsonl(self):
+        """Тест фильтров и формата JSONL."""
+        rows = [json.loads(line) for line in self.run_report('--pending', '--format', 'jsonl').splitlines()]
+        
+        self.assertEqual([row['email'] for row in rows], ['pending@example.com'])
+        self.assertIs(rows[0]['is_active'], False)
+        
+        rows = list(csv.DictReader(StringIO(self.run_report('--staff', '--format', 'csv'))))
+        self.assertEqual([row['email'] for row in rows], ['admin@example.com'])
+        
+    def test_reads_only_report_columns(self):
+        """Тест: из таблицы пользователей читаются только колонки отчета."""
+        with CaptureQueriesContext(connection) as ctx:
+            self.run_report('--format', 'csv')
+        
+        sql = ctx.captured_queries[-1]['sql']
+        self.assertNotIn('"address"', sql)
+        self.assertNotIn('"password"', sql)
+
+
+class UserStatsTest(TestCase):
+    """Тесты для сводной статистики пользователей."""
+    
+    def setUp(self):
+        """Настройка данных для тестов."""
+        cache.delete(STATS_CACHE_KEY)
+        self.addCleanup(cache.delete, STATS_CACHE_KEY)
+        User.objects.create_user(email='active@example.com', password='x', is_active=True, email_confirmed=True)
+        User.objects.create_user(email='pending@example.com', password='x')
+        self.admin = User.objects.create_superuser(email='admin@example.com', password='adminpassword123')
+        
+    def test_stats_in_one_query(self):
+        """Тест: все счетчики считаются одним запросом."""
+        with self.assertNumQueries(1):
+            stats = get_user_stats(use_cache=False)
+        
+        self.assertEqual(stats['total'], 3)
+        self.assertEqual(stats['active'], 2)
+        self.assertEqual(stats['inactive'], 1)
+        self.assertEqual(stats['pending_activation'], 1)
+        self.assertEqual(stats['staff'], 1)
+        
+    def test_stats_are_cached(self):
+        """Тест кеширования статистики."""
+        get_user_stats()
+        
+        with self.assertNumQueries(0):
+            self.assertEqual(get_user_stats()['total'], 3)
+            
+    def test_endpoint_requires_staff(self):
+        """Тест: анонимный пользователь не получает статистику."""
+        response = self.client.get(reverse('accounts:user_stats'))
+        self.assertEqual(response.status_code, 403)
+        
+    def test_endpoint_for_staff(self):
+        """Тест JSON ответа для сотрудника."""
+        self.client.login(email='admin@example.com', password='adminpassword123')
+        
+        response = self.client.get(reverse('accounts:user_stats'))
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total'], 3)
+        
+    @override_settings(ACCOUNTS_STATS_TOKEN='scrape-token')
+    def test_endpoint_with_token(self):
+        """Тест доступа сборщика метрик по токену."""
+        url = reverse('accounts:user_stats')
+        
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer scrape-token').status_code, 200)
+
+
+
+class MailDispatchTransactionTest(TransactionTestCase):
+    """Тест: письма отправляются вне транзакции БД."""
+    
+    def test_send_outside_transaction(self):
+        """Тест: во время отправки транзакция не открыта и регистрация не блокируется."""
+        enqueue_mail('Тема', 'Текст', 'user@example.com')
+        in_transaction = []
+        
+        def send(message):
+            in_transaction.append(connection.in_atomic_block)
+            return 1
+        
+        with mock.patch('accounts.mail_queue.EmailMultiAlternatives.send', autospec=True, side_effect=send):
+            self.assertEqual(dispatch_queued_mail(), (1, 0))
+        
+        self.assertEqual(in_transaction, [False])
+        self.assertEqual(OutgoingEmail.objects.get().status, OutgoingEmail.STATUS_SENT)
+
+class MailLogTest(TestCase):
+    """Тесты журнала отправленных писем и команды email_monitor."""
+    
+    def setUp(self):
+        """Подключение журналирующего бэкенда с журналом во временном каталоге."""
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        override = override_settings(
+            EMAIL_BACKEND='accounts.mail_backends.RecordingEmailBackend',
+            EMAIL_RECORDER_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+            EMAIL_LOG_PATH=os.path.join(tmp_dir.name, 'email_log.sqlite3'),
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        
+    def test_dispatch_records_sent_mail(self):
+        """Тест: письма из очереди попадают в журнал вместе с шаблоном."""
+        enqueue_mail('Тема', 'Текст', 'user@example.com', template='activation')
+        
+        self.assertEqual(dispatch_queued_mail(), (1, 0))
+        
+        self.assertEqual(len(mail.outbox), 1)
+        [entry] = get_mail_log().read_since(0)
+        self.assertEqual(entry['recipient'], 'user@example.com')
+        self.assertEqual(entry['template'], 'activation')
+        self.assertEqual(entry['outcome'], OUTCOME_SENT)
+        self.assertGreater(entry['size'], 0)
+        
+    def test_send_error_is_recorded(self):
+        """Тест: ошибка внутреннего бэкенда записывается и пробрасывается дальше."""
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages',
+            side_effect=OSError('down')
+        ):
+            with self.assertRaises(OSError):
+                mail.send_mail('Тема', 'Текст', None, ['user@example.com'])
+        
+        [entry] = get_mail_log().read_since(0)
+        self.assertEqual(entry['outcome'], OUTCOME_ERROR)
+        self.assertIn('down', entry['error'])
+        self.assertEqual(get_mail_log().summary(0)['errors'], 1)
+        
+    def test_monitor_once(self):
+        """Тест однократного вывода команды email_monitor."""
+        mail.send_mail('Тема', 'Текст', None, ['user@example.com'])
+        out = StringIO()
+        
+        call_command('email_monitor', '--once', stdout=out)
+        
+        output = out.getvalue()
+        self.assertIn('user@example.com', output)
+        self.assertIn('писем 1', output)
+
+
+class SessionStoreTest(TestCase):
+    """Тесты кешируемого хранилища сессий."""
+    
+    def setUp(self):
+        """Создание пользователя и очистка кеша сессий."""
+        caches['sessions'].clear()
+        self.user = User.objects.create_user(
+            email='test@example.com',
+            password='testpassword123',
+            is_active=True,
+            email_confirmed=True
+        )
+        
+    def test_session_read_does_not_query_db(self):
+        """Тест: сессия авторизованного пользователя читается из кеша."""
+        self.client.login(email='test@example.com', password='testpassword123')
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('accounts:profile'))
+            
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([q for q in queries.captured_queries if 'django_session' in q['sql']])
+        
+    def test_purge_expired_sessions(self):
+        """Тест пакетного удаления истекших сессий."""
+        now = timezone.now()
+        Session.objects.bulk_create(
+            [Session(session_key=f'expired{i}', session_data='', expire_date=now - timedelta(days=1)) for i in range(5)]
+            + [Session(session_key='alive', session_data='', expire_date=now + timedelta(days=1))]
+        )
+        out = StringIO()
+        
+        call_command('purge_expired_sessions', '--batch-size', '2', stdout=out)
+        
+        self.assertIn('Удалено истекших сессий: 5', out.getvalue())
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['alive'])
+
+
+class UserCacheTest(TestCase):
+    """Тесты кеша пользователей для AuthenticationMiddleware."""
+    
+    def setUp(self):
+        """Создание пользователя и очистка кешей."""
+        cache.clear()
+        caches['sessions'].clear()
+        self.user = User.objects.create_user(
+            email='test@example.com',
+            password='testpassword123',
+            first_name='Иван',
+            is_active=True,
+            email_confirmed=True
+        )
+        self.client.login(email='test@example.com', password='testpassword123')
+        
+    def user_queries(self, url):
+        """Запрашивает страницу и возвращает запросы к таблице пользователей."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [q for q in queries.captured_queries if User._meta.db_table in q['sql']]
+        
+    def test_pages_served_from_cache(self):
+        """Тест: повторные запросы не обращаются к таблице пользователей."""
+        self.client.get(reverse('accounts:profile'))
+        
+        self.assertEqual(self.user_queries(reverse('accounts:home')), [])
+        # Адрес не входит в снимок и читается только на странице, где он нужен
+        queries = self.user_queries(reverse('accounts:profile'))
+        self.assertEqual(len(queries), 1)
+        self.assertIn('"accounts_customuser"."address" FROM', queries[0]['sql'])
+        
+    def test_password_hash_not_cached(self):
+        """Тест: хеш пароля не хранится в снимке, сессия проверяется без него."""
+        self.client.get(reverse('accounts:home'))
+        
+        user = get_cached_user(self.user.pk)
+        self.assertIn('password', user.get_deferred_fields())
+        with self.assertNumQueries(0):
+            self.assertEqual(user.get_session_auth_hash(), self.user.get_session_auth_hash())
+            
+    def test_set_password_resets_session_hash(self):
+        """Тест: после смены пароля хеш сессии вычисляется по новому паролю."""
+        user = get_cached_user(self.user.pk)
+        old_hash = user.get_session_auth_hash()
+        
+        user.set_password('freshpassword456')
+        
+        self.assertNotEqual(user.get_session_auth_hash(), old_hash)
+        self.assertEqual(user.get_session_auth_hash(), User(password=user.password).get_session_auth_hash())
+        
+    def test_save_invalidates_snapshot(self):
+        """Тест: сохранение пользователя сбрасывает снимок."""
+        self.client.get(reverse('accounts:profile'))
+        self.user.first_name = 'Петр'
+        self.user.save()
+        
+        response = self.client.get(reverse('accounts:profile'))
+        
+        self.assertContains(response, 'Петр')
+        
+    def test_bulk_update_with_generation_bump(self):
+        """Тест: массовое изменение со сменой поколения разлогинивает пользователя."""
+        self.client.get(reverse('accounts:profile'))
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        bump_user_cache_generation()
+        
+        response = self.client.get(reverse('accounts:profile'))
+        
+        self.assertEqual(response.status_code, 302)
+        
+    def test_deferred_fields_load_lazily(self):
+        """Тест: поля вне снимка загружаются из БД при обращении."""
+        User.objects.filter(pk=self.user.pk).update(date_of_birth='1990-01-01')
+        
+        user = get_cached_user(self.user.pk)
+        
+        self.assertIn('date_of_birth', user.get_deferred_fields())
+        self.assertEqual(str(user.date_of_birth), '1990-01-01')
+
+
+class AdminChangelistTest(TestCase):
+    """Тесты поиска и пагинации в списке пользователей админ-панели."""
+    
+    def setUp(self):
+        """Создание пользователей и администратора."""
+        for email in ('Alice@example.com', 'alina@example.com', 'bob@example.com', 'malice@example.com'):
+            User.objects.create_user(email=email, password='testpassword123')
+        self.admin = User.objects.create_superuser(email='admin@example.com', password='adminpassword123')
+        
+    def search(self, term):
+        """Возвращает email найденных пользователей."""
+        return sorted(search_users_by_prefix(User.objects.all(), term).values_list('email', flat=True))
+        
+    def test_prefix_search(self):
+        """Тест: поиск по началу email без учета регистра, но не по подстроке."""
+        self.assertEqual(self.search('ALI'), ['Alice@example.com', 'alina@example.com'])
+        self.assertEqual(self.search('alice'), ['Alice@example.com'])
+        self.assertEqual(self.search('lice'), [])
+        self.assertEqual(self.search(str(self.admin.pk)), ['admin@example.com'])
+        
+    def test_trigram_mode_requires_postgresql(self):
+        """Тест: без PostgreSQL триграммный поиск заменяется поиском по префиксу."""
+        with self.settings(ACCOUNTS_ADMIN_SEARCH='trigram'):
+            expected = 'trigram' if connection.vendor == 'postgresql' else 'prefix'
+            self.assertEqual(get_search_mode(), expected)
+        with self.settings(ACCOUNTS_ADMIN_SEARCH='fulltext'):
+            with self.assertRaises(ValueError):
+                get_search_mode()
+                
+    def test_estimated_count(self):
+        """Тест: большая таблица не считается COUNT(*), выборки ограничиваются."""
+        with self.settings(ACCOUNTS_ADMIN_EXACT_COUNT_LIMIT=2):
+            paginator = EstimatedCountPaginator(User.objects.all(), 2)
+            self.assertEqual(paginator.count, User.objects.order_by('pk').last().pk)
+            
+            paginator = EstimatedCountPaginator(User.objects.filter(is_active=False), 2)
+            self.assertEqual(paginator.count, 2)
+            
+    def test_changelist_search(self):
+        """Тест: список пользователей ищет по префиксу и не выполняет COUNT по всей таблице."""
+        self.client.force_login(self.admin)
+        
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('admin:accounts_customuser_changelist'), {'q': 'bob'})
+            
+        self.assertContains(response, 'bob@example.com')
+        self.assertNotContains(response, 'alina@example.com')
+        self.assertFalse([q for q in ctx.captured_queries if q['sql'].startswith('SELECT COUNT(*) AS')])
+
+
+@override_settings(ACCOUNTS_BULK_INLINE_LIMIT=3, ACCOUNTS_BULK_PAUSE=0)
+class BulkUserJobTest(TestCase):
+    """Тесты массовых действий админ-панели над пользователями."""
+    
+    def setUp(self):
+        """Создание неактивных пользователей и администратора."""
+        User.objects.bulk_create([
+            User(email=f'user{i}@example.com', password='!') for i in range(10)
+        ])
+        self.admin = User.objects.create_superuser(email='admin@example.com', password='adminpassword123')
+        
+    def test_small_selection_applied_immediately(self):
+        """Тест: небольшая выборка изменяется без очереди."""
+        updated, job = apply_user_action(
+            BulkUserJob.ACTION_ACTIVATE, {'email__in': ['user1@example.com', 'user2@example.com']}
+        )
+        
+        self.assertEqual((updated, job), (2, None))
+        self.assertEqual(User.objects.filter(is_active=True).count(), 3)
+        
+    def test_large_selection_runs_in_batches(self):
+        """Тест: большая выборка выполняется задачей по пачкам с прогрессом."""
+        updated, job = apply_user_action(BulkUserJob.ACTION_ACTIVATE, {'is_active': False}, created_by=self.admin)
+        self.assertIsNone(updated)
+        self.assertEqual(job.progress, 0)
+        self.assertFalse(User.objects.filter(is_active=True).exclude(pk=self.admin.pk).exists())
+        
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(run_pending_jobs(batch_size=4), (1, 10))
+            
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed, job.progress), (BulkUserJob.STATUS_DONE, 10, 100))
+        self.assertEqual(User.objects.filter(is_active=False).count(), 0)
+        # Три пачки по 4, 4 и 2 пользователя - три отдельных UPDATE
+        updates = [q for q in ctx.captured_queries if q['sql'].startswith(f'UPDATE "{User._meta.db_table}"')]
+        self.assertEqual(len(updates), 3)
+        
+    def test_interrupted_job_resumes(self):
+        """Тест: задача продолжается с последнего обработанного id."""
+        _, job = apply_user_action(BulkUserJob.ACTION_CONFIRM_EMAIL)
+        middle = User.objects.order_by('pk')[4].pk
+        BulkUserJob.objects.filter(pk=job.pk).update(last_pk=middle)
+        
+        run_pending_jobs(batch_size=100)
+        
+        self.assertFalse(User.objects.filter(email_confirmed=False, pk__gt=middle).exists())
+        self.assertFalse(User.objects.filter(email_confirmed=True, pk__lte=middle).exists())
+        
+    def test_selection_stored_as_criteria(self):
+        """Тест: в задаче сохраняются условия выборки, а пачки идут по ключу."""
+        pks = list(User.objects.exclude(pk=self.admin.pk).order_by('pk').values_list('pk', flat=True))
+        chosen = pks[1:5] + pks[7:8]
+        User.objects.filter(pk__in=chosen).update(first_name='Выбран')
+        
+        with self.assertNumQueries(2):
+            job = enqueue_user_job(BulkUserJob.ACTION_CONFIRM_EMAIL, {'first_name': 'Выбран'}, 'user')
+        job.refresh_from_db()
+        self.assertEqual((job.filters, job.search, job.max_pk), ({'first_name': 'Выбран'}, 'user', self.admin.pk))
+        
+        self.assertEqual(next_batch_pks(job, 2), chosen[:2])
+        job.last_pk = chosen[3]
+        self.assertEqual(next_batch_pks(job, 2), chosen[4:])
+        
+        run_pending_jobs(batch_size=2)
+        
+        self.assertEqual(set(User.objects.filter(email_confirmed=True).values_list('pk', flat=True)), set(chosen))
+        
+    def test_users_created_after_enqueue_excluded(self):
+        """Тест: пользователи, созданные после постановки задачи, не изменяются."""
+        _, job = apply_user_action(BulkUserJob.ACTION_ACTIVATE, {'is_active': False})
+        late = User.objects.create_user(email='late@example.com', password='testpassword123')
+        
+        run_pending_jobs(batch_size=4)
+        
+        late.refresh_from_db()
+        self.assertFalse(late.is_active)
+        self.assertEqual(User.objects.filter(is_active=False).count(), 1)
+        
+    def test_admin_action_enqueues_job(self):
+        """Тест: действие «выбрать все» в админ-панели ставит задачу в очередь."""
+        self.client.force_login(self.admin)
+        
+        response = self.client.post(reverse('admin:accounts_customuser_changelist'), {
+            'action': 'make_staff',
+            'select_across': '1',
+            '_selected_action': [self.admin.pk],
+        }, follow=True)
+        
+        job = BulkUserJob.objects.get()
+        self.assertContains(response, f'задача №{job.pk}')
+        self.assertEqual((job.filters, job.search), ({}, ''))
+        self.assertEqual(job.created_by, self.admin)
+        self.assertEqual(User.objects.filter(is_staff=True).count(), 1)
+        
+        response = self.client.get(reverse('admin:accounts_bulkuserjob_changelist'))
+        self.assertContains(response, '0%')
+        
+    def test_admin_action_keeps_changelist_filters(self):
+        """Тест: «выбрать все» в отфильтрованном списке сохраняет фильтры и поиск списка."""
+        self.client.force_login(self.admin)
+        url = reverse('admin:accounts_customuser_changelist') + '?is_active__exact=0&q=user&o=1'
+        
+        self.client.post(url, {
+            'action': 'confirm_emails',
+            'select_across': '1',
+            '_selected_action': [User.objects.get(email='user1@example.com').pk],
+        })
+        
+        job = BulkUserJob.objects.get()
+        self.assertEqual((job.filters, job.search), ({'is_active__exact': '0'}, 'user'))
+        run_pending_jobs()
+        self.assertEqual(User.objects.filter(email_confirmed=True).count(), 10)
+        self.assertFalse(User.objects.get(pk=self.admin.pk).email_confirmed)
+
+
+
+@override_settings(ACCOUNTS_UNCONFIRMED_USER_MAX_AGE=30 * 24 * 60 * 60)
+class PurgeUnconfirmedUsersTest(TestCase):
+    """Тесты команды purge_unconfirmed_users."""
+    
+    def setUp(self):
+        """Создание старых и новых регистраций с разными статусами."""
+        old = timezone.now() - timedelta(days=40)
+        User.objects.bulk_create([
+            User(email=f'stale{i}@example.com', password='!', date_joined=old) for i in range(5)
+        ])
+        self.recent = User.objects.create_user(email='recent@example.com', password='testpassword123')
+        self.disabled = User.objects.create_user(email='disabled@example.com', password='testpassword123')
+        self.staff = User.objects.create_user(email='staff@example.com', password='testpassword123', is_staff=True)
+        User.objects.filter(pk=self.disabled.pk).update(email_confirmed=True, date_joined=old)
+        User.objects.filter(pk=self.staff.pk).update(date_joined=old)
+        index_users(User.objects.all())
+        
+    def purge(self, *args):
+        """Запускает команду и возвращает ее вывод."""
+        out = StringIO()
+        call_command('purge_unconfirmed_users', '--sleep', '0', *args, stdout=out)
+        return out.getvalue()
+        
+    def test_purges_stale_registrations_in_batches(self):
+        """Тест: удаляются только старые неподтвержденные регистрации."""
+        output = self.purge('--batch-size', '2')
+        
+        self.assertIn('Удалено неактивированных пользователей: 5 (3 пачек', output)
+        self.assertEqual(
+            set(User.objects.values_list('email', flat=True)),
+            {'recent@example.com', 'disabled@example.com', 'staff@example.com'}
+        )
+        # Удаленные пользователи убраны и из поискового индекса
+        self.assertEqual(search_user_ids('stale'), [])
+        
+    def test_dry_run_deletes_nothing(self):
+        """Тест: --dry-run только считает пользователей."""
+        self.assertIn('Будет удалено пользователей: 5', self.purge('--dry-run'))
+        self.assertEqual(User.objects.count(), 8)
+        
+    def test_age_shorter_than_link_rejected(self):
+        """Тест: нельзя удалить пользователей с еще действующей ссылкой."""
+        with self.assertRaises(CommandError):
+            self.purge('--days', '1')
+        self.assertEqual(User.objects.count(), 8)
+
+class UserSearchTest(TestCase):
+    """Тесты поискового индекса пользователей."""
+    
+    def setUp(self):
+        """Создание пользователей с заполненным профилем."""
+        self.ivan = User.objects.create_user(
+            email='ivan.petrov@example.com',
+            password='testpassword123',
+            first_name='Иван',
+            last_name='Петров',
+            phone_number='+79991234567',
+            address='Москва, ул. Ленина, 1'
+        )
+        self.anna = User.objects.create_user(
+            email='anna@shop.test',
+            password='testpassword123',
+            first_name='Анна',
+            last_name='Смирнова',
+            phone_number='79217654321'
+        )
+        
+    def search(self, query):
+        """Возвращает email найденных пользователей."""
+        return [user.email for user in search_users(query)]
+        
+    def test_search_by_phone_in_any_notation(self):
+        """Тест: номер в любой записи находит пользователя."""
+        for query in ('+79991234567', '89991234567', '8 999 123-45-67', '+7 (999) 123-45-67', '123-45-67'):
+            with self.subTest(query=query):
+                self.assertEqual(self.search(query), ['ivan.petrov@example.com'])
+        
+    def test_search_by_fragments(self):
+        """Тест: поиск по фрагментам email, имени, телефона и адреса."""
+        self.assertEqual(self.search('petrov'), ['ivan.petrov@example.com'])
+        self.assertEqual(self.search('петр'), ['ivan.petrov@example.com'])
+        self.assertEqual(self.search('7654'), ['anna@shop.test'])
+        self.assertEqual(self.search('ленина'), ['ivan.petrov@example.com'])
+        self.assertEqual(self.search('анна смирн'), ['anna@shop.test'])
+        self.assertEqual(self.search('ab'), [])
+        self.assertEqual(self.search('"unknown'), [])
+        
+    def test_index_follows_changes(self):
+        """Тест: индекс обновляется при изменении и удалении пользователя."""
+        self.anna.last_name = 'Кузнецова'
+        self.anna.save()
+        self.assertEqual(self.search('кузнец'), ['anna@shop.test'])
+        self.assertEqual(self.search('смирнова'), [])
+        
+        self.anna.delete()
+        self.assertEqual(self.search('кузнец'), [])
+        
+    def test_rebuild_command(self):
+        """Тест: команда пересобирает очищенный индекс."""
+        clear_index()
+        self.assertEqual(self.search('petrov'), [])
+        out = StringIO()
+        
+        call_command('rebuild_user_search', batch_size=1, stdout=out)
+        
+        self.assertEqual(self.search('petrov'), ['ivan.petrov@example.com'])
+        self.assertIn('Проиндексировано пользователей: 2', out.getvalue())
+        
+    def test_search_endpoint(self):
+        """Тест: JSON-поиск доступен только сотрудникам."""
+        url = reverse('accounts:user_search')
+        
+        self.assertEqual(self.client.get(url, {'q': 'petrov'}).status_code, 403)
+        
+        staff = User.objects.create_user(
+            email='support@example.com', password='testpassword123', is_staff=True, is_active=True
+        )
+        self.client.force_login(staff)
+        response = self.client.get(url, {'q': '1234567'})
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['email'] for row in response.json()['results']], ['ivan.petrov@example.com'])
+        self.assertEqual(self.client.get(url, {'q': 'x', 'limit': 'all'}).status_code, 400)
+        
+    @skipUnless(connection.vendor == 'sqlite', 'FTS5 используется только на SQLite')
+    def test_migration_requires_trigram_tokenizer(self):
+        """Тест: на SQLite без токенизатора trigram миграция индекса падает с понятной ошибкой."""
+        migration = import_module('accounts.migrations.0009_user_search_index')
+        migration.check_sqlite_fts5(connection)
+        
+        with mock.patch.object(connection.Database, 'sqlite_version_info', (3, 31, 1)):
+            with self.assertRaisesMessage(ImproperlyConfigured, 'SQLite 3.34.0 или новее'):
+                migration.check_sqlite_fts5(connection)
+
+
+class PhoneNumberTest(TestCase):
+    """Тесты хранения номеров телефонов в формате E.164."""
+    
+    def test_normalize_phone(self):
+        """Тест: разные записи номера приводятся к одному виду."""
+        for phone in ('+7 (999) 123-45-67', '89991234567', '79991234567', '9991234567'):
+            self.assertEqual(normalize_phone(phone), '+79991234567')
+        self.assertEqual(normalize_phone(''), '')
+        for phone in ('+89991234567', '12345', '+1 999 123 4567', '7999abc4567'):
+            with self.assertRaises(ValueError):
+                normalize_phone(phone)
+                
+    def test_saved_and_queried_in_e164(self):
+        """Тест: номер сохраняется в E.164 и находится по любой записи."""
+        user = User.objects.create_user(email='phone@example.com', password='x', phone_number='8 999 123-45-67')
+        
+        self.assertEqual(user.phone_number, '+79991234567')
+        self.assertEqual(User.objects.get_by_phone('79991234567'), user)
+        self.assertTrue(User.objects.filter(phone_number='89991234567').exists())
+        self.assertFalse(User.objects.filter_by_phone('123').exists())
+        self.assertFalse(User.objects.filter_by_phone('').exists())
+        
+    def test_forms_normalize_phone(self):
+        """Тест: формы регистрации и профиля сохраняют номер в E.164."""
+        form = CustomUserCreationForm(data={
+            'email': 'new@example.com',
+            'phone_number': '8 (921) 765-43-21',
+            'password1': 'ComplexPass123!',
+            'password2': 'ComplexPass123!',
+            'terms_accepted': True,
+        })
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.cleaned_data['phone_number'], '+79217654321')
+        
+        user = form.save()
+        form = UserProfileForm(data={'phone_number': '+7 921 000 11 22'}, instance=user)
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.save().phone_number, '+79210001122')
+        
+        form = CustomUserCreationForm(data={'email': 'bad@example.com', 'phone_number': '+1 555 0100'})
+        self.assertIn('phone_number', form.errors)
+        
+    def test_backfill_migration(self):
+        """Тест: миграция приводит старые номера к E.164 и не трогает неразборчивые."""
+        migration = import_module('accounts.migrations.0010_phone_number_e164')
+        first = User.objects.create_user(email='old1@example.com', password='x')
+        second = User.objects.create_user(email='old2@example.com', password='x')
+        # Старые значения записываются в обход нормализации
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {User._meta.db_table} SET phone_number = CASE id WHEN %s THEN %s ELSE %s END',
+                [first.pk, '89991234567', 'не указан']
+            )
+            
+        with mock.patch.object(migration, 'BATCH_SIZE', 1):
+            migration.normalize_phone_numbers(django_apps, connection.schema_editor())
+            
+        self.assertEqual(User.objects.get(pk=first.pk).phone_number, '+79991234567')
+        self.assertEqual(User.objects.get(pk=second.pk).phone_number, 'не указан')
+        self.assertEqual([user.pk for user in search_users('79991234567')], [first.pk])
+
+
+class ActivationTokenTest(TestCase):
+    """Тесты подписанных ссылок активации."""
+    
+    def setUp(self):
+        """Создание пользователя, ожидающего активации."""
+        self.user = User.objects.create_user(email='pending@example.com', password='testpassword123')
+        
+    def activation_url(self, user=None, **overrides):
+        """Ссылка активации (части можно подменить)."""
+        kwargs = activation_token_generator.make_link_args(user or self.user)
+        kwargs.update(overrides)
+        return reverse('accounts:activate', kwargs=kwargs)
+        
+    def test_valid_link_activates(self):
+        """Тест: действительная ссылка активирует аккаунт одним UPDATE."""
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.activation_url())
+        
+        self.assertTemplateUsed(response, 'accounts/activation_success.html')
+        self.assertFalse(response.context['already_activated'])
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertTrue(ctx.captured_queries[0]['sql'].startswith('UPDATE'))
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_active and self.user.email_confirmed)
+        
+    def test_repeated_link_is_idempotent(self):
+        """Тест: повторный переход по ссылке ничего не пишет и показывает успех."""
+        url = self.activation_url()
+        self.client.get(url)
+        
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+            
+        self.assertTemplateUsed(response, 'accounts/activation_success.html')
+        self.assertTrue(response.context['already_activated'])
+        # Неудачный условный UPDATE и проверка существования, без повторной записи
+        self.assertEqual(len(ctx.captured_queries), 2)
+        
+    def test_deleted_user_link_invalid(self):
+        """Тест: ссылка удаленного пользователя недействительна."""
+        url = self.activation_url()
+        self.user.delete()
+        
+        self.assertTemplateUsed(self.client.get(url), 'accounts/activation_invalid.html')
+        
+    def test_invalid_links_rejected_without_queries(self):
+        """Тест: поддельные, чужие и просроченные ссылки не обращаются к БД."""
+        other = User.objects.create_user(email='other@example.com', password='testpassword123')
+        valid = activation_token_generator.make_link_args(self.user)
+        urls = [
+            self.activation_url(token='garbage'),
+            self.activation_url(token=valid['token'][:-1] + 'x'),
+            self.activation_url(uidb64=activation_token_generator.make_link_args(other)['uidb64']),
+            self.activation_url(token='x' * 500),
+        ]
+        
+        for url in urls:
+            with self.subTest(url=url), self.assertNumQueries(0):
+                response = self.client.get(url)
+            self.assertTemplateUsed(response, 'accounts/activation_invalid.html')
+            
+        with self.settings(ACCOUNTS_ACTIVATION_TOKEN_MAX_AGE=-1), self.assertNumQueries(0):
+            self.client.get(self.activation_url())
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        
+    def test_legacy_link(self):
+        """Тест: ссылки старого формата принимаются, пока это разрешено."""
+        kwargs = {
+            'uidb64': activation_token_generator.make_link_args(self.user)['uidb64'],
+            'token': default_token_generator.make_token(self.user),
+        }
+        url = reverse('accounts:activate', kwargs=kwargs)
+        
+        with self.settings(ACCOUNTS_LEGACY_ACTIVATION_TOKENS=False):
+            self.assertTemplateUsed(self.client.get(url), 'accounts/activation_invalid.html')
+        self.assertTemplateUsed(self.client.get(url), 'accounts/activation_success.html')
+        
+    def test_link_does_not_reactivate_disabled_account(self):
+        """Тест: ссылка не включает аккаунт, отключенный после подтверждения."""
+        self.client.get(self.activation_url())
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        
+        response = self.client.get(self.activation_url())
+        
+        self.assertTrue(response.context['already_activated'])
+        
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+
+
+@override_settings(PBKDF2_ITERATIONS=1000)
+class PasswordResetTest(TestCase):
+    """Тесты восстановления пароля через очередь."""
+    
+    def setUp(self):
+        """Создание подтвержденного пользователя и сброс ограничения частоты писем."""
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='Reset@example.com', password='oldpassword123', is_active=True, email_confirmed=True
+        )
+        
+    def request_reset(self, email):
+        """Отправляет форму запроса и возвращает (ответ, выполненные запросы)."""
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse('accounts:password_reset'), {'email': email})
+        return response, [query['sql'] for query in ctx.captured_queries]
+        
+    def reset_link(self):
+        """Ссылка восстановления из последнего отправленного письма или письма в очереди."""
+        body = mail.outbox[-1].body if mail.outbox else OutgoingEmail.objects.latest('pk').body
+        return next(line for line in body.splitlines() if 'password-reset-confirm' in line)
+        
+    def test_response_does_not_depend_on_account(self):
+        """Тест: для известного и неизвестного адреса ответ и запросы одинаковы."""
+        known, known_queries = self.request_reset('reset@example.com')
+        unknown, unknown_queries = self.request_reset('nobody@example.com')
+        
+        self.assertRedirects(known, reverse('accounts:password_reset_done'))
+        self.assertRedirects(unknown, reverse('accounts:password_reset_done'))
+        self.assertEqual(len(known_queries), 1)
+        self.assertEqual(len(unknown_queries), 1)
+        self.assertTrue(known_queries[0].startswith('INSERT INTO "accounts_passwordresetrequest"'))
+        # Письма ставит в очередь только фоновая команда
+        self.assertFalse(OutgoingEmail.objects.exists())
+        
+    def test_worker_queues_mail_once_per_interval(self):
+        """Тест: письмо получает только существующий пользователь, повторы подавляются."""
+        for email in ('RESET@example.com', 'nobody@example.com', 'reset@example.com'):
+            self.request_reset(email)
+            
+        self.assertEqual(process_password_reset_requests(), (1, 2))
+        self.assertEqual(process_password_reset_requests(), (0, 0))
+        
+        # Ограничение хранится в БД и не зависит от кеша процесса
+        cache.clear()
+        self.request_reset('reset@example.com')
+        self.assertEqual(process_password_reset_requests(), (0, 1))
+        
+        queued = OutgoingEmail.objects.get()
+        self.assertEqual((queued.to_email, queued.template), ('Reset@example.com', 'password_reset'))
+        self.assertTrue(self.reset_link().startswith('http://testserver/password-reset-confirm/'))
+        
+    def test_rollback_releases_throttle(self):
+        """Тест: при откате транзакции запрос остается, а ограничение частоты не срабатывает."""
+        self.request_reset('reset@example.com')
+        
+        with mock.patch('accounts.password_reset.enqueue_mail', side_effect=DatabaseError('сбой')):
+            with self.assertRaises(DatabaseError):
+                process_password_reset_requests()
+                
+        self.assertEqual(process_password_reset_requests(), (1, 0))
+        self.assertEqual(OutgoingEmail.objects.count(), 1)
+        
+    def test_unconfirmed_user_gets_no_mail(self):
+        """Тест: пользователь с неподтвержденным email письмо не получает."""
+        User.objects.filter(pk=self.user.pk).update(email_confirmed=False)
+        self.request_reset('reset@example.com')
+        
+        self.assertEqual(process_password_reset_requests(), (0, 1))
+        
+    def test_link_sets_password_once(self):
+        """Тест: ссылка проверяется по хешу пароля и срабатывает один раз."""
+        self.request_reset('reset@example.com')
+        call_command('send_queued_mail', stdout=StringIO())
+        link = self.reset_link()
+        
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(link)
+        self.assertTrue(response.context['validlink'])
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertIn('SELECT "accounts_customuser"."password" FROM', ctx.captured_queries[0]['sql'])
+        
+        response = self.client.post(link, {'new_password1': 'freshpassword456', 'new_password2': 'freshpassword456'})
+        self.assertRedirects(response, reverse('accounts:password_reset_complete'))
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('freshpassword456'))
+        
+        response = self.client.get(link)
+        self.assertFalse(response.context['validlink'])
+        
+    def test_sent_mail_body_is_redacted(self):
+        """Тест: после отправки ссылка не хранится в очереди и не видна в админ-панели."""
+        self.request_reset('reset@example.com')
+        call_command('send_queued_mail', stdout=StringIO())
+        link = self.reset_link()
+        
+        queued = OutgoingEmail.objects.get()
+        self.assertEqual(queued.status, OutgoingEmail.STATUS_SENT)
+        self.assertEqual((queued.body, queued.html_body), (REDACTED_BODY, ''))
+        
+        self.client.force_login(User.objects.create_superuser(email='admin@example.com', password='x'))
+        response = self.client.get(reverse('admin:accounts_outgoingemail_change', args=[queued.pk]))
+        self.assertNotContains(response, 'name="body"')
+        self.assertNotContains(response, link)
+        
+    def test_invalid_link_rejected_without_queries(self):
+        """Тест: поддельная ссылка и токен активации не обращаются к БД."""
+        links = (
+            password_reset_token_generator.make_link_args(self.user) | {'token': 'forged:token:value'},
+            activation_token_generator.make_link_args(self.user),
+        )
+        for kwargs in links:
+            with self.subTest(kwargs=kwargs), self.assertNumQueries(0):
+                response = self.client.get(reverse('accounts:password_reset_confirm', kwargs=kwargs))
+                self.assertFalse(response.context['validlink'])
+
+
+@override_settings(PBKDF2_ITERATIONS=1000)
+class EditProfileTest(TestCase):
+    """Тесты редактирования профиля."""
+    
+    def setUp(self):
+        """Создание пользователя с заполненным профилем и вход."""
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='profile@example.com', password='testpassword123', is_active=True, email_confirmed=True,
+            first_name='Иван', last_name='Петров', phone_number='+79991234567', address='Москва'
+        )
+        self.client.force_login(self.user)
+        self.url = reverse('accounts:edit_profile')
+        
+    def post_profile(self, **changes):
+        """Отправляет форму с текущими данными и изменениями; возвращает UPDATE запросы."""
+        data = {
+            'first_name': 'Иван', 'last_name': 'Петров', 'phone_number': '+79991234567',
+            'address': 'Москва', 'date_of_birth': '',
+        }
+        data.update(changes)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(self.url, data)
+        self.assertRedirects(response, reverse('accounts:profile'), fetch_redirect_response=False)
+        return [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE "accounts_customuser"')]
+        
+    def test_form_is_rendered(self):
+        """Тест: форма заполнена текущими данными."""
+        response = self.client.get(self.url)
+        
+        self.assertContains(response, 'value="Петров"')
+        
+    def test_unchanged_form_skips_write(self):
+        """Тест: без изменений (в том числе номер в другой записи) запроса UPDATE нет."""
+        self.assertEqual(self.post_profile(phone_number='8 (999) 123-45-67'), [])
+        
+    def test_only_changed_fields_written(self):
+        """Тест: UPDATE содержит только измененное поле, снимок в кеше сброшен."""
+        get_cached_user(self.user.pk)
+        
+        updates = self.post_profile(address='Санкт-Петербург, Невский пр., 1')
+        
+        self.assertEqual(len(updates), 1)
+        self.assertIn('SET "address" =', updates[0])
+        self.assertNotIn('"first_name"', updates[0])
+        self.assertEqual(get_cached_user(self.user.pk).address, 'Санкт-Петербург, Невский пр., 1')
+        
+    def test_invalid_form_not_saved(self):
+        """Тест: форма с ошибкой не сохраняется."""
+        response = self.client.post(self.url, {'first_name': 'Иван', 'phone_number': '12345'})
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].errors)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.last_name, 'Петров')
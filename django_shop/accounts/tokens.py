@@ -0,0 +1,218 @@
+"""
+Токены ссылок активации аккаунта и восстановления пароля.
+
+Токен - подпись HMAC (django.core.signing.TimestampSigner) над id
+пользователя и временем выдачи. Подпись и срок действия проверяются
+без обращения к БД, поэтому случайные и просроченные ссылки (например,
+от ботов, перебирающих адреса) отклоняются без единого запроса.
+
+Ссылка имеет прежний вид /activate/<uidb64>/<token>/, где token -
+"<время>:<подпись>". Одноразовость обеспечивает условный UPDATE
+при активации (см. accounts.views.activate).
+
+Токен восстановления пароля дополнительно подписывает отпечаток хеша
+пароля: после смены пароля ссылка перестает действовать. Для проверки
+читается только колонка password пользователя.
+"""
+
+import re
+
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core import signing
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+from .models import CustomUser
+
+
+# Ограничение длины частей ссылки: длинные строки отбрасываются до HMAC
+MAX_UIDB64_LENGTH = 24
+MAX_TOKEN_LENGTH = 100
+
+# Вид токенов default_token_generator (ссылки, выданные до перехода на подписи)
+LEGACY_TOKEN_RE = re.compile(r'^[0-9a-z]{1,13}-[0-9a-f]{20,64}$')
+
+
+class ActivationTokenGenerator:
+    """
+    Выдает и проверяет подписанные токены активации.
+
+    Attributes:
+        salt (str): Соль подписи (токены не подходят для других подписей проекта)
+    """
+
+    salt = 'accounts.tokens.activation'
+
+    def _signer(self):
+        """Подписывающий объект (ключ берется из текущих настроек)."""
+        return signing.TimestampSigner(salt=self.salt)
+
+    def get_max_age(self):
+        """Срок действия токена в секундах."""
+        return getattr(settings, 'ACCOUNTS_ACTIVATION_TOKEN_MAX_AGE', settings.PASSWORD_RESET_TIMEOUT)
+
+    def make_link_args(self, user):
+        """
+        Возвращает части ссылки активации для пользователя.
+
+        Args:
+            user (CustomUser): Пользователь
+
+        Returns:
+            dict: Аргументы маршрута accounts:activate (uidb64, token)
+        """
+        uidb64 = urlsafe_base64_encode(force_bytes(user.pk))
+        signed = self._signer().sign(uidb64)
+        return {'uidb64': uidb64, 'token': signed[len(uidb64) + 1:]}
+
+    def make_token(self, user):
+        """
+        Создает токен активации.
+
+        Args:
+            user (CustomUser): Пользователь
+
+        Returns:
+            str: Токен для ссылки вместе с uidb64 пользователя
+        """
+        return self.make_link_args(user)['token']
+
+    def _unsign(self, uidb64, token):
+        """
+        Проверяет подпись и срок действия ссылки.
+
+        Returns:
+            str: Подписанное значение или None, если ссылка недействительна
+        """
+        if len(uidb64) > MAX_UIDB64_LENGTH or len(token) > MAX_TOKEN_LENGTH:
+            return None
+        try:
+            return self._signer().unsign(f'{uidb64}:{token}', max_age=self.get_max_age())
+        except signing.BadSignature:
+            return None
+
+    def check_token(self, uidb64, token):
+        """
+        Проверяет подпись и срок действия токена без обращения к БД.
+
+        Args:
+            uidb64 (str): Закодированный id пользователя из ссылки
+            token (str): Токен из ссылки
+
+        Returns:
+            int: id пользователя или None, если ссылка недействительна
+        """
+        value = self._unsign(uidb64, token)
+        if value is None:
+            return None
+        return _decode_uid(value)
+
+
+class PasswordResetTokenGenerator(ActivationTokenGenerator):
+    """
+    Выдает и проверяет одноразовые токены восстановления пароля.
+
+    В подпись входит отпечаток текущего хеша пароля, поэтому ссылка
+    перестает действовать, как только пароль изменен (в том числе
+    по этой же ссылке).
+    """
+
+    salt = 'accounts.tokens.password_reset'
+
+    def get_max_age(self):
+        """Срок действия токена в секундах."""
+        return settings.PASSWORD_RESET_TIMEOUT
+
+    def get_fingerprint(self, password_hash):
+        """Короткий отпечаток хеша пароля (сам хеш в ссылку не попадает)."""
+        return salted_hmac(self.salt, password_hash, algorithm='sha256').hexdigest()[:16]
+
+    def make_link_args(self, user):
+        """
+        Возвращает части ссылки восстановления пароля для пользователя.
+
+        Args:
+            user (CustomUser): Пользователь (нужен его текущий хеш пароля)
+
+        Returns:
+            dict: Аргументы маршрута accounts:password_reset_confirm (uidb64, token)
+        """
+        uidb64 = urlsafe_base64_encode(force_bytes(user.pk))
+        signed = self._signer().sign(f'{uidb64}:{self.get_fingerprint(user.password)}')
+        return {'uidb64': uidb64, 'token': signed[len(uidb64) + 1:]}
+
+    def check_token(self, uidb64, token):
+        """
+        Проверяет токен и то, что пароль с момента выдачи не менялся.
+
+        Подпись проверяется без БД; для действительной подписи читается
+        только хеш пароля активного пользователя.
+
+        Args:
+            uidb64 (str): Закодированный id пользователя из ссылки
+            token (str): Токен из ссылки
+
+        Returns:
+            tuple: (id пользователя, текущий хеш пароля) или None,
+                если ссылка недействительна или уже использована
+        """
+        value = self._unsign(uidb64, token)
+        if value is None:
+            return None
+        uidb64, _, fingerprint = value.rpartition(':')
+        user_id = _decode_uid(uidb64)
+        if user_id is None:
+            return None
+
+        password = (
+            CustomUser.objects
+            .filter(pk=user_id, is_active=True)
+            .values_list('password', flat=True)
+            .first()
+        )
+        if password is None or not constant_time_compare(self.get_fingerprint(password), fingerprint):
+            return None
+        return user_id, password
+
+
+def _decode_uid(uidb64):
+    """Декодирует id пользователя из ссылки (None для некорректных строк)."""
+    try:
+        return int(urlsafe_base64_decode(uidb64))
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def check_legacy_token(uidb64, token):
+    """
+    Проверяет токен старого формата (default_token_generator).
+
+    Такая проверка требует загрузки пользователя, поэтому выполняется
+    только для строк нужного вида и пока включена настройка
+    ACCOUNTS_LEGACY_ACTIVATION_TOKENS.
+
+    Args:
+        uidb64 (str): Закодированный id пользователя из ссылки
+        token (str): Токен из ссылки
+
+    Returns:
+        int: id пользователя или None, если ссылка недействительна
+    """
+    if not getattr(settings, 'ACCOUNTS_LEGACY_ACTIVATION_TOKENS', False):
+        return None
+    if len(uidb64) > MAX_UIDB64_LENGTH or not LEGACY_TOKEN_RE.match(token):
+        return None
+
+    try:
+        user = CustomUser.objects.get(pk=int(urlsafe_base64_decode(uidb64)))
+    except (TypeError, ValueError, OverflowError, CustomUser.DoesNotExist):
+        return None
+    if default_token_generator.check_token(user, token):
+        return user.pk
+    return None
+
+
+activation_token_generator = ActivationTokenGenerator()
+password_reset_token_generator = PasswordResetTokenGenerator()
@@ -39,4 +39,10 @@ urlpatterns = [
     path('password-reset-confirm/<uidb64>/<token>/', views.password_reset_confirm, name='password_reset_confirm'),
     path('password-reset-done/', views.password_reset_done, name='password_reset_done'),
     path('password-reset-complete/', views.password_reset_complete, name='password_reset_complete'),
+    
+    # Статистика пользователей для мониторинга (JSON)
+    path('api/user-stats/', views.user_stats, name='user_stats'),
+    
+    # Поиск пользователей для службы поддержки (JSON)
+    path('api/users/search/', views.user_search, name='user_search'),
 ]
@@ -0,0 +1,141 @@
+"""
+Кеш пользователей для AuthenticationMiddleware.
+
+EmailBackend.get_user вызывается на каждом запросе авторизованного
+пользователя. Вместо полной строки CustomUser в кеше хранится компактный
+снимок - только поля из SNAPSHOT_FIELDS. Остальные поля (например,
+address или date_of_birth) становятся отложенными и загружаются из БД
+только при обращении к ним. Хеш пароля в кеш не попадает: для проверки
+сессии в снимке хранится уже вычисленный хеш сессии
+(get_session_auth_hash).
+
+Снимок удаляется из кеша при сохранении или удалении пользователя
+(сигналы post_save/post_delete). Массовые изменения без сигналов
+(QuerySet.update, bulk_update) должны вызывать invalidate_cached_users()
+для измененных строк или bump_user_cache_generation(), которая разом
+делает недействительными все снимки. Время жизни снимка
+ограничено ACCOUNTS_USER_CACHE_TTL: при кеше в памяти процесса (locmem)
+изменения из другого процесса видны не позже, чем через это время.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from .models import CustomUser
+
+
+# Значение по умолчанию, если оно не задано в settings.py (секунд)
+DEFAULT_USER_CACHE_TTL = 60
+
+# Поля снимка: то, что нужно шаблонам каждой страницы и проверке прав
+SNAPSHOT_FIELDS = (
+    'id',
+    'last_login',
+    'is_superuser',
+    'email',
+    'first_name',
+    'last_name',
+    'phone_number',
+    'is_active',
+    'is_staff',
+    'email_confirmed',
+    'date_joined',
+)
+
+# Model.from_db ожидает значения в порядке полей модели
+_SNAPSHOT_ATTNAMES = tuple(
+    field.attname for field in CustomUser._meta.concrete_fields
+    if field.attname in SNAPSHOT_FIELDS
+)
+
+# Версия формата снимка: меняется вместе с SNAPSHOT_FIELDS
+SNAPSHOT_VERSION = 2
+
+GENERATION_CACHE_KEY = 'accounts:user_cache:generation'
+
+
+def _get_generation():
+    """Возвращает текущее поколение кеша пользователей."""
+    generation = cache.get(GENERATION_CACHE_KEY)
+    if generation is None:
+        # Начинаем с текущего времени, чтобы после вытеснения ключа
+        # из кеша поколения не повторялись
+        cache.add(GENERATION_CACHE_KEY, time.time_ns(), timeout=None)
+        generation = cache.get(GENERATION_CACHE_KEY, 0)
+    return generation
+
+
+def _snapshot_key(user_id, generation):
+    """Ключ кеша снимка пользователя."""
+    return f'accounts:user:{SNAPSHOT_VERSION}:{generation}:{user_id}'
+
+
+def get_cached_user(user_id):
+    """
+    Возвращает пользователя из кеша или загружает его снимок из БД.
+
+    Args:
+        user_id: Первичный ключ пользователя
+
+    Returns:
+        CustomUser: Пользователь (поля вне SNAPSHOT_FIELDS, в том числе
+            пароль, отложены) или None, если он не найден
+    """
+    key = _snapshot_key(user_id, _get_generation())
+    snapshot = cache.get(key)
+    if snapshot is not None:
+        values, session_auth_hash = snapshot
+        user = CustomUser.from_db(DEFAULT_DB_ALIAS, _SNAPSHOT_ATTNAMES, values)
+        user._session_auth_hash = session_auth_hash
+        return user
+
+    # Пароль читается тем же запросом только для вычисления хеша сессии
+    row = (
+        CustomUser._default_manager
+        .filter(pk=user_id)
+        .values_list(*_SNAPSHOT_ATTNAMES, 'password')
+        .first()
+    )
+    if row is None:
+        return None
+    values = row[:-1]
+    session_auth_hash = CustomUser(password=row[-1]).get_session_auth_hash()
+    cache.set(key, (values, session_auth_hash), getattr(settings, 'ACCOUNTS_USER_CACHE_TTL', DEFAULT_USER_CACHE_TTL))
+
+    user = CustomUser.from_db(DEFAULT_DB_ALIAS, _SNAPSHOT_ATTNAMES, values)
+    user._session_auth_hash = session_auth_hash
+    return user
+
+
+def invalidate_cached_user(user_id):
+    """
+    Удаляет снимок одного пользователя из кеша.
+
+    Args:
+        user_id: Первичный ключ пользователя
+    """
+    cache.delete(_snapshot_key(user_id, _get_generation()))
+
+
+def invalidate_cached_users(user_ids):
+    """
+    Удаляет из кеша снимки нескольких пользователей одним обращением.
+
+    Args:
+        user_ids: Первичные ключи пользователей
+    """
+    generation = _get_generation()
+    cache.delete_many([_snapshot_key(user_id, generation) for user_id in user_ids])
+
+
+def bump_user_cache_generation():
+    """Делает недействительными снимки всех пользователей."""
+    try:
+        cache.incr(GENERATION_CACHE_KEY)
+    except ValueError:
+        # Ключа еще нет (или он вытеснен): новое поколение и так начнется
+        # с текущего времени
+        cache.set(GENERATION_CACHE_KEY, time.time_ns(), timeout=None)
@@ -0,0 +1,169 @@
+"""
+Потоковое чтение и запись пользователей в форматах CSV и JSONL.
+
+Используется командами import_users и export_users. Записи читаются
+и пишутся по одной, поэтому расход памяти не зависит от размера файла.
+"""
+
+import csv
+import json
+from datetime import datetime
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+# Поддерживаемые форматы файлов
+FORMATS = ('csv', 'jsonl')
+
+# Форматы отчетов: таблица для чтения человеком плюс машинные форматы
+REPORT_FORMATS = ('table',) + FORMATS
+
+# Поля, которые выгружаются export_users и понимает import_users.
+# Пароль выгружается в виде хеша: при импорте он сохраняется как есть.
+USER_EXPORT_FIELDS = (
+    'email',
+    'password_hash',
+    'first_name',
+    'last_name',
+    'phone_number',
+    'address',
+    'date_of_birth',
+    'is_active',
+    'email_confirmed',
+    'date_joined',
+)
+
+# Значения, которые считаются истиной в булевых колонках CSV
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'on', 'да'}
+
+
+def guess_format(path):
+    """
+    Определяет формат файла по расширению.
+
+    Args:
+        path (str): Путь к файлу
+
+    Returns:
+        str: 'jsonl' для .jsonl/.ndjson, иначе 'csv'
+    """
+    if path.endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    return 'csv'
+
+
+def read_records(stream, fmt):
+    """
+    Читает записи из потока по одной.
+
+    Args:
+        stream: Текстовый поток
+        fmt (str): Формат ('csv' или 'jsonl')
+
+    Yields:
+        tuple: (номер строки, словарь с полями записи)
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+    else:
+        for line_num, line in enumerate(stream, start=1):
+            line = line.strip()
+            if line:
+                yield line_num, json.loads(line)
+
+
+def write_records(stream, fmt, fields, rows):
+    """
+    Пишет кортежи значений в поток по одному.
+
+    Args:
+        stream: Текстовый поток
+        fmt (str): Формат ('table', 'csv' или 'jsonl')
+        fields (tuple): Названия колонок
+        rows: Итератор кортежей значений в порядке fields
+
+    Returns:
+        int: Количество записанных строк
+    """
+    count = 0
+    if fmt == 'table':
+        # Ширина колонок фиксирована, чтобы не буферизовать строки
+        widths = [TABLE_COLUMN_WIDTHS.get(field, 12) for field in fields]
+        stream.write(_table_line(fields, widths))
+        stream.write('  '.join('-' * width for width in widths) + '\n')
+        for row in rows:
+            stream.write(_table_line([_to_table_text(value) for value in row], widths))
+            count += 1
+    elif fmt == 'csv':
+        writer = csv.writer(stream)
+        writer.writerow(fields)
+        for row in rows:
+            writer.writerow(['' if value is None else _to_text(value) for value in row])
+            count += 1
+    else:
+        for row in rows:
+            stream.write(json.dumps(dict(zip(fields, row)), ensure_ascii=False, default=_to_text) + '\n')
+            count += 1
+    return count
+
+
+# Ширина колонок табличного формата
+TABLE_COLUMN_WIDTHS = {
+    'email': 36,
+    'date_joined': 16,
+    'is_active': 9,
+    'email_confirmed': 15,
+    'is_staff': 8,
+}
+
+
+def _table_line(values, widths):
+    """Форматирует одну строку таблицы."""
+    return '  '.join(str(value).ljust(width) for value, width in zip(values, widths)).rstrip() + '\n'
+
+
+def _to_table_text(value):
+    """Преобразует значение для табличного вывода."""
+    if isinstance(value, bool):
+        return 'да' if value else 'нет'
+    if isinstance(value, datetime):
+        return timezone.localtime(value).strftime('%Y-%m-%d %H:%M')
+    return '' if value is None else str(value)
+
+
+def _to_text(value):
+    """Преобразует значение в строку (даты - в ISO 8601 с микросекундами)."""
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def parse_bool(value, default=False):
+    """
+    Разбирает булево значение из CSV или JSON.
+
+    Args:
+        value: Строка, bool или None
+        default (bool): Значение для пустой ячейки
+
+    Returns:
+        bool: Разобранное значение
+    """
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+def parse_optional_date(value):
+    """Разбирает дату (YYYY-MM-DD) или возвращает None для пустого значения."""
+    return parse_date(value) if value else None
+
+
+def parse_optional_datetime(value):
+    """Разбирает дату и время в ISO 8601 или возвращает None."""
+    return parse_datetime(value) if value else None
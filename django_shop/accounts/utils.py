@@ -0,0 +1,53 @@
+"""
+Вспомогательные функции приложения accounts.
+"""
+
+
+def get_client_ip(request):
+    """
+    Получение IP адреса клиента.
+    
+    Args:
+        request: HTTP запрос
+        
+    Returns:
+        str: IP адрес клиента
+    """
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if x_forwarded_for:
+        ip = x_forwarded_for.split(',')[0]
+    else:
+        ip = request.META.get('REMOTE_ADDR')
+    return ip
+
+
+def normalize_phone(phone):
+    """
+    Приводит российский номер телефона к формату E.164 (+7XXXXXXXXXX).
+    
+    Принимает номера вида +79991234567, 79991234567, 89991234567
+    и 9991234567 с любыми пробелами, скобками и дефисами.
+    
+    Args:
+        phone (str): Номер телефона в произвольной записи
+        
+    Returns:
+        str: Номер в формате E.164 или пустая строка для пустого номера
+        
+    Raises:
+        ValueError: Если номер не похож на российский
+    """
+    phone = (phone or '').strip()
+    if not phone:
+        return ''
+    
+    digits = ''.join(c for c in phone if c.isdigit())
+    # Код страны: +7, 7 или 8 (внутренний формат); без кода - 10 цифр
+    country_codes = '7' if phone.startswith('+') else '78'
+    if len(digits) == 11 and digits[0] in country_codes:
+        digits = digits[1:]
+    elif phone.startswith('+'):
+        digits = ''
+    if len(digits) != 10 or any(c not in '0123456789+-() ' for c in phone):
+        raise ValueError(f'Некорректный номер телефона: {phone}')
+    return f'+7{digits}'
@@ -8,29 +8,39 @@
 - Восстановления пароля
 """
 
+import hmac
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
-from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
-from django.utils.encoding import force_bytes, force_str
-from django.contrib.auth.tokens import default_token_generator
+from django.db import transaction
 from django.conf import settings
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
 from django.urls import reverse
 from django.views.decorators.cache import never_cache
 from django.views.decorators.csrf import csrf_protect
 from django.utils.decorators import method_decorator
 
+from orders.pagination import get_order_history_page
+from orders.services import get_order_stats
+
 from .models import CustomUser
+from .mail_queue import enqueue_mail
+from .email_templates import ACTIVATION_EMAIL
+from .search import search_users
+from .password_reset import request_password_reset, set_password_once
+from .tokens import activation_token_generator, check_legacy_token, password_reset_token_generator
+from .user_cache import invalidate_cached_user
+from .stats import get_user_stats
+from .utils import get_client_ip
 from .forms import (
     CustomUserCreationForm,
     CustomAuthenticationForm,
     UserProfileForm,
     CustomPasswordChangeForm,
     PasswordResetRequestForm,
+    CustomSetPasswordForm,
     AccountDeletionForm
 )
 
@@ -70,59 +80,41 @@ def register(request):
     if request.method == 'POST':
         form = CustomUserCreationForm(request.POST)
         if form.is_valid():
-            # Сохраняем пользователя (пока неактивного)
-            user = form.save()
-            
-            # Генерируем токен для подтверждения email
-            token = default_token_generator.make_token(user)
-            uid = urlsafe_base64_encode(force_bytes(user.pk))
-            
-            # Создаем ссылку активации
-            activation_link = request.build_absolute_uri(
-                reverse('accounts:activate', kwargs={'uidb64': uid, 'token': token})
-            )
-            
-            # Подготавливаем содержимое письма
-            subject = 'Подтверждение регистрации в интернет-магазине'
-            message = render_to_string('accounts/email/activation_email.txt', {
-                'user': user,
-                'activation_link': activation_link,
-                'site_name': 'Интернет-магазин'
-            })
-            html_message = render_to_string('accounts/email/activation_email.html', {
-                'user': user,
-                'activation_link': activation_link,
-                'site_name': 'Интернет-магазин'
-            })
-            
-            try:
-                # Отправляем письмо с подтверждением
-                send_mail(
+            # Пользователь и письмо сохраняются в одной транзакции:
+            # не может получиться пользователь без письма активации
+            with transaction.atomic():
+                # Сохраняем пользователя (пока неактивного)
+                user = form.save()
+
+                # Создаем ссылку активации с подписанным токеном
+                activation_link = request.build_absolute_uri(
+                    reverse('accounts:activate', kwargs=activation_token_generator.make_link_args(user))
+                )
+
+                # Рендерим обе версии письма из общего контекста
+                subject, message, html_message = ACTIVATION_EMAIL.render({
+                    'user': user,
+                    'activation_link': activation_link,
+                    'site_name': 'Интернет-магазин'
+                })
+
+                # Ставим письмо в очередь: его отправит команда send_queued_mail,
+                # поэтому медленный почтовый сервер не задерживает ответ
+                enqueue_mail(
                     subject=subject,
                     message=message,
-                    from_email=settings.DEFAULT_FROM_EMAIL if hasattr(settings, 'DEFAULT_FROM_EMAIL') else 'noreply@shop.local',
-                    recipient_list=[user.email],
+                    recipient=user.email,
                     html_message=html_message,
-                    fail_silently=False
-                )
-                
-                messages.success(
-                    request,
-                    f'Регистрация прошла успешно! На адрес {user.email} отправлено письмо '
-                    'с инструкциями по активации аккаунта.'
-                )
-                
-                return redirect('accounts:email_confirmation_sent')
-                
-            except Exception as e:
-                # В случае ошибки отправки письма
-                messages.error(
-                    request,
-                    'Произошла ошибка при отправке письма подтверждения. '
-                    'Попробуйте зарегистрироваться позже или обратитесь к администратору.'
+                    template=ACTIVATION_EMAIL.name
                 )
-                # Удаляем созданного пользователя, так как письмо не отправилось
-                user.delete()
+
+            messages.success(
+                request,
+                f'Регистрация прошла успешно! На адрес {user.email} отправлено письмо '
+                'с инструкциями по активации аккаунта.'
+            )
+            
+            return redirect('accounts:email_confirmation_sent')
         else:
             messages.error(
                 request,
@@ -141,8 +133,12 @@ def activate(request, uidb64, token):
     """
     Активация аккаунта пользователя по токену.
     
-    Проверяет токен активации и активирует аккаунт пользователя,
-    если токен действительный.
+    Подпись и срок действия токена проверяются без обращения к БД
+    (accounts.tokens), поэтому недействительные ссылки не стоят ни одного
+    запроса. Аккаунт активируется одним условным UPDATE без загрузки
+    пользователя, и страница строится по количеству измененных строк.
+    Повторные переходы (двойной клик, почтовые сканеры, заранее
+    открывающие ссылки) ничего не пишут и показывают ту же страницу успеха.
     
     Args:
         request: HTTP запрос
@@ -152,26 +148,36 @@ def activate(request, uidb64, token):
     Returns:
         HttpResponse: Страница результата активации
     """
-    try:
-        # Декодируем ID пользователя
-        uid = force_str(urlsafe_base64_decode(uidb64))
-        user = CustomUser.objects.get(pk=uid)
-    except (TypeError, ValueError, OverflowError, CustomUser.DoesNotExist):
-        user = None
-
-    if user is not None and default_token_generator.check_token(user, token):
-        # Токен действительный, активируем пользователя
-        user.is_active = True
-        user.email_confirmed = True
-        user.save()
-        
-        messages.success(
-            request,
-            'Ваш аккаунт успешно активирован! Теперь вы можете войти в систему.'
+    user_id = activation_token_generator.check_token(uidb64, token)
+    if user_id is None:
+        user_id = check_legacy_token(uidb64, token)
+    
+    activated = already_activated = False
+    if user_id is not None:
+        # Подтверждается только неподтвержденный email: ссылка не включит
+        # аккаунт, отключенный администратором после подтверждения
+        activated = bool(
+            CustomUser.objects
+            .filter(pk=user_id, email_confirmed=False)
+            .update(is_active=True, email_confirmed=True)
         )
+        if activated:
+            # UPDATE не отправляет post_save: сбрасываем снимок в кеше сами
+            invalidate_cached_user(user_id)
+            transaction.on_commit(lambda: invalidate_cached_user(user_id))
+        else:
+            # Ни одной строки: ссылку уже открывали (или аккаунт удален)
+            already_activated = CustomUser.objects.filter(pk=user_id, email_confirmed=True).exists()
+    
+    if activated or already_activated:
+        if activated:
+            messages.success(
+                request,
+                'Ваш аккаунт успешно активирован! Теперь вы можете войти в систему.'
+            )
         
         return render(request, 'accounts/activation_success.html', {
-            'user': user,
+            'already_activated': already_activated,
             'title': 'Аккаунт активирован'
         })
     else:
@@ -187,6 +193,70 @@ def activate(request, uidb64, token):
         })
 
 
+@never_cache
+def user_stats(request):
+    """
+    Статистика пользователей в формате JSON для дашбордов и мониторинга.
+    
+    Доступна сотрудникам, а также по токену из настройки
+    ACCOUNTS_STATS_TOKEN (заголовок "Authorization: Bearer <токен>").
+    
+    Args:
+        request: HTTP запрос
+        
+    Returns:
+        JsonResponse: Счетчики групп пользователей
+    """
+    token = getattr(settings, 'ACCOUNTS_STATS_TOKEN', '')
+    authorization = request.META.get('HTTP_AUTHORIZATION', '')
+    has_token = bool(token) and hmac.compare_digest(authorization, f'Bearer {token}')
+    
+    if not (request.user.is_staff or has_token):
+        return JsonResponse({'error': 'Доступ запрещен'}, status=403)
+    
+    return JsonResponse(get_user_stats())
+
+
+@never_cache
+def user_search(request):
+    """
+    Поиск пользователей для службы поддержки в формате JSON.
+    
+    Параметр q - фрагменты email, имени, телефона или адреса через
+    пробел, limit - количество результатов (не больше 100).
+    Доступен только сотрудникам.
+    
+    Args:
+        request: HTTP запрос
+        
+    Returns:
+        JsonResponse: Найденные пользователи в порядке релевантности
+    """
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Доступ запрещен'}, status=403)
+    
+    try:
+        limit = min(max(int(request.GET.get('limit', 20)), 1), 100)
+    except ValueError:
+        return JsonResponse({'error': 'Некорректный параметр limit'}, status=400)
+    
+    users = search_users(request.GET.get('q', ''), limit=limit)
+    return JsonResponse({
+        'results': [
+            {
+                'id': user.pk,
+                'email': user.email,
+                'full_name': user.get_full_name(),
+                'phone_number': user.phone_number,
+                'is_active': user.is_active,
+                'email_confirmed': user.email_confirmed,
+                'date_joined': user.date_joined.isoformat(),
+            }
+            for user in users
+        ],
+    })
+
+
 def email_confirmation_sent(request):
     """
     Страница уведомления об отправке письма подтверждения.
@@ -224,11 +294,8 @@ def user_login(request):
         if form.is_valid():
             user = form.get_user()
             
-            # Записываем IP адрес последнего входа
-            user.last_login_ip = get_client_ip(request)
-            user.save(update_fields=['last_login_ip'])
-            
-            # Входим в систему
+            # Входим в систему (время и IP входа записываются одним UPDATE
+            # в обработчике сигнала user_logged_in, см. accounts.signals)
             login(request, user)
             
             # Проверяем, нужно ли запомнить пользователя
@@ -262,24 +329,6 @@ def user_login(request):
     })
 
 
-def get_client_ip(request):
-    """
-    Получение IP адреса клиента.
-    
-    Args:
-        request: HTTP запрос
-        
-    Returns:
-        str: IP адрес клиента
-    """
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
-
-
 def user_logout(request):
     """
     Выход из системы.
@@ -300,13 +349,21 @@ def profile(request):
     """
     Личный кабинет пользователя.
     
+    История заказов выводится постранично по курсору из параметра
+    orders_before (см. orders.pagination), счетчики заказов берутся
+    из готовой сводки UserOrderStats.
+    
     Args:
         request: HTTP запрос
         
     Returns:
         HttpResponse: Страница профиля пользователя
     """
-    return render(request, 'accounts/profile.html')
+    context = {
+        'order_page': get_order_history_page(request.user, request.GET.get('orders_before')),
+        'order_stats': get_order_stats(request.user),
+    }
+    return render(request, 'accounts/profile.html', context)
 
 
 @login_required
@@ -314,14 +371,37 @@ def edit_profile(request):
     """
     Редактирование профиля пользователя.
     
+    Сохраняются только действительно измененные поля
+    (save(update_fields=...)): UPDATE не переписывает всю строку,
+    а если ничего не изменилось, запроса к БД нет вовсе. Снимок
+    пользователя в кеше сбрасывает сигнал post_save, поисковый индекс
+    обновляется, только если изменились индексируемые поля.
+    
     Args:
         request: HTTP запрос
         
     Returns:
-        HttpResponse: Форма редактирования профиля
+        HttpResponse: Форма редактирования профиля или перенаправление
     """
-    # Временная заглушка - будем развивать на следующем шаге
-    return render(request, 'accounts/edit_profile.html')
+    if request.method == 'POST':
+        form = UserProfileForm(request.POST, instance=request.user)
+        if form.is_valid():
+            update_fields = form.get_update_fields()
+            if update_fields:
+                form.save(commit=False).save(update_fields=update_fields)
+                messages.success(request, 'Профиль успешно обновлен.')
+            else:
+                messages.info(request, 'Изменений нет.')
+            return redirect('accounts:profile')
+        else:
+            messages.error(request, 'Пожалуйста, исправьте ошибки в форме.')
+    else:
+        form = UserProfileForm(instance=request.user)
+    
+    return render(request, 'accounts/edit_profile.html', {
+        'form': form,
+        'title': 'Редактирование профиля'
+    })
 
 
 @login_required
@@ -354,34 +434,81 @@ def delete_account(request):
     return render(request, 'accounts/delete_account.html')
 
 
+@csrf_protect
+@never_cache
 def password_reset_request(request):
     """
     Запрос на восстановление пароля.
     
+    Введенный email только ставится в очередь (accounts.password_reset):
+    пользователя ищет и письмо отправляет команда send_queued_mail.
+    Ответ и объем работы одинаковы для любого адреса, поэтому по ним
+    нельзя узнать, зарегистрирован ли email.
+    
     Args:
         request: HTTP запрос
         
     Returns:
-        HttpResponse: Форма запроса восстановления пароля
+        HttpResponse: Форма запроса восстановления пароля или перенаправление
     """
-    # Временная заглушка - будем развивать на следующем шаге
-    return render(request, 'accounts/password_reset.html')
+    if request.method == 'POST':
+        form = PasswordResetRequestForm(request.POST)
+        if form.is_valid():
+            # get_host() проверяет домен по ALLOWED_HOSTS
+            request_password_reset(form.cleaned_data['email'], f'{request.scheme}://{request.get_host()}')
+            return redirect('accounts:password_reset_done')
+    else:
+        form = PasswordResetRequestForm()
+    
+    return render(request, 'accounts/password_reset.html', {
+        'form': form,
+        'title': 'Восстановление пароля'
+    })
 
 
+@csrf_protect
+@never_cache
 def password_reset_confirm(request, uidb64, token):
     """
     Подтверждение восстановления пароля.
     
+    Для показа формы читается только хеш пароля пользователя (см.
+    PasswordResetTokenGenerator). Новый пароль записывается условным
+    UPDATE по старому хешу, поэтому ссылка срабатывает один раз.
+    
     Args:
         request: HTTP запрос
         uidb64: Закодированный ID пользователя
         token: Токен восстановления
         
     Returns:
-        HttpResponse: Форма установки нового пароля
+        HttpResponse: Форма установки нового пароля или перенаправление
     """
-    # Временная заглушка - будем развивать на следующем шаге
-    return render(request, 'accounts/password_reset_confirm.html')
+    checked = password_reset_token_generator.check_token(uidb64, token)
+    form = None
+    
+    if checked is not None:
+        user_id, password_hash = checked
+        if request.method == 'POST':
+            # Полная строка нужна валидаторам пароля (сходство с email и именем)
+            user = CustomUser.objects.filter(pk=user_id).first()
+            form = CustomSetPasswordForm(user, request.POST)
+            if user is not None and form.is_valid():
+                if set_password_once(user, password_hash, form.cleaned_data['new_password1']):
+                    # UPDATE не отправляет post_save: сбрасываем снимок в кеше сами
+                    invalidate_cached_user(user_id)
+                    transaction.on_commit(lambda: invalidate_cached_user(user_id))
+                    return redirect('accounts:password_reset_complete')
+                # Пароль изменили параллельно по этой же ссылке
+                form = None
+        else:
+            form = CustomSetPasswordForm(None)
+    
+    return render(request, 'accounts/password_reset_confirm.html', {
+        'form': form,
+        'validlink': form is not None,
+        'title': 'Новый пароль'
+    })
 
 
 def password_reset_done(request):
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+"""
+Бенчмарк корзины покупок.
+
+Прогоняет настоящие представления корзины через тестовый клиент Django
+на отдельной тестовой базе: страницу корзины, добавление товара
+и вход с переносом сессионной корзины, а затем сброс накопленного
+журнала в БД. Корзины заполняются сотнями строк, а для каждой операции
+выводятся ops/sec, перцентили задержки и количество SQL-запросов.
+
+Запуск:
+    python bench_cart.py
+    python bench_cart.py --lines 100,500,1000 --requests 50
+"""
+import argparse
+import os
+import statistics
+import time
+
+import django
+
+# Настраиваем Django окружение
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'shop_project.settings')
+django.setup()
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings, setup_test_environment
+from django.urls import reverse
+
+from accounts.models import CustomUser
+from cart.cart import SESSION_KEY, UserCart
+from cart.write_behind import flush_journal
+
+
+PASSWORD = 'Bench-Password-123'
+
+# Быстрый хешер: бенчмарк измеряет корзину, а не хеширование пароля
+FAST_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+def percentile(samples, pct):
+    """Возвращает перцентиль pct (0-100) из списка задержек."""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(lines, operation, samples, queries):
+    """Печатает результаты одной серии замеров."""
+    total = sum(samples)
+    print(
+        f"{lines:>6} строк  {operation:<8} "
+        f"{len(samples) / total:8.1f} ops/s  "
+        f"p50 {percentile(samples, 50) * 1000:7.2f} мс  "
+        f"p95 {percentile(samples, 95) * 1000:7.2f} мс  "
+        f"avg {statistics.mean(samples) * 1000:7.2f} мс  "
+        f"SQL {queries}"
+    )
+
+
+def create_user(email):
+    """Создает активного пользователя с заранее вычисленным хешем пароля."""
+    return CustomUser.objects.create(
+        email=email,
+        password=make_password(PASSWORD),
+        is_active=True,
+        email_confirmed=True,
+    )
+
+
+def timed(requests, func):
+    """
+    Выполняет func requests раз.
+
+    Returns:
+        tuple: (задержки в секундах, количество SQL-запросов последнего вызова)
+    """
+    samples = []
+    for _ in range(requests):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            func()
+            samples.append(time.perf_counter() - started)
+    return samples, len(queries)
+
+
+def bench_user_cart(lines, requests):
+    """Замеряет страницу корзины и добавление товара для пользователя."""
+    user = create_user(f'bench-{lines}@example.com')
+    UserCart(user).add_many({product_id: 1 for product_id in range(1, lines + 1)})
+
+    client = Client()
+    client.login(email=user.email, password=PASSWORD)
+    detail_url = reverse('cart:detail')
+    add_url = reverse('cart:add')
+
+    report(lines, 'detail', *timed(requests, lambda: client.get(detail_url)))
+    report(lines, 'add', *timed(
+        requests, lambda: client.post(add_url, {'product_id': 1, 'quantity': 1})
+    ))
+
+
+def bench_merge(lines, requests):
+    """Замеряет вход с переносом сессионной корзины из lines строк."""
+    user = create_user(f'merge-{lines}@example.com')
+    login_url = reverse('accounts:login')
+    session_cart = {str(product_id): 1 for product_id in range(1, lines + 1)}
+
+    samples = []
+    for _ in range(requests):
+        client = Client()
+        session = client.session
+        session[SESSION_KEY] = dict(session_cart)
+        session.save()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = client.post(login_url, {'username': user.email, 'password': PASSWORD})
+            samples.append(time.perf_counter() - started)
+        assert response.status_code == 302, 'вход не удался'
+    report(lines, 'merge', samples, len(queries))
+
+
+def bench_flush(lines):
+    """Замеряет сброс журнала, накопленного предыдущими замерами."""
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        flush_journal()
+        elapsed = time.perf_counter() - started
+    report(lines, 'flush', [elapsed], len(queries))
+
+
+def main():
+    """Запуск бенчмарка."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--lines', default='10,100,500',
+                        help='Размеры корзин через запятую')
+    parser.add_argument('--requests', type=int, default=30,
+                        help='Количество запросов на операцию')
+    args = parser.parse_args()
+
+    # Бенчмарк работает на отдельной тестовой базе, рабочая база не затрагивается
+    setup_test_environment(debug=False)
+    old_name = connection.creation.create_test_db(verbosity=0)
+
+    print(f"🛒 Бенчмарк корзины: {args.requests} запросов на операцию")
+    print("-" * 90)
+
+    try:
+        with override_settings(PASSWORD_HASHERS=FAST_HASHERS):
+            for lines in map(int, args.lines.split(',')):
+                bench_user_cart(lines, args.requests)
+                bench_merge(lines, args.requests)
+                bench_flush(lines)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
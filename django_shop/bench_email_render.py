@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""
+Микробенчмарк рендеринга письма активации.
+
+Сравнивает прежний способ (два вызова render_to_string с отдельными
+контекстами) с кешированным рендерингом accounts.email_templates.
+
+Запуск:
+    python bench_email_render.py [количество писем]
+"""
+import os
+import sys
+import time
+
+import django
+
+# Настраиваем Django окружение
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'shop_project.settings')
+django.setup()
+
+from django.conf import settings
+from django.template.loader import render_to_string
+
+from accounts.email_templates import ACTIVATION_EMAIL
+
+
+def render_with_loader(context):
+    """Рендеринг письма так, как это делалось раньше во views.register."""
+    message = render_to_string('accounts/email/activation_email.txt', dict(context))
+    html_message = render_to_string('accounts/email/activation_email.html', dict(context))
+    return message, html_message
+
+
+def render_with_cache(context):
+    """Рендеринг письма через кешированную пару шаблонов."""
+    return ACTIVATION_EMAIL.render(context)
+
+
+def measure(func, context, iterations):
+    """
+    Измеряет среднее время одного вызова.
+
+    Returns:
+        float: Время на одно письмо в микросекундах
+    """
+    # Прогрев: первая компиляция шаблонов не должна попадать в замер
+    func(context)
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func(context)
+    return (time.perf_counter() - started) / iterations * 1_000_000
+
+
+def main():
+    """Запуск бенчмарка."""
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    # Бенчмарк отражает продакшен-режим, где шаблоны кешируются
+    settings.DEBUG = False
+
+    context = {
+        'user': {'first_name': 'Тестовый', 'email': 'bench@example.com'},
+        'activation_link': 'http://localhost:8000/activate/MQ/token/',
+        'site_name': 'Интернет-магазин',
+    }
+
+    print(f"📧 Рендеринг письма активации, {iterations} итераций")
+    print("-" * 50)
+
+    baseline = measure(render_with_loader, context, iterations)
+    cached = measure(render_with_cache, context, iterations)
+
+    print(f"render_to_string x2:     {baseline:8.1f} мкс/письмо")
+    print(f"EmailTemplate.render:    {cached:8.1f} мкс/письмо")
+    print(f"Ускорение:               {baseline / cached:8.2f}x")
+
+
+if __name__ == '__main__':
+    main()
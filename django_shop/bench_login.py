@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+"""
+Бенчмарк пропускной способности входа и регистрации.
+
+Прогоняет настоящие представления accounts:login и accounts:register
+через тестовый клиент Django на отдельной тестовой базе с заранее
+созданными пользователями и выводит ops/sec и перцентили задержки
+для каждого профиля хеширования паролей.
+
+Запуск:
+    python bench_login.py
+    python bench_login.py --profiles pbkdf2,pbkdf2-100k,scrypt --requests 50 --users 10000
+"""
+import argparse
+import os
+import statistics
+import time
+
+import django
+
+# Настраиваем Django окружение
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'shop_project.settings')
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment
+from django.urls import reverse
+
+from accounts.models import CustomUser
+
+
+PASSWORD = 'Bench-Password-123'
+
+# Профили хеширования: (предпочтительный хешер, количество итераций PBKDF2)
+PROFILES = {
+    'pbkdf2': ('pbkdf2', settings.PBKDF2_ITERATIONS),
+    'pbkdf2-100k': ('pbkdf2', 100_000),
+    'pbkdf2-10k': ('pbkdf2', 10_000),
+    'argon2': ('argon2', settings.PBKDF2_ITERATIONS),
+    'scrypt': ('scrypt', settings.PBKDF2_ITERATIONS),
+}
+
+
+def hashers_for(preferred):
+    """
+    Собирает PASSWORD_HASHERS с предпочтительным хешером на первом месте.
+
+    Берется список из settings.py (вместе с добавленными туда стандартными
+    хешерами Django), меняется только порядок.
+
+    Args:
+        preferred (str): Имя профиля из PASSWORD_HASHER_PROFILES
+
+    Returns:
+        list: Значение настройки PASSWORD_HASHERS
+    """
+    preferred_hasher = settings.PASSWORD_HASHER_PROFILES[preferred]
+    return [preferred_hasher] + [
+        hasher for hasher in settings.PASSWORD_HASHERS if hasher != preferred_hasher
+    ]
+
+
+def seed_users(count, password_hash):
+    """
+    Заполняет таблицу пользователей активными аккаунтами.
+
+    Все пользователи получают один и тот же заранее вычисленный хеш,
+    чтобы заполнение не занимало время хеширования.
+    """
+    CustomUser.objects.all().delete()
+    batch = [
+        CustomUser(
+            email=f'bench{i}@example.com',
+            password=password_hash,
+            is_active=True,
+            email_confirmed=True,
+        )
+        for i in range(count)
+    ]
+    CustomUser.objects.bulk_create(batch, batch_size=1000)
+
+
+def percentile(samples, pct):
+    """Возвращает перцентиль pct (0-100) из списка задержек."""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(name, operation, samples):
+    """Печатает результаты одной серии замеров."""
+    total = sum(samples)
+    print(
+        f"{name:<12} {operation:<9} "
+        f"{len(samples) / total:8.1f} ops/s  "
+        f"p50 {percentile(samples, 50) * 1000:7.1f} мс  "
+        f"p95 {percentile(samples, 95) * 1000:7.1f} мс  "
+        f"p99 {percentile(samples, 99) * 1000:7.1f} мс  "
+        f"avg {statistics.mean(samples) * 1000:7.1f} мс"
+    )
+
+
+def bench_login(requests, users):
+    """
+    Замеряет вход случайных пользователей из заполненной таблицы.
+
+    Returns:
+        list: Задержки отдельных запросов в секундах
+    """
+    url = reverse('accounts:login')
+    samples = []
+    for i in range(requests):
+        client = Client()
+        started = time.perf_counter()
+        response = client.post(url, {
+            'username': f'bench{(i * 7919) % users}@example.com',
+            'password': PASSWORD,
+        })
+        samples.append(time.perf_counter() - started)
+        assert response.status_code == 302, 'вход не удался'
+    return samples
+
+
+def bench_register(requests, profile_name):
+    """
+    Замеряет регистрацию новых пользователей.
+
+    Регистрация проходит все AUTH_PASSWORD_VALIDATORS и хеширует пароль.
+
+    Returns:
+        list: Задержки отдельных запросов в секундах
+    """
+    url = reverse('accounts:register')
+    samples = []
+    for i in range(requests):
+        client = Client()
+        started = time.perf_counter()
+        response = client.post(url, {
+            'email': f'new-{profile_name}-{i}@example.com',
+            'password1': PASSWORD,
+            'password2': PASSWORD,
+            'terms_accepted': 'on',
+        })
+        samples.append(time.perf_counter() - started)
+        assert response.status_code == 302, 'регистрация не удалась'
+    return samples
+
+
+def main():
+    """Запуск бенчмарка."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--profiles', default='pbkdf2,pbkdf2-100k,argon2,scrypt',
+                        help='Профили через запятую: ' + ', '.join(PROFILES))
+    parser.add_argument('--requests', type=int, default=30,
+                        help='Количество запросов на операцию')
+    parser.add_argument('--users', type=int, default=5000,
+                        help='Количество пользователей в таблице')
+    args = parser.parse_args()
+
+    # Бенчмарк работает на отдельной тестовой базе, рабочая база не затрагивается
+    setup_test_environment(debug=False)
+    old_name = connection.creation.create_test_db(verbosity=0)
+
+    print(f"🔐 Бенчмарк входа/регистрации: {args.users} пользователей, "
+          f"{args.requests} запросов на операцию")
+    print("-" * 90)
+
+    try:
+        for profile_name in args.profiles.split(','):
+            preferred, iterations = PROFILES[profile_name]
+            with override_settings(PASSWORD_HASHERS=hashers_for(preferred),
+                                   PBKDF2_ITERATIONS=iterations):
+                try:
+                    password_hash = make_password(PASSWORD)
+                except ValueError as e:
+                    # Например, не установлен argon2-cffi
+                    print(f"{profile_name:<12} пропущен: {e}")
+                    continue
+
+                seed_users(args.users, password_hash)
+                report(profile_name, 'login', bench_login(args.requests, args.users))
+                report(profile_name, 'register', bench_register(args.requests, profile_name))
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
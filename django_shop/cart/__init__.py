@@ -0,0 +1,2 @@
+# Файл инициализации приложения cart
+# Этот файл делает директорию Python пакетом
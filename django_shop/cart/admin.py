@@ -0,0 +1,32 @@
+"""
+Настройка административной панели для приложения cart.
+"""
+
+from django.contrib import admin
+
+from .models import Cart, CartItem
+
+
+class CartItemInline(admin.TabularInline):
+    """Строки корзины на странице корзины."""
+    
+    model = CartItem
+    extra = 0
+    readonly_fields = ('updated_at',)
+
+
+@admin.register(Cart)
+class CartAdmin(admin.ModelAdmin):
+    """
+    Административная панель корзин пользователей.
+    """
+    
+    list_display = ('user', 'created_at')
+    
+    list_select_related = ('user',)
+    
+    search_fields = ('user__email',)
+    
+    raw_id_fields = ('user',)
+    
+    inlines = [CartItemInline]
@@ -0,0 +1,36 @@
+"""
+Конфигурация приложения cart.
+
+Это приложение отвечает за:
+- Корзину анонимного пользователя в сессии
+- Корзину авторизованного пользователя в базе данных
+- Перенос сессионной корзины в корзину пользователя при входе
+"""
+
+from django.apps import AppConfig
+
+
+class CartConfig(AppConfig):
+    """Конфигурация приложения cart."""
+    
+    # Тип поля по умолчанию для автоинкрементных первичных ключей
+    default_auto_field = 'django.db.models.BigAutoField'
+    
+    # Имя приложения
+    name = 'cart'
+    
+    # Человеко-читаемое имя приложения
+    verbose_name = 'Корзина покупок'
+    
+    def ready(self):
+        """
+        Подключение обработчиков сигналов и системных проверок.
+        
+        При входе пользователя товары из сессионной корзины
+        переносятся в его корзину в базе данных.
+        """
+        from django.contrib.auth.signals import user_logged_in
+        from . import checks  # noqa: F401 (регистрирует проверки)
+        from .signals import merge_cart_on_login
+        
+        user_logged_in.connect(merge_cart_on_login, dispatch_uid='cart_merge_on_login')
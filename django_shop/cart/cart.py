@@ -0,0 +1,221 @@
+"""
+Корзины покупок: сессионная и в базе данных.
+
+SessionCart хранит корзину анонимного пользователя в сессии в компактном
+виде {"<product_id>": количество}. UserCart хранит корзину пользователя
+в моделях Cart и CartItem с отложенной записью (cart.write_behind): клики
+по корзине работают с кешем, а в БД изменения попадают пачками.
+Обе корзины имеют одинаковый интерфейс, а get_cart выбирает нужную
+по запросу.
+"""
+
+from .write_behind import load_state, update_state
+
+
+# Ключ сессии с корзиной анонимного пользователя
+SESSION_KEY = 'cart'
+
+# Максимальное количество одного товара в корзине
+MAX_QUANTITY = 999
+
+
+def _clamp(quantity):
+    """Ограничивает количество товара диапазоном 0..MAX_QUANTITY."""
+    return max(0, min(int(quantity), MAX_QUANTITY))
+
+
+class SessionCart:
+    """
+    Корзина анонимного пользователя в сессии.
+    
+    Attributes:
+        session: Сессия запроса
+    """
+    
+    def __init__(self, session):
+        """
+        Инициализация корзины.
+        
+        Args:
+            session: Сессия запроса
+        """
+        self.session = session
+        
+    def _data(self):
+        """Возвращает словарь корзины из сессии."""
+        return self.session.get(SESSION_KEY, {})
+        
+    def _save(self, data):
+        """Сохраняет словарь корзины в сессию (пустую корзину удаляет)."""
+        if data:
+            self.session[SESSION_KEY] = data
+        else:
+            self.session.pop(SESSION_KEY, None)
+            
+    def add(self, product_id, quantity=1):
+        """
+        Добавляет товар в корзину.
+        
+        Args:
+            product_id (int): Идентификатор товара
+            quantity (int): Сколько единиц добавить
+        """
+        data = self._data()
+        key = str(product_id)
+        data[key] = _clamp(data.get(key, 0) + quantity)
+        self._save(data)
+        
+    def set(self, product_id, quantity):
+        """
+        Устанавливает количество товара (0 - удалить товар).
+        
+        Args:
+            product_id (int): Идентификатор товара
+            quantity (int): Новое количество
+        """
+        data = self._data()
+        quantity = _clamp(quantity)
+        if quantity:
+            data[str(product_id)] = quantity
+        else:
+            data.pop(str(product_id), None)
+        self._save(data)
+        
+    def remove(self, product_id):
+        """
+        Удаляет товар из корзины.
+        
+        Args:
+            product_id (int): Идентификатор товара
+        """
+        self.set(product_id, 0)
+        
+    def clear(self):
+        """Очищает корзину."""
+        self._save({})
+        
+    def items(self):
+        """
+        Возвращает содержимое корзины.
+        
+        Returns:
+            list: Пары (product_id, количество), отсортированные по товару
+        """
+        return sorted((int(key), quantity) for key, quantity in self._data().items())
+
+
+class UserCart:
+    """
+    Корзина авторизованного пользователя.
+    
+    Состояние корзины читается из кеша, а изменения записываются
+    в журнал и попадают в БД при сбросе (см. cart.write_behind).
+    
+    Attributes:
+        user: Владелец корзины
+    """
+    
+    def __init__(self, user):
+        """
+        Инициализация корзины.
+        
+        Args:
+            user (CustomUser): Владелец корзины
+        """
+        self.user = user
+        
+    def add(self, product_id, quantity=1):
+        """
+        Добавляет товар в корзину.
+        
+        Args:
+            product_id (int): Идентификатор товара
+            quantity (int): Сколько единиц добавить
+        """
+        self.add_many({int(product_id): quantity})
+        
+    def add_many(self, additions):
+        """
+        Добавляет несколько товаров одной записью журнала.
+        
+        Args:
+            additions (dict): Товар -> сколько единиц добавить
+        """
+        # Суммы считаются от состояния, прочитанного под блокировкой журнала
+        update_state(self.user.pk, lambda state: {
+            product_id: _clamp(state.get(product_id, 0) + quantity)
+            for product_id, quantity in additions.items()
+        })
+        
+    def set(self, product_id, quantity):
+        """
+        Устанавливает количество товара (0 - удалить товар).
+        
+        Args:
+            product_id (int): Идентификатор товара
+            quantity (int): Новое количество
+        """
+        update_state(self.user.pk, lambda state: {int(product_id): _clamp(quantity)})
+        
+    def remove(self, product_id):
+        """
+        Удаляет товар из корзины.
+        
+        Args:
+            product_id (int): Идентификатор товара
+        """
+        self.set(product_id, 0)
+        
+    def clear(self):
+        """Очищает корзину."""
+        update_state(self.user.pk, lambda state: {}, clear=True)
+        
+    def items(self):
+        """
+        Возвращает содержимое корзины (обычно без обращения к БД).
+        
+        Returns:
+            list: Пары (product_id, количество), отсортированные по товару
+        """
+        return sorted(load_state(self.user.pk).items())
+
+
+def get_cart(request):
+    """
+    Возвращает корзину текущего пользователя.
+    
+    Args:
+        request: HTTP запрос
+        
+    Returns:
+        UserCart или SessionCart: Корзина авторизованного или анонимного пользователя
+    """
+    if request.user.is_authenticated:
+        return UserCart(request.user)
+    return SessionCart(request.session)
+
+
+def merge_session_cart(user, session):
+    """
+    Переносит сессионную корзину в корзину пользователя.
+    
+    Количества одинаковых товаров складываются, а весь перенос
+    записывается одной строкой журнала: в БД он попадает одним
+    upsert при сбросе журнала. Сессионная корзина после переноса
+    очищается.
+    
+    Args:
+        user (CustomUser): Вошедший пользователь
+        session: Сессия запроса
+        
+    Returns:
+        int: Количество перенесенных строк
+    """
+    session_cart = SessionCart(session)
+    additions = dict(session_cart.items())
+    if not additions:
+        return 0
+    
+    UserCart(user).add_many(additions)
+    session_cart.clear()
+    return len(additions)
@@ -0,0 +1,42 @@
+"""
+Системные проверки приложения cart.
+
+Отложенная запись корзин (cart.write_behind) хранит текущее состояние
+корзины в кеше, поэтому кеш должен быть общим для всех процессов сайта.
+Проверки выполняются при запуске manage.py (runserver, migrate, check).
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, register
+
+
+@register()
+def check_write_behind(app_configs, **kwargs):
+    """
+    Проверяет, что отложенная запись корзин включена только с общим кешем.
+
+    Returns:
+        list: Найденные ошибки
+    """
+    if not getattr(settings, 'CART_WRITE_BEHIND', False):
+        return []
+
+    errors = []
+    if isinstance(caches['default'], (LocMemCache, DummyCache)):
+        errors.append(Error(
+            'Отложенная запись корзин требует общего для всех процессов кеша',
+            hint='Задайте CACHE_BACKEND=file (или внешний кеш) либо CART_WRITE_BEHIND = False',
+            id='cart.E001',
+        ))
+    try:
+        import fcntl  # noqa: F401
+    except ImportError:
+        errors.append(Error(
+            'Отложенная запись корзин требует блокировок файлов (fcntl)',
+            hint='Задайте CART_WRITE_BEHIND = False на этой платформе',
+            id='cart.E002',
+        ))
+    return errors
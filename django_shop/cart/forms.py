@@ -0,0 +1,25 @@
+"""
+Формы для приложения cart.
+"""
+
+from django import forms
+
+from .cart import MAX_QUANTITY
+
+
+class CartItemForm(forms.Form):
+    """
+    Форма добавления товара в корзину или изменения его количества.
+    """
+    
+    product_id = forms.IntegerField(
+        min_value=1,
+        label='Товар'
+    )
+    
+    quantity = forms.IntegerField(
+        min_value=0,
+        max_value=MAX_QUANTITY,
+        initial=1,
+        label='Количество'
+    )
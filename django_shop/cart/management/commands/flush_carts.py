@@ -0,0 +1,54 @@
+"""
+Команда сброса журнала изменений корзин в базу данных.
+
+Примеры:
+    python manage.py flush_carts                 # применить накопленный журнал
+    python manage.py flush_carts --loop          # сбрасывать по таймеру
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from cart.write_behind import DEFAULT_FLUSH_INTERVAL, flush_journal
+
+
+class Command(BaseCommand):
+    """Применяет журнал изменений корзин к таблицам Cart и CartItem."""
+
+    help = 'Сбрасывает отложенные изменения корзин в базу данных'
+
+    def add_arguments(self, parser):
+        """Регистрирует аргументы командной строки."""
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Количество пользователей в одной транзакции'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а сбрасывать журнал с интервалом --interval'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=getattr(settings, 'CART_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL),
+            help='Пауза между сбросами в секундах (для --loop)'
+        )
+
+    def handle(self, *args, **options):
+        """Основной цикл сброса."""
+        try:
+            while True:
+                users, lines = flush_journal(batch_size=options['batch_size'])
+                if users or not options['loop']:
+                    self.stdout.write(f'Корзин: {users}, записано строк: {lines}')
+
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Остановлено пользователем')
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:23
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Cart',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создана')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='cart', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Корзина',
+                'verbose_name_plural': 'Корзины',
+            },
+        ),
+        migrations.CreateModel(
+            name='CartItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_id', models.PositiveIntegerField(help_text='Идентификатор товара', verbose_name='Товар')),
+                ('quantity', models.PositiveIntegerField(default=1, verbose_name='Количество')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Изменена')),
+                ('cart', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='cart.cart', verbose_name='Корзина')),
+            ],
+            options={
+                'verbose_name': 'Строка корзины',
+                'verbose_name_plural': 'Строки корзины',
+                'ordering': ['cart', 'product_id'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(fields=('cart', 'product_id'), name='cart_item_product_unique'),
+        ),
+    ]
@@ -0,0 +1,87 @@
+"""
+Модели приложения cart.
+
+Корзина авторизованного пользователя хранится в нормализованном виде:
+одна строка Cart на пользователя и по строке CartItem на товар.
+Каталога товаров в проекте пока нет, поэтому товар задается его
+идентификатором product_id.
+"""
+
+from django.conf import settings
+from django.db import models
+
+
+class Cart(models.Model):
+    """
+    Корзина авторизованного пользователя.
+    
+    Корзина не удаляется при выходе из системы, поэтому незавершенный
+    заказ остается доступным после повторного входа.
+    """
+    
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='cart',
+        verbose_name='Пользователь'
+    )
+    
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создана'
+    )
+    
+    class Meta:
+        """Метаданные модели."""
+        verbose_name = 'Корзина'
+        verbose_name_plural = 'Корзины'
+        
+    def __str__(self):
+        """Строковое представление корзины."""
+        return f'Корзина {self.user_id}'
+
+
+class CartItem(models.Model):
+    """
+    Строка корзины: товар и его количество.
+    """
+    
+    cart = models.ForeignKey(
+        Cart,
+        on_delete=models.CASCADE,
+        related_name='items',
+        verbose_name='Корзина'
+    )
+    
+    product_id = models.PositiveIntegerField(
+        verbose_name='Товар',
+        help_text='Идентификатор товара'
+    )
+    
+    quantity = models.PositiveIntegerField(
+        default=1,
+        verbose_name='Количество'
+    )
+    
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Изменена'
+    )
+    
+    class Meta:
+        """Метаданные модели."""
+        verbose_name = 'Строка корзины'
+        verbose_name_plural = 'Строки корзины'
+        ordering = ['cart', 'product_id']
+        constraints = [
+            # По одной строке на товар: на этот индекс опирается
+            # upsert (INSERT ... ON CONFLICT) при добавлении товаров
+            models.UniqueConstraint(
+                fields=['cart', 'product_id'],
+                name='cart_item_product_unique'
+            ),
+        ]
+        
+    def __str__(self):
+        """Строковое представление строки корзины."""
+        return f'Товар {self.product_id} x {self.quantity}'
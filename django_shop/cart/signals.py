@@ -0,0 +1,19 @@
+"""
+Обработчики сигналов приложения cart.
+"""
+
+from .cart import merge_session_cart
+
+
+def merge_cart_on_login(sender, request, user, **kwargs):
+    """
+    Переносит сессионную корзину в корзину пользователя при входе.
+
+    Args:
+        sender: Класс пользователя
+        request: HTTP запрос (может быть None при входе без запроса)
+        user: Вошедший пользователь
+    """
+    if request is None or not hasattr(request, 'session'):
+        return
+    merge_session_cart(user, request.session)
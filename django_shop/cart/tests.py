@@ -0,0 +1,280 @@
+"""
+Тесты для приложения cart.
+
+Содержит тесты для:
+- Сессионной корзины анонимного пользователя
+- Корзины пользователя в базе данных
+- Переноса корзины при входе
+- Представлений (views)
+"""
+
+import os
+import tempfile
+import threading
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .cart import MAX_QUANTITY, SESSION_KEY, UserCart, merge_session_cart
+from .checks import check_write_behind
+from .models import Cart, CartItem
+from .write_behind import flush_journal, get_journal_path
+
+User = get_user_model()
+
+
+class CartTestMixin:
+    """Общая настройка: отложенная запись с журналом во временном каталоге и активный пользователь."""
+    
+    def setUp(self):
+        """Создание пользователя, очистка кеша и отдельный журнал корзин."""
+        cache.clear()
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        override = override_settings(
+            CART_WRITE_BEHIND=True,
+            CART_JOURNAL_PATH=os.path.join(tmp_dir.name, 'cart_journal.jsonl'),
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        
+        self.user = User.objects.create_user(
+            email='test@example.com',
+            password='testpassword123',
+            is_active=True,
+            email_confirmed=True
+        )
+        
+    def add(self, product_id, quantity=1):
+        """Добавляет товар через представление."""
+        return self.client.post(reverse('cart:add'), {'product_id': product_id, 'quantity': quantity})
+
+
+class SessionCartTest(CartTestMixin, TestCase):
+    """Тесты корзины анонимного пользователя."""
+    
+    def test_add_stores_cart_in_session(self):
+        """Тест: товары анонимного пользователя хранятся только в сессии."""
+        self.add(5, 2)
+        self.add(5, 1)
+        self.add(3)
+        
+        self.assertEqual(self.client.session[SESSION_KEY], {'5': 3, '3': 1})
+        self.assertFalse(CartItem.objects.exists())
+        
+    def test_update_and_remove(self):
+        """Тест изменения количества и удаления товара."""
+        self.add(5, 2)
+        self.add(7)
+        
+        self.client.post(reverse('cart:update'), {'product_id': 5, 'quantity': 10})
+        self.client.post(reverse('cart:remove', args=[7]))
+        
+        self.assertEqual(self.client.session[SESSION_KEY], {'5': 10})
+        
+    def test_detail_page(self):
+        """Тест страницы корзины."""
+        self.add(42, 3)
+        
+        response = self.client.get(reverse('cart:detail'))
+        
+        self.assertContains(response, '№ 42')
+        self.assertEqual(response.context['total_quantity'], 3)
+
+
+class UserCartTest(CartTestMixin, TestCase):
+    """Тесты корзины пользователя в базе данных."""
+    
+    def test_add_accumulates_quantity(self):
+        """Тест: повторное добавление увеличивает количество."""
+        cart = UserCart(self.user)
+        cart.add(1, 2)
+        cart.add(1, 3)
+        cart.add(2)
+        
+        self.assertEqual(cart.items(), [(1, 5), (2, 1)])
+        
+    def test_quantity_is_clamped(self):
+        """Тест ограничения количества товара."""
+        cart = UserCart(self.user)
+        cart.add(1, MAX_QUANTITY)
+        cart.add(1, 10)
+        
+        self.assertEqual(cart.items(), [(1, MAX_QUANTITY)])
+        
+    def test_set_zero_removes_item(self):
+        """Тест: количество 0 удаляет товар."""
+        cart = UserCart(self.user)
+        cart.add(1)
+        cart.set(1, 0)
+        
+        self.assertEqual(cart.items(), [])
+        
+    def test_cart_survives_relogin(self):
+        """Тест: корзина остается после выхода и повторного входа."""
+        self.client.login(email='test@example.com', password='testpassword123')
+        self.add(9, 4)
+        self.client.logout()
+        # Незавершенный заказ должен пережить и сброс кеша
+        flush_journal()
+        cache.clear()
+        
+        self.client.login(email='test@example.com', password='testpassword123')
+        response = self.client.get(reverse('cart:detail'))
+        
+        self.assertEqual(response.context['items'], [(9, 4)])
+
+
+class CartMergeTest(CartTestMixin, TestCase):
+    """Тесты переноса сессионной корзины при входе."""
+    
+    def test_login_merges_session_cart(self):
+        """Тест: при входе товары из сессии переносятся и складываются."""
+        UserCart(self.user).add(1, 2)
+        self.add(1, 3)
+        self.add(2, 1)
+        
+        response = self.client.post(reverse('accounts:login'), {
+            'username': 'test@example.com',
+            'password': 'testpassword123',
+        })
+        
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(UserCart(self.user).items(), [(1, 5), (2, 1)])
+        self.assertNotIn(SESSION_KEY, self.client.session)
+        
+    def test_merge_is_one_bulk_upsert(self):
+        """Тест: перенос сотен строк записывается в БД одним upsert."""
+        Cart.objects.create(user=self.user)
+        # 200 строк помещаются в один INSERT даже с лимитом переменных SQLite
+        session = {SESSION_KEY: {str(product_id): 1 for product_id in range(1, 201)}}
+        
+        # При входе корзина только читается (промах кеша), запись идет в журнал
+        with self.assertNumQueries(1):
+            merged = merge_session_cart(self.user, session)
+        
+        # Сброс: SELECT пользователей, INSERT корзин, SELECT корзин и один
+        # INSERT ... ON CONFLICT для строк (плюс SAVEPOINT/RELEASE транзакции)
+        with self.assertNumQueries(6):
+            flush_journal()
+            
+        self.assertEqual(merged, 200)
+        self.assertEqual(CartItem.objects.count(), 200)
+
+
+class WriteBehindTest(CartTestMixin, TestCase):
+    """Тесты отложенной записи корзин пользователей."""
+    
+    def test_changes_are_not_written_until_flush(self):
+        """Тест: изменения корзины попадают в БД только при сбросе."""
+        cart = UserCart(self.user)
+        cart.items()  # первое чтение загружает корзину из БД в кеш
+        
+        with self.assertNumQueries(0):
+            cart.add(1, 2)
+            cart.add(2)
+            cart.remove(2)
+        self.assertFalse(CartItem.objects.exists())
+        
+        self.assertEqual(flush_journal(), (1, 1))
+        self.assertEqual(list(CartItem.objects.values_list('product_id', 'quantity')), [(1, 2)])
+        self.assertFalse(os.path.exists(get_journal_path()))
+        
+    def test_clear_and_remove_are_flushed(self):
+        """Тест: удаление товаров и очистка корзины применяются к БД."""
+        cart = UserCart(self.user)
+        cart.add(1)
+        cart.add(2)
+        flush_journal()
+        
+        cart.remove(1)
+        flush_journal()
+        self.assertEqual(list(CartItem.objects.values_list('product_id', flat=True)), [2])
+        
+        cart.clear()
+        cart.add(3)
+        flush_journal()
+        self.assertEqual(list(CartItem.objects.values_list('product_id', flat=True)), [3])
+        
+    def test_concurrent_adds_are_not_lost(self):
+        """Тест: параллельные добавления одного товара не затирают друг друга."""
+        cart = UserCart(self.user)
+        cart.items()
+        barrier = threading.Barrier(10)
+        
+        def add():
+            barrier.wait()
+            UserCart(self.user).add(7)
+            
+        threads = [threading.Thread(target=add) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+            
+        self.assertEqual(cart.items(), [(7, 10)])
+        flush_journal()
+        self.assertEqual(list(CartItem.objects.values_list('product_id', 'quantity')), [(7, 10)])
+        
+    def test_cache_miss_applies_journal_first(self):
+        """Тест: при вытеснении из кеша корзина не теряет несброшенные изменения."""
+        UserCart(self.user).add(7, 3)
+        cache.clear()
+        
+        self.assertEqual(UserCart(self.user).items(), [(7, 3)])
+        
+    def test_cache_miss_replays_only_user_entries(self):
+        """Тест: промах кеша не сбрасывает журнал других пользователей."""
+        other = User.objects.create_user(email='other@example.com', password='testpassword123')
+        UserCart(self.user).add(7, 3)
+        UserCart(other).add(8, 1)
+        cache.clear()
+        
+        with self.assertNumQueries(1):
+            self.assertEqual(UserCart(self.user).items(), [(7, 3)])
+        self.assertFalse(CartItem.objects.exists())
+        flush_journal()
+        self.assertEqual(CartItem.objects.count(), 2)
+        
+    def test_interrupted_flush_is_recovered(self):
+        """Тест: журнал, оставшийся после прерванного сброса, применяется повторно."""
+        UserCart(self.user).add(5, 2)
+        os.replace(get_journal_path(), get_journal_path() + '.flushing')
+        UserCart(self.user).add(6)
+        
+        self.assertEqual(flush_journal(), (2, 2))
+        self.assertEqual(
+            list(CartItem.objects.order_by('product_id').values_list('product_id', 'quantity')),
+            [(5, 2), (6, 1)]
+        )
+        
+    def test_flush_command(self):
+        """Тест команды flush_carts."""
+        UserCart(self.user).add(1)
+        out = StringIO()
+        
+        call_command('flush_carts', stdout=out)
+        
+        self.assertIn('Корзин: 1, записано строк: 1', out.getvalue())
+        
+    @override_settings(CART_WRITE_BEHIND=False)
+    def test_write_through_without_write_behind(self):
+        """Тест: без отложенной записи изменения сразу попадают в БД без журнала."""
+        cart = UserCart(self.user)
+        cart.add(1, 2)
+        cart.add(1)
+        cart.remove(3)
+        
+        self.assertEqual(list(CartItem.objects.values_list('product_id', 'quantity')), [(1, 3)])
+        self.assertEqual(cart.items(), [(1, 3)])
+        self.assertFalse(os.path.exists(get_journal_path()))
+        
+    def test_write_behind_requires_shared_cache(self):
+        """Тест: отложенная запись с кешем в памяти процесса не проходит проверку."""
+        self.assertEqual([error.id for error in check_write_behind(None)], ['cart.E001'])
+        with override_settings(CART_WRITE_BEHIND=False):
+            self.assertEqual(check_write_behind(None), [])
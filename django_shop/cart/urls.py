@@ -0,0 +1,16 @@
+"""
+URL конфигурация для приложения cart.
+"""
+
+from django.urls import path
+from . import views
+
+# Пространство имен для приложения
+app_name = 'cart'
+
+urlpatterns = [
+    path('', views.cart_detail, name='detail'),
+    path('add/', views.cart_add, name='add'),
+    path('update/', views.cart_update, name='update'),
+    path('remove/<int:product_id>/', views.cart_remove, name='remove'),
+]
@@ -0,0 +1,88 @@
+"""
+Представления (views) для приложения cart.
+
+Содержит логику обработки запросов для:
+- Просмотра корзины
+- Добавления товаров и изменения их количества
+- Удаления товаров из корзины
+"""
+
+from django.contrib import messages
+from django.shortcuts import render, redirect
+from django.views.decorators.http import require_POST
+
+from .cart import get_cart
+from .forms import CartItemForm
+
+
+def cart_detail(request):
+    """
+    Страница корзины.
+    
+    Args:
+        request: HTTP запрос
+        
+    Returns:
+        HttpResponse: Страница с содержимым корзины
+    """
+    items = get_cart(request).items()
+    context = {
+        'items': items,
+        'total_quantity': sum(quantity for _, quantity in items),
+    }
+    return render(request, 'cart/detail.html', context)
+
+
+@require_POST
+def cart_add(request):
+    """
+    Добавление товара в корзину.
+    
+    Args:
+        request: HTTP запрос с полями product_id и quantity
+        
+    Returns:
+        HttpResponse: Перенаправление на страницу корзины
+    """
+    form = CartItemForm(request.POST)
+    if form.is_valid() and form.cleaned_data['quantity']:
+        get_cart(request).add(form.cleaned_data['product_id'], form.cleaned_data['quantity'])
+        messages.success(request, 'Товар добавлен в корзину.')
+    else:
+        messages.error(request, 'Не удалось добавить товар в корзину.')
+    return redirect('cart:detail')
+
+
+@require_POST
+def cart_update(request):
+    """
+    Изменение количества товара в корзине (0 - удалить товар).
+    
+    Args:
+        request: HTTP запрос с полями product_id и quantity
+        
+    Returns:
+        HttpResponse: Перенаправление на страницу корзины
+    """
+    form = CartItemForm(request.POST)
+    if form.is_valid():
+        get_cart(request).set(form.cleaned_data['product_id'], form.cleaned_data['quantity'])
+    else:
+        messages.error(request, 'Некорректное количество товара.')
+    return redirect('cart:detail')
+
+
+@require_POST
+def cart_remove(request, product_id):
+    """
+    Удаление товара из корзины.
+    
+    Args:
+        request: HTTP запрос
+        product_id (int): Идентификатор товара
+        
+    Returns:
+        HttpResponse: Перенаправление на страницу корзины
+    """
+    get_cart(request).remove(product_id)
+    return redirect('cart:detail')
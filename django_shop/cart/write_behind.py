@@ -0,0 +1,365 @@
+"""
+Отложенная запись корзин пользователей (write-behind).
+
+Изменения корзины авторизованного пользователя не пишутся в БД сразу.
+Текущее состояние корзины хранится в кеше, а каждое изменение дописывается
+одной строкой в журнал CART_JOURNAL_PATH (JSONL, только добавление).
+Строка журнала содержит итоговые количества измененных товаров, поэтому
+повторное применение журнала безопасно.
+
+Команда flush_carts (по таймеру) или вызов flush_journal() (например,
+при оформлении заказа) применяет накопленный журнал к БД пачками
+и удаляет его. Если процесс упадет до сброса, журнал останется на диске
+и будет применен при следующем сбросе.
+
+Кеш должен быть общим для всех процессов, обслуживающих сайт
+(CACHE_BACKEND=file или внешний кеш): при locmem каждый процесс видит
+свою копию корзины. Поэтому отложенная запись включается настройкой
+CART_WRITE_BEHIND (по умолчанию - только при общем кеше), а проверка
+cart.E001 не дает запустить сайт с отложенной записью на locmem.
+Без отложенной записи изменения корзины сразу пишутся в БД.
+"""
+
+import json
+import logging
+import os
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Cart, CartItem
+
+
+logger = logging.getLogger(__name__)
+
+# Значения по умолчанию, если они не заданы в settings.py
+DEFAULT_STATE_TTL = 24 * 60 * 60
+DEFAULT_FLUSH_BATCH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL = 30
+
+
+def _lock(file, shared=False):
+    """
+    Блокирует открытый файл (flock) до его закрытия.
+
+    fcntl импортируется при первой блокировке, а не при загрузке модуля:
+    на платформах без fcntl (Windows) проект импортируется, а ошибка
+    возникает только при использовании отложенной записи корзин.
+
+    Args:
+        file: Открытый файл
+        shared (bool): Разделяемая блокировка (для чтения) вместо эксклюзивной
+    """
+    import fcntl
+    fcntl.flock(file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+
+
+def is_enabled():
+    """Включена ли отложенная запись корзин (CART_WRITE_BEHIND)."""
+    return getattr(settings, 'CART_WRITE_BEHIND', False)
+
+
+def get_journal_path():
+    """Путь к журналу изменений корзин."""
+    return str(getattr(settings, 'CART_JOURNAL_PATH', settings.BASE_DIR / 'cart_journal.jsonl'))
+
+
+def _state_key(user_id):
+    """Ключ кеша с состоянием корзины пользователя."""
+    return f'cart:state:{user_id}'
+
+
+def load_state(user_id):
+    """
+    Возвращает состояние корзины пользователя.
+
+    Обычно состояние берется из кеша. При промахе кеша корзина читается
+    из БД одним запросом, и поверх нее применяются еще не сброшенные
+    записи журнала этого пользователя (журнал целиком не сбрасывается).
+
+    Args:
+        user_id (int): Идентификатор пользователя
+
+    Returns:
+        dict: Товар -> количество
+    """
+    if not is_enabled():
+        return _read_db_state(user_id)
+    state = cache.get(_state_key(user_id))
+    if state is None:
+        # Разделяемая блокировка журнала: пока читаются журнал и БД,
+        # новые записи не дописываются и журнал не переименовывается
+        with _open_journal(get_journal_path(), shared=True):
+            state = _rebuild_state(user_id)
+        _save_state(user_id, state)
+    return state
+
+
+def _rebuild_state(user_id):
+    """
+    Собирает состояние корзины из БД и несброшенных записей журнала.
+
+    Вызывается под блокировкой журнала. Журнал читается до БД: если
+    сброс успеет применить и удалить журнал, БД уже будет его содержать,
+    а повторное применение записей безопасно.
+
+    Returns:
+        dict: Товар -> количество
+    """
+    clear, items = _read_user_changes(user_id)
+    state = {} if clear else _read_db_state(user_id)
+    _apply_items(state, items)
+    return state
+
+
+def _read_db_state(user_id):
+    """Читает корзину пользователя из БД одним запросом (товар -> количество)."""
+    return dict(
+        CartItem.objects
+        .filter(cart__user_id=user_id)
+        .order_by()
+        .values_list('product_id', 'quantity')
+    )
+
+
+def _apply_items(state, items):
+    """Применяет итоговые количества товаров к состоянию (0 - удалить товар)."""
+    for product_id, quantity in items.items():
+        if quantity:
+            state[product_id] = quantity
+        else:
+            state.pop(product_id, None)
+
+
+def _read_user_changes(user_id):
+    """
+    Сворачивает несброшенные записи журнала одного пользователя.
+
+    Returns:
+        tuple: (очистить ли корзину, {товар: количество})
+    """
+    path = get_journal_path()
+    clear, items = False, {}
+    # Журнал прерванного или идущего сброса старше текущего
+    for journal_path in (path + '.flushing', path):
+        try:
+            changes = _read_journal(journal_path, user_id=user_id)
+        except FileNotFoundError:
+            continue
+        if user_id in changes:
+            file_clear, file_items = changes[user_id]
+            if file_clear:
+                clear, items = True, {}
+            items.update(file_items)
+    return clear, items
+
+
+def _save_state(user_id, state):
+    """Сохраняет состояние корзины в кеш."""
+    cache.set(_state_key(user_id), state, getattr(settings, 'CART_STATE_TTL', DEFAULT_STATE_TTL))
+
+
+def update_state(user_id, compute, clear=False):
+    """
+    Изменяет корзину пользователя: читает состояние, вычисляет изменения
+    и записывает их в журнал и кеш.
+
+    Чтение, вычисление и запись выполняются под эксклюзивной блокировкой
+    журнала, поэтому параллельные изменения одной корзины (например,
+    двойной клик или перенос сессионной корзины при входе) не затирают
+    друг друга.
+
+    Args:
+        user_id (int): Идентификатор пользователя
+        compute (callable): Получает текущее состояние и возвращает
+            измененные товары -> итоговое количество (0 - удалить)
+        clear (bool): Очистить корзину перед применением изменений
+
+    Returns:
+        dict: Новое состояние корзины (товар -> количество)
+    """
+    if not is_enabled():
+        return _update_db_state(user_id, compute, clear)
+
+    with _open_journal(get_journal_path()) as journal:
+        state = {} if clear else cache.get(_state_key(user_id))
+        if state is None:
+            state = _rebuild_state(user_id)
+        changes = compute(state)
+        _apply_items(state, changes)
+        _write_record(journal, {'user': user_id, 'clear': clear, 'items': changes})
+        _save_state(user_id, state)
+    return state
+
+
+def _update_db_state(user_id, compute, clear):
+    """
+    Изменяет корзину сразу в БД (отложенная запись выключена).
+
+    Строка корзины блокируется на время чтения и записи, поэтому
+    параллельные изменения одной корзины выполняются по очереди.
+    """
+    with transaction.atomic():
+        Cart.objects.select_for_update().get_or_create(user_id=user_id)
+        state = {} if clear else _read_db_state(user_id)
+        changes = compute(state)
+        _apply_items(state, changes)
+        _apply_to_db({user_id: (clear, changes)})
+    return state
+
+
+def _open_journal(path, shared=False):
+    """
+    Открывает журнал на дозапись под блокировкой.
+
+    Если пока процесс ждал блокировку, журнал был переименован при сбросе,
+    файл открывается заново, чтобы запись не попала в уже прочитанный журнал.
+
+    Args:
+        path (str): Путь к журналу
+        shared (bool): Разделяемая блокировка (чтение журнала) вместо эксклюзивной
+
+    Returns:
+        file: Открытый и заблокированный файл журнала
+    """
+    while True:
+        journal = open(path, 'a', encoding='utf-8')
+        _lock(journal, shared=shared)
+        try:
+            if os.stat(path).st_ino == os.fstat(journal.fileno()).st_ino:
+                return journal
+        except FileNotFoundError:
+            pass
+        journal.close()
+
+
+def _write_record(journal, record):
+    """Дописывает одну запись в открытый и заблокированный журнал."""
+    journal.write(json.dumps(record, separators=(',', ':')) + '\n')
+    journal.flush()
+    if getattr(settings, 'CART_JOURNAL_FSYNC', False):
+        # Запись переживет не только падение процесса, но и отключение питания
+        os.fsync(journal.fileno())
+
+
+def flush_journal(batch_size=None):
+    """
+    Применяет журнал изменений корзин к БД.
+
+    Журнал атомарно переименовывается (новые изменения пишутся в новый
+    файл), применяется пачками и удаляется. Журнал, оставшийся от
+    прерванного сброса, применяется первым.
+
+    Args:
+        batch_size (int): Количество пользователей в одной транзакции
+
+    Returns:
+        tuple: (количество пользователей, количество записанных строк корзин)
+    """
+    batch_size = batch_size or getattr(settings, 'CART_FLUSH_BATCH_SIZE', DEFAULT_FLUSH_BATCH_SIZE)
+    path = get_journal_path()
+    pending_path = path + '.flushing'
+
+    # Одновременно журнал сбрасывает только один процесс, остальные ждут
+    with open(path + '.lock', 'a') as flush_lock:
+        _lock(flush_lock)
+
+        users = lines = 0
+        for _ in range(2):
+            if not os.path.exists(pending_path):
+                if not os.path.exists(path) or not os.path.getsize(path):
+                    break
+                with _open_journal(path):
+                    os.replace(path, pending_path)
+
+            changes = _read_journal(pending_path)
+            user_ids = list(changes)
+            for start in range(0, len(user_ids), batch_size):
+                batch = {user_id: changes[user_id] for user_id in user_ids[start:start + batch_size]}
+                lines += _apply_to_db(batch)
+            users += len(user_ids)
+            os.remove(pending_path)
+
+    return users, lines
+
+
+def _read_journal(path, user_id=None):
+    """
+    Сворачивает журнал в итоговые изменения по пользователям.
+
+    Args:
+        path (str): Путь к журналу
+        user_id (int): Читать записи только этого пользователя
+
+    Returns:
+        dict: Пользователь -> (очистить ли корзину, {товар: количество})
+    """
+    # Записи начинаются с id пользователя (см. update_state), поэтому
+    # чужие строки отбрасываются без разбора JSON
+    prefix = None if user_id is None else f'{{"user":{user_id},'
+    changes = {}
+    with open(path, encoding='utf-8') as journal:
+        for line_num, line in enumerate(journal, start=1):
+            if prefix is not None and not line.startswith(prefix):
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Недописанная строка (процесс упал во время записи)
+                logger.warning('Пропущена поврежденная строка %s журнала %s', line_num, path)
+                continue
+            clear, items = changes.get(record['user'], (False, {}))
+            if record['clear']:
+                clear, items = True, {}
+            items.update({int(product_id): quantity for product_id, quantity in record['items'].items()})
+            changes[record['user']] = (clear, items)
+    return changes
+
+
+def _apply_to_db(changes):
+    """
+    Применяет изменения корзин нескольких пользователей в одной транзакции.
+
+    Args:
+        changes (dict): Пользователь -> (очистить ли корзину, {товар: количество})
+
+    Returns:
+        int: Количество записанных строк корзин
+    """
+    with transaction.atomic():
+        # Пользователь мог быть удален, пока изменения ждали в журнале
+        user_ids = list(
+            get_user_model().objects.filter(pk__in=list(changes)).values_list('pk', flat=True)
+        )
+        Cart.objects.bulk_create(
+            [Cart(user_id=user_id) for user_id in user_ids],
+            ignore_conflicts=True
+        )
+        cart_ids = dict(
+            Cart.objects.filter(user_id__in=user_ids).values_list('user_id', 'id')
+        )
+
+        upserts = []
+        for user_id, (clear, items) in changes.items():
+            cart_id = cart_ids.get(user_id)
+            if cart_id is None:
+                continue
+            removed = [product_id for product_id, quantity in items.items() if not quantity]
+            if clear:
+                CartItem.objects.filter(cart_id=cart_id).delete()
+            elif removed:
+                CartItem.objects.filter(cart_id=cart_id, product_id__in=removed).delete()
+            upserts.extend(
+                CartItem(cart_id=cart_id, product_id=product_id, quantity=quantity)
+                for product_id, quantity in items.items() if quantity
+            )
+
+        CartItem.objects.bulk_create(
+            upserts,
+            update_conflicts=True,
+            unique_fields=['cart', 'product_id'],
+            update_fields=['quantity', 'updated_at'],
+        )
+    return len(upserts)
@@ -1,15 +1,20 @@
 #!/usr/bin/env python
 """
 Проверка статуса активации пользователя
+
+Обертка над management-командой user_status, которая читает
+пользователей потоком и поддерживает фильтры и форматы вывода:
+    python manage.py user_status --help
 """
 import os
+import sys
 import django
 
 # Настраиваем Django окружение
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'shop_project.settings')
 django.setup()
 
-from accounts.models import CustomUser
+from django.core.management import call_command
 
 def check_user_status():
     """
@@ -18,13 +23,7 @@ def check_user_status():
     print("👥 СТАТУС ПОЛЬЗОВАТЕЛЕЙ:")
     print("=" * 50)
     
-    for user in CustomUser.objects.all():
-        print(f"📧 {user.email}")
-        print(f"   ✅ Активен: {user.is_active}")
-        print(f"   📧 Email подтверждён: {getattr(user, 'email_confirmed', 'Нет поля')}")
-        print(f"   🕐 Создан: {user.date_joined.strftime('%Y-%m-%d %H:%M')}")
-        print(f"   👤 Администратор: {user.is_staff}")
-        print("-" * 40)
+    call_command('user_status', *sys.argv[1:])
 
 if __name__ == '__main__':
     check_user_status()
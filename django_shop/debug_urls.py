@@ -10,9 +10,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'shop_project.settings')
 django.setup()
 
 from accounts.models import CustomUser
-from django.contrib.auth.tokens import default_token_generator
-from django.utils.encoding import force_bytes
-from django.utils.http import urlsafe_base64_encode
+from accounts.tokens import activation_token_generator
 from django.urls import reverse
 
 def debug_activation_urls():
@@ -31,8 +29,8 @@ def debug_activation_urls():
         return
     
     # Генерируем новый токен
-    token = default_token_generator.make_token(user)
-    uid = urlsafe_base64_encode(force_bytes(user.pk))
+    link_args = activation_token_generator.make_link_args(user)
+    uid, token = link_args['uidb64'], link_args['token']
     
     print(f"🔑 UID: {uid}")
     print(f"🔑 Token: {token}")
@@ -13,9 +13,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'shop_project.settings')
 django.setup()
 
 from accounts.models import CustomUser
-from django.contrib.auth.tokens import default_token_generator
-from django.utils.encoding import force_bytes
-from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
+from accounts.tokens import activation_token_generator
 from django.urls import reverse
 from django.core.mail import send_mail
 from django.template.loader import render_to_string
@@ -84,14 +82,14 @@ def demonstrate_registration_process():
     print_step(3, "ГЕНЕРАЦИЯ ТОКЕНА АКТИВАЦИИ",
                "Django создает специальный одноразовый код для подтверждения")
     
-    token = default_token_generator.make_token(user)
-    uid = urlsafe_base64_encode(force_bytes(user.pk))
+    link_args = activation_token_generator.make_link_args(user)
+    uid, token = link_args['uidb64'], link_args['token']
     
     print(f"🔐 Токен активации: {token}")
     print(f"   📏 Длина: {len(token)} символов")
-    print(f"   🎯 Привязан к: пользователю ID={user.id}")
-    print(f"   ⏰ Срок действия: 24 часа")
-    print(f"   🔒 Одноразовый: да")
+    print(f"   🎯 Привязан к: пользователю ID={user.id} (подпись HMAC)")
+    print(f"   ⏰ Срок действия: {activation_token_generator.get_max_age() // 3600} часов")
+    print(f"   🔒 Одноразовый: да (активируется только ожидающий аккаунт)")
     print()
     print(f"🆔 Зашифрованный UID: {uid}")
     print(f"   📝 Расшифровка: {uid} → {user.id}")
@@ -171,37 +169,23 @@ def demonstrate_registration_process():
     print("🔍 Django выполняет проверки:")
     
     # Имитируем процесс проверки
-    print("   1. Расшифровка UID...")
-    try:
-        decoded_uid = urlsafe_base64_decode(uid).decode()
-        user_id = int(decoded_uid)
-        print(f"      ✅ {uid} → {user_id}")
-    except Exception as e:
-        print(f"      ❌ Ошибка расшифровки: {e}")
-        return
-    
-    print("   2. Поиск пользователя в базе...")
-    try:
-        found_user = CustomUser.objects.get(pk=user_id)
-        print(f"      ✅ Пользователь найден: {found_user.email}")
-    except CustomUser.DoesNotExist:
-        print(f"      ❌ Пользователь с ID {user_id} не найден")
+    print("   1. Проверка подписи и срока действия (без обращения к БД)...")
+    user_id = activation_token_generator.check_token(uid, token)
+    if user_id is None:
+        print(f"      ❌ Токен недействителен")
         return
-    
-    print("   3. Проверка токена...")
-    token_valid = default_token_generator.check_token(found_user, token)
-    if token_valid:
-        print(f"      ✅ Токен действителен")
+    print(f"      ✅ Подпись верна: {uid} → {user_id}")
+    
+    print("   2. Активация одним условным UPDATE...")
+    activated = CustomUser.objects.filter(
+        pk=user_id, is_active=False, email_confirmed=False
+    ).update(is_active=True, email_confirmed=True)
+    if activated:
+        print(f"      ✅ Пользователь активирован!")
     else:
-        print(f"      ❌ Токен недействителен")
+        print(f"      ❌ Аккаунт уже активирован или не найден")
         return
     
-    print("   4. Активация пользователя...")
-    found_user.is_active = True
-    found_user.email_confirmed = True
-    found_user.save()
-    print(f"      ✅ Пользователь активирован!")
-    
     # Шаг 8: Результат
     print_step(8, "РЕЗУЛЬТАТ АКТИВАЦИИ",
                "Пользователь получает подтверждение и может войти в систему")
@@ -16,9 +16,8 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'shop_project.settings')
 django.setup()
 
 from accounts.models import CustomUser
-from django.contrib.auth.tokens import default_token_generator
-from django.utils.http import urlsafe_base64_encode
-from django.utils.encoding import force_bytes
+from accounts.stats import get_user_stats
+from accounts.tokens import activation_token_generator
 
 
 def test_user_creation():
@@ -56,15 +55,15 @@ def test_token_generation(user):
     print("\n🔑 Тестирование генерации токенов...")
     
     # Генерируем токен активации
-    token = default_token_generator.make_token(user)
-    uid = urlsafe_base64_encode(force_bytes(user.pk))
+    link_args = activation_token_generator.make_link_args(user)
+    uid, token = link_args['uidb64'], link_args['token']
     
     print(f"✅ Сгенерирован токен для пользователя {user.email}")
     print(f"   UID: {uid}")
     print(f"   Token: {token}")
     
     # Проверяем токен
-    is_valid = default_token_generator.check_token(user, token)
+    is_valid = activation_token_generator.check_token(uid, token) == user.pk
     print(f"   Токен действителен: {is_valid}")
     
     return token, uid
@@ -124,15 +123,13 @@ def show_statistics():
     """Показывает статистику пользователей."""
     print("\n📊 Статистика пользователей:")
     
-    total_users = CustomUser.objects.count()
-    active_users = CustomUser.objects.filter(is_active=True).count()
-    confirmed_users = CustomUser.objects.filter(email_confirmed=True).count()
-    staff_users = CustomUser.objects.filter(is_staff=True).count()
+    # Все счетчики считаются одним запросом
+    stats = get_user_stats(use_cache=False)
     
-    print(f"   Всего пользователей: {total_users}")
-    print(f"   Активных: {active_users}")
-    print(f"   С подтвержденным email: {confirmed_users}")
-    print(f"   Сотрудников: {staff_users}")
+    print(f"   Всего пользователей: {stats['total']}")
+    print(f"   Активных: {stats['active']}")
+    print(f"   С подтвержденным email: {stats['confirmed']}")
+    print(f"   Сотрудников: {stats['staff']}")
     
     # Показываем всех пользователей
     print(f"\n📝 Список всех пользователей:")
@@ -0,0 +1,2 @@
+# Файл инициализации приложения orders
+# Этот файл делает директорию Python пакетом
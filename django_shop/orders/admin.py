@@ -0,0 +1,56 @@
+"""
+Настройка административной панели для приложения orders.
+"""
+
+from django.contrib import admin
+
+from .models import Order, OrderLine, UserOrderStats
+
+
+class OrderLineInline(admin.TabularInline):
+    """Строки заказа на странице заказа."""
+    
+    model = OrderLine
+    extra = 0
+
+
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    """
+    Административная панель заказов.
+    """
+    
+    list_display = ('id', 'user', 'status', 'total', 'created_at')
+    
+    list_filter = ('status',)
+    
+    list_select_related = ('user',)
+    
+    search_fields = ('user__email',)
+    
+    raw_id_fields = ('user',)
+    
+    inlines = [OrderLineInline]
+
+
+@admin.register(UserOrderStats)
+class UserOrderStatsAdmin(admin.ModelAdmin):
+    """
+    Сводки по заказам (только просмотр: их ведет orders.services).
+    """
+    
+    list_display = ('user', 'order_count', 'total_spent', 'last_order_at')
+    
+    list_select_related = ('user',)
+    
+    search_fields = ('user__email',)
+    
+    raw_id_fields = ('user',)
+    
+    def has_add_permission(self, request):
+        """Сводки создаются автоматически."""
+        return False
+        
+    def has_change_permission(self, request, obj=None):
+        """Сводки исправляет команда repair_order_stats."""
+        return False
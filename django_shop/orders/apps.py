@@ -0,0 +1,22 @@
+"""
+Конфигурация приложения orders.
+
+Это приложение отвечает за:
+- Заказы пользователей и их строки
+- Историю заказов в личном кабинете
+"""
+
+from django.apps import AppConfig
+
+
+class OrdersConfig(AppConfig):
+    """Конфигурация приложения orders."""
+    
+    # Тип поля по умолчанию для автоинкрементных первичных ключей
+    default_auto_field = 'django.db.models.BigAutoField'
+    
+    # Имя приложения
+    name = 'orders'
+    
+    # Человеко-читаемое имя приложения
+    verbose_name = 'Заказы'
@@ -0,0 +1,107 @@
+"""
+Пересчет сводок по заказам (UserOrderStats) из таблицы заказов.
+
+Нужна после изменений заказов в обход orders.services (админ-панель,
+ручные правки в БД) или для заполнения сводок по старым заказам.
+Пользователи обрабатываются пачками по диапазонам первичного ключа:
+на пачку один агрегирующий запрос и один upsert.
+
+Примеры:
+    python manage.py repair_order_stats
+    python manage.py repair_order_stats --batch-size 5000
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+
+from orders.models import Order, UserOrderStats
+
+
+class Command(BaseCommand):
+    """Пересчитывает сводки по заказам всех пользователей."""
+
+    help = 'Пересчитывает количество заказов, потраченную сумму и дату последнего заказа'
+
+    def add_arguments(self, parser):
+        """Регистрирует аргументы командной строки."""
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество пользователей в одной пачке'
+        )
+
+    def handle(self, *args, **options):
+        """Обходит пользователей пачками и пересчитывает сводки."""
+        user_ids = get_user_model().objects.order_by('pk').values_list('pk', flat=True)
+        batch_size = options['batch_size']
+        last_pk = 0
+        users = changed = 0
+
+        while True:
+            batch = list(user_ids.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1]
+            users += len(batch)
+            changed += self.repair_batch(batch[0], last_pk)
+
+        self.stdout.write(f'Пользователей: {users}, исправлено сводок: {changed}')
+
+    def repair_batch(self, first_pk, last_pk):
+        """
+        Пересчитывает сводки пользователей с первичным ключом в [first_pk, last_pk].
+
+        Returns:
+            int: Количество сводок, которые отличались от пересчитанных
+        """
+        active = ~Q(status=Order.STATUS_CANCELLED)
+        expected = {
+            row['user_id']: UserOrderStats(
+                user_id=row['user_id'],
+                order_count=row['order_count'],
+                total_spent=row['total_spent'] or 0,
+                last_order_at=row['last_order_at'],
+            )
+            for row in (
+                Order.objects
+                .filter(user_id__gte=first_pk, user_id__lte=last_pk)
+                .order_by()
+                .values('user_id')
+                .annotate(
+                    order_count=Count('pk', filter=active),
+                    total_spent=Sum('total', filter=active),
+                    last_order_at=Max('created_at', filter=active),
+                )
+            )
+        }
+
+        with transaction.atomic():
+            current = {
+                stats.user_id: stats
+                for stats in UserOrderStats.objects.filter(user_id__gte=first_pk, user_id__lte=last_pk)
+            }
+            # Сводки пользователей, у которых больше нет заказов, обнуляются
+            for user_id in current.keys() - expected.keys():
+                expected[user_id] = UserOrderStats(user_id=user_id)
+
+            stale = [
+                stats for user_id, stats in expected.items()
+                if self.as_tuple(current.get(user_id)) != self.as_tuple(stats)
+            ]
+            UserOrderStats.objects.bulk_create(
+                stale,
+                update_conflicts=True,
+                unique_fields=['user'],
+                update_fields=['order_count', 'total_spent', 'last_order_at'],
+            )
+        return len(stale)
+
+    @staticmethod
+    def as_tuple(stats):
+        """Значения сводки для сравнения (None - сводки нет)."""
+        if stats is None:
+            return None
+        return stats.order_count, stats.total_spent, stats.last_order_at
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:30
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Order',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('new', 'Новый'), ('paid', 'Оплачен'), ('shipped', 'Отправлен'), ('completed', 'Выполнен'), ('cancelled', 'Отменен')], default='new', max_length=20, verbose_name='Статус')),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Сумма заказа')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Создан')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='orders', to=settings.AUTH_USER_MODEL, verbose_name='Покупатель')),
+            ],
+            options={
+                'verbose_name': 'Заказ',
+                'verbose_name_plural': 'Заказы',
+                'ordering': ['-created_at', '-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='OrderLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_id', models.PositiveIntegerField(help_text='Идентификатор товара', verbose_name='Товар')),
+                ('quantity', models.PositiveIntegerField(verbose_name='Количество')),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Цена за единицу')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='orders.order', verbose_name='Заказ')),
+            ],
+            options={
+                'verbose_name': 'Строка заказа',
+                'verbose_name_plural': 'Строки заказа',
+                'ordering': ['order', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', '-created_at', '-id', 'status', 'total'], name='orders_user_history_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:32
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_outgoingemail_template'),
+        ('orders', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserOrderStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='order_stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Покупатель')),
+                ('order_count', models.PositiveIntegerField(default=0, verbose_name='Количество заказов')),
+                ('total_spent', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Потрачено всего')),
+                ('last_order_at', models.DateTimeField(blank=True, null=True, verbose_name='Последний заказ')),
+            ],
+            options={
+                'verbose_name': 'Сводка по заказам',
+                'verbose_name_plural': 'Сводки по заказам',
+            },
+        ),
+    ]
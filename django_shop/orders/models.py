@@ -0,0 +1,165 @@
+"""
+Модели приложения orders.
+
+Каталога товаров в проекте пока нет, поэтому строка заказа хранит
+идентификатор товара и цену на момент покупки.
+"""
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class Order(models.Model):
+    """
+    Заказ пользователя.
+    """
+    
+    STATUS_NEW = 'new'
+    STATUS_PAID = 'paid'
+    STATUS_SHIPPED = 'shipped'
+    STATUS_COMPLETED = 'completed'
+    STATUS_CANCELLED = 'cancelled'
+    
+    STATUS_CHOICES = [
+        (STATUS_NEW, 'Новый'),
+        (STATUS_PAID, 'Оплачен'),
+        (STATUS_SHIPPED, 'Отправлен'),
+        (STATUS_COMPLETED, 'Выполнен'),
+        (STATUS_CANCELLED, 'Отменен'),
+    ]
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='orders',
+        verbose_name='Покупатель'
+    )
+    
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_NEW,
+        verbose_name='Статус'
+    )
+    
+    total = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        verbose_name='Сумма заказа'
+    )
+    
+    created_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Создан'
+    )
+    
+    class Meta:
+        """Метаданные модели."""
+        verbose_name = 'Заказ'
+        verbose_name_plural = 'Заказы'
+        ordering = ['-created_at', '-id']
+        indexes = [
+            # История заказов в личном кабинете: поиск по (user, created_at, id)
+            # и сортировка по убыванию без отдельной сортировки. status и total
+            # добавлены в ключ, чтобы страница истории читалась только из индекса
+            models.Index(
+                fields=['user', '-created_at', '-id', 'status', 'total'],
+                name='orders_user_history_idx'
+            ),
+        ]
+        
+    def __str__(self):
+        """Строковое представление заказа."""
+        return f'Заказ №{self.pk}'
+
+
+class OrderLine(models.Model):
+    """
+    Строка заказа: товар, количество и цена на момент покупки.
+    """
+    
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name='lines',
+        verbose_name='Заказ'
+    )
+    
+    product_id = models.PositiveIntegerField(
+        verbose_name='Товар',
+        help_text='Идентификатор товара'
+    )
+    
+    quantity = models.PositiveIntegerField(
+        verbose_name='Количество'
+    )
+    
+    unit_price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        verbose_name='Цена за единицу'
+    )
+    
+    class Meta:
+        """Метаданные модели."""
+        verbose_name = 'Строка заказа'
+        verbose_name_plural = 'Строки заказа'
+        ordering = ['order', 'id']
+        
+    def __str__(self):
+        """Строковое представление строки заказа."""
+        return f'Товар {self.product_id} x {self.quantity}'
+    
+    @property
+    def line_total(self):
+        """Стоимость строки."""
+        return self.unit_price * self.quantity
+
+
+class UserOrderStats(models.Model):
+    """
+    Сводка по заказам пользователя для личного кабинета.
+    
+    Счетчики обновляются в той же транзакции, что и заказы
+    (orders.services), поэтому личный кабинет читает одну строку
+    вместо агрегации всех заказов. Отмененные заказы в счетчики
+    не входят. Изменения заказов в обход orders.services (например,
+    в админ-панели) исправляет команда repair_order_stats.
+    """
+    
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='order_stats',
+        verbose_name='Покупатель'
+    )
+    
+    order_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество заказов'
+    )
+    
+    total_spent = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        verbose_name='Потрачено всего'
+    )
+    
+    last_order_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Последний заказ'
+    )
+    
+    class Meta:
+        """Метаданные модели."""
+        verbose_name = 'Сводка по заказам'
+        verbose_name_plural = 'Сводки по заказам'
+        
+    def __str__(self):
+        """Строковое представление сводки."""
+        return f'Заказы пользователя {self.user_id}: {self.order_count}'
@@ -0,0 +1,117 @@
+"""
+Постраничный вывод истории заказов по ключу (keyset pagination).
+
+Вместо OFFSET следующая страница запрашивается условием
+"заказы старше последнего показанного" по (created_at, id). Запрос
+идет по индексу orders_user_history_idx и читает только строки
+страницы, поэтому время ответа не зависит от номера страницы.
+"""
+
+import base64
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+
+from .models import Order
+
+
+# Размер страницы по умолчанию, если он не задан в settings.py
+DEFAULT_PAGE_SIZE = 10
+
+
+class OrderHistoryPage:
+    """
+    Страница истории заказов.
+    
+    Attributes:
+        orders (list): Заказы страницы (со строками)
+        next_cursor (str): Курсор следующей страницы или None для последней
+    """
+    
+    def __init__(self, orders, next_cursor):
+        """
+        Инициализация страницы.
+        
+        Args:
+            orders (list): Заказы страницы
+            next_cursor (str): Курсор следующей страницы
+        """
+        self.orders = orders
+        self.next_cursor = next_cursor
+        
+    @property
+    def has_next(self):
+        """Есть ли следующая страница."""
+        return self.next_cursor is not None
+
+
+def encode_cursor(order):
+    """
+    Кодирует позицию заказа в курсор для URL.
+    
+    Args:
+        order (Order): Последний заказ страницы
+        
+    Returns:
+        str: Курсор
+    """
+    raw = f'{order.created_at.isoformat()}|{order.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Разбирает курсор.
+    
+    Args:
+        cursor (str): Курсор из URL
+        
+    Returns:
+        tuple: (created_at, id) или None для пустого или поврежденного курсора
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, pk = raw.split('|')
+        return datetime.fromisoformat(created_at), int(pk)
+    except ValueError:
+        return None
+
+
+def get_order_history_page(user, cursor=None, page_size=None):
+    """
+    Возвращает страницу истории заказов пользователя.
+    
+    Выполняет два запроса: заказы страницы и их строки (prefetch_related).
+    
+    Args:
+        user (CustomUser): Покупатель
+        cursor (str): Курсор из предыдущей страницы (None - первая страница)
+        page_size (int): Количество заказов на странице
+        
+    Returns:
+        OrderHistoryPage: Страница истории
+    """
+    page_size = page_size or getattr(settings, 'ORDER_HISTORY_PAGE_SIZE', DEFAULT_PAGE_SIZE)
+    orders = Order.objects.filter(user_id=user.pk)
+    
+    position = decode_cursor(cursor)
+    if position is not None:
+        created_at, pk = position
+        # Условие записано так, чтобы индекс (user, created_at, id) сразу
+        # находил начало страницы: created_at <= X отсекает все более новые заказы
+        orders = orders.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk),
+            created_at__lte=created_at,
+        )
+    
+    # Одна лишняя строка показывает, есть ли следующая страница
+    orders = list(
+        orders
+        .order_by('-created_at', '-id')
+        .prefetch_related('lines')[:page_size + 1]
+    )
+    next_cursor = encode_cursor(orders[page_size - 1]) if len(orders) > page_size else None
+    return OrderHistoryPage(orders[:page_size], next_cursor)
@@ -0,0 +1,128 @@
+"""
+Операции с заказами.
+
+Все изменения заказов, влияющие на сводку UserOrderStats, выполняются
+здесь: счетчики обновляются в той же транзакции, что и сам заказ.
+"""
+
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import DateTimeField, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Order, OrderLine, UserOrderStats
+
+
+def place_order(user, lines):
+    """
+    Создает заказ со строками и обновляет сводку в одной транзакции.
+    
+    Args:
+        user (CustomUser): Покупатель
+        lines: Итератор кортежей (product_id, количество, цена за единицу)
+        
+    Returns:
+        Order: Созданный заказ
+        
+    Raises:
+        ValueError: Если в заказе нет строк
+    """
+    order_lines = [
+        OrderLine(product_id=product_id, quantity=quantity, unit_price=Decimal(unit_price))
+        for product_id, quantity, unit_price in lines
+    ]
+    if not order_lines:
+        raise ValueError('Заказ не содержит товаров')
+    
+    with transaction.atomic():
+        order = Order.objects.create(
+            user=user,
+            total=sum(line.line_total for line in order_lines),
+        )
+        for line in order_lines:
+            line.order = order
+        OrderLine.objects.bulk_create(order_lines)
+        _update_stats(user.pk, 1, order.total, order.created_at)
+    return order
+
+
+def cancel_order(order):
+    """
+    Отменяет заказ и исключает его из сводки покупателя.
+    
+    Args:
+        order (Order): Заказ
+        
+    Returns:
+        bool: False, если заказ уже был отменен
+    """
+    with transaction.atomic():
+        # Условный UPDATE защищает от двойного вычитания при параллельной отмене
+        cancelled = (
+            Order.objects
+            .filter(pk=order.pk)
+            .exclude(status=Order.STATUS_CANCELLED)
+            .update(status=Order.STATUS_CANCELLED)
+        )
+        if cancelled:
+            _update_stats(order.user_id, -1, -order.total)
+            # Последний заказ мог быть отмененным: берем самый новый из
+            # оставшихся (по индексу заказов покупателя по дате), как repair_order_stats
+            UserOrderStats.objects.filter(user_id=order.user_id).update(last_order_at=Subquery(
+                Order.objects
+                .filter(user_id=OuterRef('user_id'))
+                .exclude(status=Order.STATUS_CANCELLED)
+                .order_by('-created_at')
+                .values('created_at')[:1]
+            ))
+    order.status = Order.STATUS_CANCELLED
+    return bool(cancelled)
+
+
+def get_order_stats(user):
+    """
+    Возвращает сводку по заказам пользователя одним чтением строки.
+    
+    Args:
+        user (CustomUser): Покупатель
+        
+    Returns:
+        UserOrderStats: Сводка (несохраненная нулевая, если заказов не было)
+    """
+    return UserOrderStats.objects.filter(user_id=user.pk).first() or UserOrderStats(user_id=user.pk)
+
+
+def _update_stats(user_id, count_delta, spent_delta, order_at=None):
+    """
+    Изменяет сводку покупателя одним UPDATE (или создает ее).
+    
+    Args:
+        user_id (int): Идентификатор покупателя
+        count_delta (int): Изменение количества заказов
+        spent_delta (Decimal): Изменение потраченной суммы
+        order_at (datetime): Время нового заказа
+    """
+    updates = {
+        'order_count': F('order_count') + count_delta,
+        'total_spent': F('total_spent') + spent_delta,
+    }
+    if order_at is not None:
+        order_at_value = Value(order_at, output_field=DateTimeField())
+        # Coalesce нужен для первой записи: GREATEST(NULL, x) в SQLite дает NULL
+        updates['last_order_at'] = Coalesce(Greatest('last_order_at', order_at_value), order_at_value)
+    
+    if UserOrderStats.objects.filter(user_id=user_id).update(**updates) or count_delta < 0:
+        return
+    
+    try:
+        with transaction.atomic():
+            UserOrderStats.objects.create(
+                user_id=user_id,
+                order_count=count_delta,
+                total_spent=spent_delta,
+                last_order_at=order_at,
+            )
+    except IntegrityError:
+        # Сводку только что создал параллельный заказ
+        UserOrderStats.objects.filter(user_id=user_id).update(**updates)
@@ -0,0 +1,207 @@
+"""
+Тесты для приложения orders.
+
+Содержит тесты для:
+- Создания заказов
+- Постраничной истории заказов по ключу
+- Истории заказов в личном кабинете
+- Сводки по заказам пользователя и ее пересчета
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.core.management import call_command
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Order, OrderLine, UserOrderStats
+from .pagination import decode_cursor, get_order_history_page
+from .services import cancel_order, place_order
+
+User = get_user_model()
+
+
+class OrderTestMixin:
+    """Общая настройка: покупатель с подтвержденным email."""
+    
+    def setUp(self):
+        """Создание покупателя."""
+        self.user = User.objects.create_user(
+            email='buyer@example.com',
+            password='testpassword123',
+            is_active=True,
+            email_confirmed=True
+        )
+        
+    def create_orders(self, count, same_time=False):
+        """Создает count заказов с возрастающим (или одинаковым) временем."""
+        now = timezone.now()
+        orders = Order.objects.bulk_create([
+            Order(
+                user=self.user,
+                total=Decimal('100.00'),
+                created_at=now if same_time else now - timedelta(minutes=count - i),
+            )
+            for i in range(count)
+        ])
+        OrderLine.objects.bulk_create([
+            OrderLine(order=order, product_id=1, quantity=1, unit_price=Decimal('100.00'))
+            for order in orders
+        ])
+        return orders
+
+
+class PlaceOrderTest(OrderTestMixin, TestCase):
+    """Тесты создания заказа."""
+    
+    def test_place_order(self):
+        """Тест: заказ создается со строками и суммой."""
+        order = place_order(self.user, [(1, 2, '10.50'), (2, 1, '5.00')])
+        
+        self.assertEqual(order.total, Decimal('26.00'))
+        self.assertEqual(order.lines.count(), 2)
+        
+    def test_empty_order_rejected(self):
+        """Тест: заказ без строк не создается."""
+        with self.assertRaises(ValueError):
+            place_order(self.user, [])
+        self.assertFalse(Order.objects.exists())
+
+
+
+class OrderHistoryPaginationTest(OrderTestMixin, TestCase):
+    """Тесты постраничной истории заказов."""
+    
+    def collect_pages(self, page_size):
+        """Проходит все страницы истории и возвращает идентификаторы заказов."""
+        seen, cursor = [], None
+        while True:
+            page = get_order_history_page(self.user, cursor, page_size=page_size)
+            seen.extend(order.pk for order in page.orders)
+            if not page.has_next:
+                return seen
+            cursor = page.next_cursor
+            
+    def test_pages_cover_all_orders_newest_first(self):
+        """Тест: страницы содержат все заказы от новых к старым без повторов."""
+        orders = self.create_orders(23)
+        
+        self.assertEqual(self.collect_pages(5), [order.pk for order in reversed(orders)])
+        
+    def test_orders_with_same_timestamp(self):
+        """Тест: заказы с одинаковым временем не теряются на границе страниц."""
+        orders = self.create_orders(7, same_time=True)
+        
+        self.assertEqual(sorted(self.collect_pages(3)), sorted(order.pk for order in orders))
+        
+    def test_other_users_orders_hidden(self):
+        """Тест: в истории только заказы пользователя."""
+        other = User.objects.create_user(email='other@example.com', password='testpassword123')
+        place_order(other, [(1, 1, '1.00')])
+        
+        self.assertEqual(get_order_history_page(self.user).orders, [])
+        
+    def test_invalid_cursor_returns_first_page(self):
+        """Тест: поврежденный курсор ведет на первую страницу."""
+        self.assertIsNone(decode_cursor('not-a-cursor'))
+        self.create_orders(2)
+        
+        self.assertEqual(len(get_order_history_page(self.user, 'not-a-cursor').orders), 2)
+        
+    def test_page_uses_history_index(self):
+        """Тест: страница читается по индексу без сортировки и двумя запросами."""
+        self.create_orders(30)
+        cursor = get_order_history_page(self.user, page_size=10).next_cursor
+        
+        with CaptureQueriesContext(connection) as ctx:
+            get_order_history_page(self.user, cursor, page_size=10)
+        
+        self.assertEqual(len(ctx.captured_queries), 2)
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as db_cursor:
+                db_cursor.execute('EXPLAIN QUERY PLAN ' + ctx.captured_queries[0]['sql'])
+                plan = ' '.join(row[3] for row in db_cursor.fetchall())
+            self.assertIn('orders_user_history_idx', plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+
+
+class ProfileOrderHistoryTest(OrderTestMixin, TestCase):
+    """Тесты истории заказов в личном кабинете."""
+    
+    def test_profile_shows_orders(self):
+        """Тест: личный кабинет показывает заказы и ссылку на следующую страницу."""
+        with self.settings(ORDER_HISTORY_PAGE_SIZE=2):
+            orders = self.create_orders(3)
+            self.client.login(email='buyer@example.com', password='testpassword123')
+            
+            response = self.client.get(reverse('accounts:profile'))
+            
+        self.assertContains(response, f'Заказ №{orders[-1].pk}')
+        self.assertNotContains(response, f'Заказ №{orders[0].pk}<')
+        self.assertContains(response, 'orders_before=')
+
+
+class UserOrderStatsTest(OrderTestMixin, TestCase):
+    """Тесты сводки по заказам пользователя."""
+    
+    def test_place_order_updates_stats(self):
+        """Тест: каждый заказ увеличивает счетчики сводки."""
+        place_order(self.user, [(1, 2, '10.00')])
+        order = place_order(self.user, [(2, 1, '5.50')])
+        
+        stats = UserOrderStats.objects.get(user=self.user)
+        self.assertEqual(stats.order_count, 2)
+        self.assertEqual(stats.total_spent, Decimal('25.50'))
+        self.assertEqual(stats.last_order_at, order.created_at)
+        
+    def test_cancel_order_updates_stats_once(self):
+        """Тест: отмена вычитает заказ из сводки один раз."""
+        first = place_order(self.user, [(1, 1, '10.00')])
+        order = place_order(self.user, [(2, 1, '5.00')])
+        
+        self.assertTrue(cancel_order(order))
+        self.assertFalse(cancel_order(order))
+        
+        stats = UserOrderStats.objects.get(user=self.user)
+        self.assertEqual(stats.order_count, 1)
+        self.assertEqual(stats.total_spent, Decimal('10.00'))
+        # Дата последнего заказа - у оставшегося заказа, как считает repair_order_stats
+        self.assertEqual(stats.last_order_at, first.created_at)
+        out = StringIO()
+        call_command('repair_order_stats', stdout=out)
+        self.assertIn('исправлено сводок: 0', out.getvalue())
+        self.assertEqual(Order.objects.get(pk=order.pk).status, Order.STATUS_CANCELLED)
+        
+    def test_repair_command(self):
+        """Тест: команда пересчитывает сводки, созданные в обход сервиса."""
+        orders = self.create_orders(3)
+        Order.objects.filter(pk=orders[0].pk).update(status=Order.STATUS_CANCELLED)
+        other = User.objects.create_user(email='other@example.com', password='testpassword123')
+        UserOrderStats.objects.create(user=other, order_count=5, total_spent=Decimal('50.00'))
+        out = StringIO()
+        
+        call_command('repair_order_stats', batch_size=1, stdout=out)
+        
+        stats = UserOrderStats.objects.get(user=self.user)
+        self.assertEqual(stats.order_count, 2)
+        self.assertEqual(stats.total_spent, Decimal('200.00'))
+        self.assertEqual(stats.last_order_at, orders[-1].created_at)
+        self.assertEqual(UserOrderStats.objects.get(user=other).order_count, 0)
+        self.assertIn('исправлено сводок: 2', out.getvalue())
+        
+    def test_profile_shows_stats(self):
+        """Тест: личный кабинет показывает счетчики из сводки."""
+        place_order(self.user, [(1, 3, '100.00')])
+        self.client.login(email='buyer@example.com', password='testpassword123')
+        
+        response = self.client.get(reverse('accounts:profile'))
+        
+        self.assertEqual(response.context['order_stats'].order_count, 1)
+        self.assertContains(response, '300,00 ₽')
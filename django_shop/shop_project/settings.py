@@ -7,6 +7,8 @@ Django settings for shop_project project.
 from pathlib import Path
 import os
 
+from django.conf import global_settings
+
 # Базовая директория проекта
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -29,6 +31,8 @@ INSTALLED_APPS = [
     'django.contrib.messages',       # Система сообщений
     'django.contrib.staticfiles',    # Обработка статических файлов
     'accounts',                      # Наше приложение для работы с пользователями
+    'cart',                          # Корзина покупок
+    'orders',                        # Заказы и история заказов
 ]
 
 # Промежуточное ПО (Middleware)
@@ -74,6 +78,52 @@ DATABASES = {
     }
 }
 
+# Кеш. Тип хранилища выбирается переменной окружения CACHE_BACKEND:
+#   locmem - память процесса (по умолчанию, годится для одного процесса)
+#   file   - файлы в CACHE_DIR (общий для всех процессов на одной машине)
+# При переполнении кеш удаляет 1/CULL_FREQUENCY записей (MAX_ENTRIES).
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+}
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+CACHE_DIR = os.environ.get('CACHE_DIR', str(BASE_DIR / 'cache'))
+
+
+def _cache_config(name, max_entries, timeout=300):
+    """Собирает настройки одного кеша для выбранного CACHE_BACKEND."""
+    return {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        # Для locmem LOCATION - имя области памяти, для file - каталог
+        'LOCATION': os.path.join(CACHE_DIR, name) if CACHE_BACKEND == 'file' else name,
+        'TIMEOUT': timeout,
+        'OPTIONS': {
+            'MAX_ENTRIES': max_entries,
+            'CULL_FREQUENCY': 4,
+        },
+    }
+
+
+CACHES = {
+    'default': _cache_config('default', max_entries=5000),
+    # Сессии хранятся отдельно, чтобы прочие данные не вытесняли их из кеша
+    'sessions': _cache_config('sessions', max_entries=50000, timeout=None),
+}
+
+# Хранилище сессий выбирается переменной окружения SESSION_STORE:
+#   cached_db - чтение из кеша, запись в кеш и БД (по умолчанию)
+#   cache     - только кеш, без обращений к БД (с locmem сессии живут
+#               до перезапуска процесса и не видны другим процессам)
+#   db        - только БД, как в Django по умолчанию
+SESSION_ENGINES = {
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'db': 'django.contrib.sessions.backends.db',
+}
+SESSION_STORE = os.environ.get('SESSION_STORE', 'cached_db')
+SESSION_ENGINE = SESSION_ENGINES[SESSION_STORE]
+SESSION_CACHE_ALIAS = 'sessions'
+
 # Валидация паролей
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -90,6 +140,33 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Хеширование паролей
+# Профиль выбирается переменной окружения PASSWORD_HASHER_PROFILE.
+# Первый хешер в списке используется для новых паролей, остальные - только
+# для проверки старых хешей. Пароли, захешированные не предпочтительным
+# алгоритмом, прозрачно перехешируются при следующем успешном входе.
+# Для профиля argon2 нужен пакет argon2-cffi (см. requirements.txt).
+PASSWORD_HASHER_PROFILES = {
+    'pbkdf2': 'accounts.hashers.ConfigurablePBKDF2PasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'scrypt': 'django.contrib.auth.hashers.ScryptPasswordHasher',
+}
+PASSWORD_HASHER_PROFILE = os.environ.get('PASSWORD_HASHER_PROFILE', 'pbkdf2')
+# Остальные стандартные хешеры Django (pbkdf2_sha1, bcrypt_sha256) нужны
+# для проверки хешей, перенесенных из других систем; стандартный PBKDF2
+# не добавляется - алгоритм pbkdf2_sha256 уже обслуживает наш хешер.
+PASSWORD_HASHERS = [PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE]] + [
+    hasher for name, hasher in PASSWORD_HASHER_PROFILES.items()
+    if name != PASSWORD_HASHER_PROFILE
+] + [
+    hasher for hasher in global_settings.PASSWORD_HASHERS
+    if hasher not in PASSWORD_HASHER_PROFILES.values()
+    and hasher != 'django.contrib.auth.hashers.PBKDF2PasswordHasher'
+]
+
+# Количество итераций PBKDF2 (по умолчанию как в Django 4.2)
+PBKDF2_ITERATIONS = int(os.environ.get('PBKDF2_ITERATIONS', 600000))
+
 # Интернационализация
 LANGUAGE_CODE = 'ru-ru'  # Русский язык
 TIME_ZONE = 'Europe/Moscow'  # Московское время
@@ -112,13 +189,42 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Указываем нашу кастомную модель пользователя
 AUTH_USER_MODEL = 'accounts.CustomUser'
 
+# Бэкенд аутентификации: загружает пользователя по email одним запросом
+AUTHENTICATION_BACKENDS = [
+    'accounts.backends.EmailBackend',
+]
+
+# auth.W004: у поля email нет unique=True, потому что уникальность email
+# без учета регистра обеспечивает функциональное ограничение
+# accounts_user_email_ci_unique (UNIQUE по LOWER(email)). Отдельный
+# регистрозависимый индекс был бы лишним, а EmailBackend ищет
+# пользователя по LOWER(email), где дубликатов не бывает
+SILENCED_SYSTEM_CHECKS = ['auth.W004']
+
 # Настройки email для отправки писем
+# Все письма проходят через RecordingEmailBackend, который записывает их
+# в журнал EMAIL_LOG_PATH и передает бэкенду EMAIL_RECORDER_BACKEND.
 # В разработке используем консольный бэкенд (письма выводятся в консоль)
-EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+EMAIL_BACKEND = 'accounts.mail_backends.RecordingEmailBackend'
+EMAIL_RECORDER_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 DEFAULT_FROM_EMAIL = 'noreply@shop.local'
 
+# Журнал отправленных писем (accounts.mail_log), его показывает команда:
+#   python manage.py email_monitor
+EMAIL_LOG_PATH = os.environ.get('EMAIL_LOG_PATH', str(BASE_DIR / 'email_log.sqlite3'))
+EMAIL_LOG_MAX_ROWS = 100_000         # сколько последних писем хранить в журнале
+
+# Очередь исходящей почты (accounts.mail_queue)
+# Письма ставятся в очередь в запросе и отправляются командой:
+#   python manage.py send_queued_mail --loop
+MAIL_QUEUE_BATCH_SIZE = 100          # писем на одно SMTP-соединение
+MAIL_QUEUE_MAX_ATTEMPTS = 5          # после стольких неудач письмо помечается ошибочным
+MAIL_QUEUE_RETRY_DELAY = 60          # задержка перед первой повторной попыткой (сек)
+MAIL_QUEUE_MAX_RETRY_DELAY = 60 * 60 # максимальная задержка между попытками (сек)
+MAIL_QUEUE_LEASE = 5 * 60            # пачка резервируется за диспетчером на время отправки (сек)
+
 # Для продакшена раскомментируйте и настройте:
-# EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# EMAIL_RECORDER_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 # EMAIL_HOST = 'smtp.gmail.com'
 # EMAIL_PORT = 587
 # EMAIL_USE_TLS = True
@@ -139,6 +245,58 @@ DEFAULT_FROM_EMAIL = 'noreply@shop.local'
 # EMAIL_HOST_USER = 'your-email@mail.ru'
 # EMAIL_HOST_PASSWORD = 'your-password'
 
+# Статистика пользователей (accounts.stats, /api/user-stats/)
+ACCOUNTS_STATS_CACHE_TTL = 30  # секунд между пересчетами
+# Токен для сборщиков метрик без входа в систему (пустой - только сотрудники)
+ACCOUNTS_STATS_TOKEN = os.environ.get('ACCOUNTS_STATS_TOKEN', '')
+
+# Корзины пользователей с отложенной записью (cart.write_behind).
+# Изменения копятся в кеше и журнале и сбрасываются в БД командой:
+#   python manage.py flush_carts --loop
+# Отложенная запись требует общего для процессов кеша (проверка cart.E001),
+# поэтому с locmem корзины по умолчанию пишутся сразу в БД.
+CART_WRITE_BEHIND = CACHE_BACKEND != 'locmem'
+CART_JOURNAL_PATH = os.environ.get('CART_JOURNAL_PATH', str(BASE_DIR / 'cart_journal.jsonl'))
+CART_JOURNAL_FSYNC = False     # True - журнал переживает и отключение питания
+CART_FLUSH_INTERVAL = 30       # секунд между сбросами в режиме --loop
+CART_FLUSH_BATCH_SIZE = 500    # корзин в одной транзакции
+CART_STATE_TTL = 24 * 60 * 60  # сколько корзина хранится в кеше (сек)
+
+# История заказов в личном кабинете (orders.pagination)
+ORDER_HISTORY_PAGE_SIZE = 10
+
+# Ссылки активации аккаунта (accounts.tokens): подпись проверяется без БД
+ACCOUNTS_ACTIVATION_TOKEN_MAX_AGE = 3 * 24 * 60 * 60  # срок действия ссылки (сек)
+# Принимать ссылки старого формата (default_token_generator), выданные до
+# перехода на подписанные токены. Отключите через срок действия ссылки
+ACCOUNTS_LEGACY_ACTIVATION_TOKENS = True
+
+# Восстановление пароля (accounts.password_reset): запросы обрабатывает
+# команда send_queued_mail, срок действия ссылки - PASSWORD_RESET_TIMEOUT
+ACCOUNTS_PASSWORD_RESET_INTERVAL = 5 * 60   # не чаще одного письма пользователю (сек)
+ACCOUNTS_PASSWORD_RESET_BATCH_SIZE = 100    # запросов в одной транзакции
+
+# Снимки пользователей для AuthenticationMiddleware (accounts.user_cache)
+ACCOUNTS_USER_CACHE_TTL = 60  # секунд; ограничивает задержку между процессами
+
+# Список пользователей в админ-панели (accounts.changelist)
+# Режим поиска: prefix - по началу email через индекс, trigram - подстрока
+# через индексы pg_trgm (только PostgreSQL), contains - как в Django
+ACCOUNTS_ADMIN_SEARCH = os.environ.get('ACCOUNTS_ADMIN_SEARCH', 'prefix')
+ACCOUNTS_ADMIN_EXACT_COUNT_LIMIT = 10_000  # выборки больше считаются приблизительно
+
+# Массовые действия над пользователями в админ-панели (accounts.bulk_jobs).
+# Большие выборки выполняются в фоне командой:
+#   python manage.py run_user_jobs --loop
+ACCOUNTS_BULK_INLINE_LIMIT = 1000  # выборки не больше этого изменяются сразу
+ACCOUNTS_BULK_BATCH_SIZE = 1000    # пользователей в одной транзакции
+ACCOUNTS_BULK_PAUSE = 0.05         # пауза между пачками (сек)
+
+# Неактивированные регистрации старше этого возраста удаляет команда
+#   python manage.py purge_unconfirmed_users
+# Значение не может быть меньше ACCOUNTS_ACTIVATION_TOKEN_MAX_AGE
+ACCOUNTS_UNCONFIRMED_USER_MAX_AGE = 30 * 24 * 60 * 60  # секунд
+
 # URL для перенаправления после успешного входа
 LOGIN_REDIRECT_URL = '/profile/'
 # URL для перенаправления при выходе
@@ -14,6 +14,9 @@ urlpatterns = [
     
     # Подключаем URL-ы приложения accounts (регистрация, вход, профиль)
     path('', include('accounts.urls')),
+    
+    # Корзина покупок
+    path('cart/', include('cart.urls')),
 ]
 
 # Добавляем обработку медиа файлов для режима разработки
@@ -10,9 +10,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'shop_project.settings')
 django.setup()
 
 from accounts.models import CustomUser
-from django.contrib.auth.tokens import default_token_generator
-from django.utils.encoding import force_bytes
-from django.utils.http import urlsafe_base64_encode
+from accounts.tokens import activation_token_generator
 from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.conf import settings
@@ -42,8 +40,8 @@ def create_test_user_and_send_email():
         print(f"✅ Создан пользователь: {user.email}")
     
     # Генерируем токен активации
-    token = default_token_generator.make_token(user)
-    uid = urlsafe_base64_encode(force_bytes(user.pk))
+    link_args = activation_token_generator.make_link_args(user)
+    uid, token = link_args['uidb64'], link_args['token']
     
     print(f"🔑 Токен активации: {token}")
     print(f"🆔 UID: {uid}")